@@ -0,0 +1,163 @@
+"""partition domain event
+
+Revision ID: b41d8e6f2c37
+Revises: 7e2b0c4d9a61
+Create Date: 2026-10-19 20:30:27.530841+08:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "b41d8e6f2c37"
+down_revision = "7e2b0c4d9a61"
+branch_labels = None
+depends_on = None
+
+# partitions of the months of the stored events, and of the next months
+MONTHS_AHEAD = 2
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE ddd_service.domain_event RENAME TO domain_event_unpartitioned")
+    op.execute(
+        "ALTER TABLE ddd_service.domain_event_unpartitioned "
+        "RENAME CONSTRAINT domain_event_pkey TO domain_event_unpartitioned_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ddd_service.ix_ddd_service_domain_event_body "
+        "RENAME TO ix_ddd_service_domain_event_unpartitioned_body"
+    )
+    op.execute(
+        "ALTER INDEX ddd_service.ix_ddd_service_domain_event_name "
+        "RENAME TO ix_ddd_service_domain_event_unpartitioned_name"
+    )
+    op.create_table(
+        "domain_event",
+        sa.Column(
+            "id",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('ddd_service.domain_event_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("body", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("span_id", sa.String(), nullable=True),
+        sa.Column("parent_span_id", sa.String(), nullable=True),
+        sa.Column("trace_id", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        schema="ddd_service",
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index(
+        "ix_ddd_service_domain_event_body",
+        "domain_event",
+        ["body"],
+        unique=False,
+        schema="ddd_service",
+        postgresql_using="gin",
+    )
+    op.create_index(
+        op.f("ix_ddd_service_domain_event_name"), "domain_event", ["name"], unique=False, schema="ddd_service"
+    )
+    op.execute("CREATE TABLE ddd_service.domain_event_default PARTITION OF ddd_service.domain_event DEFAULT")
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month timestamp;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', coalesce(first_created_at, now()) AT TIME ZONE 'UTC'),
+                    date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{MONTHS_AHEAD} month',
+                    interval '1 month'
+                )
+                FROM (
+                    SELECT min(created_at) AS first_created_at
+                    FROM ddd_service.domain_event_unpartitioned
+                ) AS stored
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE ddd_service.%I PARTITION OF ddd_service.domain_event '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'domain_event_p' || to_char(month, 'YYYYMM'),
+                    month AT TIME ZONE 'UTC',
+                    (month + interval '1 month') AT TIME ZONE 'UTC'
+                );
+            END LOOP;
+        END
+        $$;
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO ddd_service.domain_event
+            (id, name, body, version, created_at, span_id, parent_span_id, trace_id)
+        SELECT id, name, body, version, coalesce(created_at, now()), span_id, parent_span_id, trace_id
+        FROM ddd_service.domain_event_unpartitioned
+        """
+    )
+    op.execute("ALTER SEQUENCE ddd_service.domain_event_id_seq OWNED BY ddd_service.domain_event.id")
+    op.drop_table("domain_event_unpartitioned", schema="ddd_service")
+
+
+def downgrade() -> None:
+    op.execute("ALTER SEQUENCE ddd_service.domain_event_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE ddd_service.domain_event RENAME TO domain_event_partitioned")
+    op.execute(
+        "ALTER INDEX ddd_service.ix_ddd_service_domain_event_body "
+        "RENAME TO ix_ddd_service_domain_event_partitioned_body"
+    )
+    op.execute(
+        "ALTER INDEX ddd_service.ix_ddd_service_domain_event_name "
+        "RENAME TO ix_ddd_service_domain_event_partitioned_name"
+    )
+    op.execute(
+        "ALTER TABLE ddd_service.domain_event_partitioned "
+        "RENAME CONSTRAINT domain_event_pkey TO domain_event_partitioned_pkey"
+    )
+    op.create_table(
+        "domain_event",
+        sa.Column(
+            "id",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('ddd_service.domain_event_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("body", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("version", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("span_id", sa.String(), nullable=True),
+        sa.Column("parent_span_id", sa.String(), nullable=True),
+        sa.Column("trace_id", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        schema="ddd_service",
+    )
+    op.execute(
+        """
+        INSERT INTO ddd_service.domain_event
+            (id, name, body, version, created_at, span_id, parent_span_id, trace_id)
+        SELECT id, name, body, version, created_at, span_id, parent_span_id, trace_id
+        FROM ddd_service.domain_event_partitioned
+        """
+    )
+    op.execute("ALTER SEQUENCE ddd_service.domain_event_id_seq OWNED BY ddd_service.domain_event.id")
+    # drops the partitions
+    op.drop_table("domain_event_partitioned", schema="ddd_service")
+    op.create_index(
+        "ix_ddd_service_domain_event_body",
+        "domain_event",
+        ["body"],
+        unique=False,
+        schema="ddd_service",
+        postgresql_using="gin",
+    )
+    op.create_index(
+        op.f("ix_ddd_service_domain_event_name"), "domain_event", ["name"], unique=False, schema="ddd_service"
+    )
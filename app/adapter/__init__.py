@@ -1,3 +0,0 @@
-import importlib
-
-importlib.import_module("app.adapter.event_handler")
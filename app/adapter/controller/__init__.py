@@ -1,3 +1,5 @@
+from .domain_event.domain_event_controller import DomainEventController
 from .your_bounded_context.your_aggregate_controller import YourAggregateController
 
+domain_event_controller = DomainEventController()
 your_aggregate_controller = YourAggregateController()
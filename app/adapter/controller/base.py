@@ -1,19 +1,24 @@
 import uuid
-from collections.abc import Iterable
+from collections.abc import Callable, Hashable, Iterable
 from dataclasses import dataclass
 from functools import wraps
 from typing import Self
 
-from dataclass_mixins import DataclassMixin, camel_to_snake_case
+import orjson
+from dataclass_mixins import DataclassMixin
 from pendulum.datetime import DateTime
 from sqlalchemy.exc import IntegrityError, NoResultFound, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.adapter.repository.base import session_provider
+from app.adapter.repository.outbox_repository import OutboxRepository
+from app.config import config
 from app.core.ddd_base import UseCaseBase, User
 from app.logger import ServiceLogger
 from app.package_instance import message_queue_publisher
 from app.trace import TokenInfo
+from packages.dataclass_codec import compile_decoder, compile_encoder, to_snake_case
+from packages.single_flight import SingleFlight
 
 
 def create_user(token_info: TokenInfo) -> User:
@@ -33,11 +38,24 @@ class RequestBase(DataclassMixin):
 
     @classmethod
     def create_from_body(cls, body: dict, token_info: TokenInfo, trace_id: str | None) -> Self:
-        d = cls.create_from_camel_case_json(body)
+        try:
+            # the camelCase decoder of a request type is compiled on first use,
+            # it raises for primitive fields of other types
+            d = compile_decoder(cls, strict=True)(body)
+        except Exception:
+            # keep the validation errors of the reflective path for malformed bodies
+            d = cls.create_from_camel_case_json(body)
         d.doer = create_user(token_info)
         d.trace_id = trace_id
         return d
 
+    def get_single_flight_key(self) -> Hashable:
+        """All fields except the doer and the trace id."""
+        fields = compile_encoder(type(self), camel_case=False)(self)
+        fields.pop("doer")
+        fields.pop("trace_id")
+        return orjson.dumps(fields)
+
 
 @dataclass
 class SearchRequestBase(RequestBase):
@@ -53,12 +71,12 @@ class SearchRequestBase(RequestBase):
     def __post_init__(self):
         new_search_key_fields = []
         for field in self.search_key_fields or []:
-            new_search_key_fields.append(camel_to_snake_case(field))
+            new_search_key_fields.append(to_snake_case(field))
         self.search_key_fields = new_search_key_fields
 
         new_sort_by = []
         for s in self.sort_by or []:
-            new_sort_by.append(camel_to_snake_case(s))
+            new_sort_by.append(to_snake_case(s))
         self.sort_by = new_sort_by
 
 
@@ -86,6 +104,16 @@ class UserResponse(DataclassMixin):
         return resp
 
 
+@dataclass
+class VersionResponse(DataclassMixin):
+    """The version of a resource for conditional requests,
+    it is read before the resource so never newer than it.
+    """
+
+    version: str
+    last_modified: DateTime | None
+
+
 class ControllerBase:
     def __init__(self):
         self.session_provider = session_provider
@@ -93,6 +121,7 @@ class ControllerBase:
         self.use_cases: list[UseCaseBase] = []
 
         self.message_queue_publisher = message_queue_publisher
+        self.outbox_repository = OutboxRepository(self.session_provider)
 
     @property
     def session(self) -> AsyncSession:
@@ -107,6 +136,28 @@ class ControllerBase:
     def add_use_case(self, use_case: UseCaseBase):
         self.use_cases.append(use_case)
 
+    @staticmethod
+    def single_flight(key: Callable[..., Hashable] = RequestBase.get_single_flight_key):
+        """Concurrent calls of the same key in the process share one call, outside of
+        `connect_db_session`, so one session serves them all.
+
+        Only for reads whose result does not depend on the doer.
+        :param key: The key of the requests of a call.
+        """
+
+        def inner(func):
+            flight = SingleFlight()
+
+            @wraps(func)
+            async def wrapper(self: ControllerBase, *requests: RequestBase):
+                if config.single_flight != "true":
+                    return await func(self, *requests)
+                return await flight.do((id(self), key(*requests)), lambda: func(self, *requests))
+
+            return wrapper
+
+        return inner
+
     @staticmethod
     def connect_db_session(
         exception_message: str = "",
@@ -121,6 +172,14 @@ class ControllerBase:
                         trace_id = requests[0].trace_id if len(requests) > 0 else None
                         self.set_tracing(trace_id)
                         result = await func(self, *requests)
+                        if (
+                            config.message_queue_outbox == "true"
+                            and self.message_queue_publisher.messages
+                        ):
+                            # committed together with the data, published by the outbox relay
+                            self.outbox_repository.add_messages(
+                                self.message_queue_publisher.encode_messages()
+                            )
                         await self.session.flush()
                     except NoResultFound as e:
                         await self.session.rollback()
@@ -0,0 +1,20 @@
+from sqlalchemy.exc import NoResultFound
+
+from app.adapter.controller.base import ControllerBase
+from app.adapter.controller.domain_event.request import GetTraceRequest
+from app.adapter.controller.domain_event.response import TraceResponse
+from app.adapter.repository.domain_event_repository import DomainEventRepository
+
+
+class DomainEventController(ControllerBase):
+    def __init__(self):
+        super().__init__()
+
+        self.repository = DomainEventRepository(self.session_provider)
+
+    @ControllerBase.connect_db_session()
+    async def get_trace(self, get_request: GetTraceRequest) -> TraceResponse:
+        rows = await self.repository.load_trace_events(get_request.id, get_request.span_id)
+        if not rows:
+            raise NoResultFound(f"Trace {get_request.id} is not found")
+        return TraceResponse.create_from_rows(get_request.id, rows)
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+from app.adapter.controller.base import RequestBase
+
+
+@dataclass
+class GetTraceRequest(RequestBase):
+    id: str
+    span_id: str | None
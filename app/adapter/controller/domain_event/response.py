@@ -0,0 +1,47 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import pendulum
+from dataclass_mixins import DataclassMixin
+from pendulum.datetime import DateTime
+from sqlalchemy import Row
+
+
+@dataclass
+class TraceEventResponse(DataclassMixin):
+    id: int
+    name: str
+    body: dict
+    version: int
+    created_at: DateTime
+    span_id: str
+    parent_span_id: str | None
+    children: list["TraceEventResponse"]
+
+
+@dataclass
+class TraceResponse(DataclassMixin):
+    trace_id: str
+    total: int
+    events: list[TraceEventResponse]
+
+    @classmethod
+    def create_from_rows(cls, trace_id: str, rows: Sequence[Row]) -> "TraceResponse":
+        """Builds the event tree from the rows of `load_trace_events`, parents come first."""
+        events: list[TraceEventResponse] = []
+        by_span_id: dict[str, TraceEventResponse] = {}
+        for row in rows:
+            event = TraceEventResponse(
+                id=row.id,
+                name=row.name,
+                body=row.body,
+                version=row.version,
+                created_at=pendulum.instance(row.created_at),
+                span_id=row.span_id,
+                parent_span_id=row.parent_span_id,
+                children=[],
+            )
+            parent = by_span_id.get(row.parent_span_id) if row.depth else None
+            (parent.children if parent else events).append(event)
+            by_span_id[row.span_id] = event
+        return cls(trace_id=trace_id, total=len(rows), events=events)
@@ -11,6 +11,13 @@ class GetYourAggregateRequest(RequestBase):
     id: str
 
 
+@dataclass
+class SearchOperationHistoriesRequest(RequestBase):
+    id: str
+    offset: int
+    limit: int
+
+
 @dataclass
 class SearchYourAggregatesRequest(SearchRequestBase):
     ids: list[str] | None
@@ -6,8 +6,12 @@ from pendulum.datetime import DateTime
 
 from app.adapter.controller.base import UserResponse
 from app.core.your_bounded_context.domain.entity.your_aggregate import YourAggregate
-from app.core.your_bounded_context.domain.repository import SearchResult
+from app.core.your_bounded_context.domain.repository import (
+    OperationHistorySearchResult,
+    SearchResult,
+)
 from app.core.your_bounded_context.domain.value_object.your_aggregate_value_object import (
+    OperationHistory,
     OperationHistoryType,
     YourAggregateStatus,
     YourValueObject,
@@ -28,6 +32,17 @@ class OperationHistoryResponse(DataclassMixin):
     doer: UserResponse
     created_at: DateTime
 
+    @classmethod
+    def create_from_object(cls, obj: OperationHistory) -> "OperationHistoryResponse":
+        resp = super().create_from_object(obj)
+        resp.doer = UserResponse.create_from_object(obj.doer)
+        resp.data = []
+        for d in obj.data or []:
+            d_resp = OperationHistoryDataResponse.create_from_object(d)
+            d_resp.field = snake_to_camel_case(d.field)
+            resp.data.append(d_resp)
+        return resp
+
 
 @dataclass
 class YourAggregateResponse(DataclassMixin):
@@ -43,17 +58,9 @@ class YourAggregateResponse(DataclassMixin):
     def create_from_object(cls, obj: YourAggregate) -> "YourAggregateResponse":
         resp = super().create_from_object(obj)
 
-        for h_idx, h in enumerate(obj.operation_histories):
-            h_resp = OperationHistoryResponse.create_from_object(h)
-            h_resp.doer = UserResponse.create_from_object(h.doer)
-            if h.data is not None:
-                for d_idx, d in enumerate(h.data):
-                    d_resp = OperationHistoryDataResponse.create_from_object(d)
-                    d_resp.field = snake_to_camel_case(d.field)
-                    h_resp.data[d_idx] = d_resp
-            else:
-                h_resp.data = []
-            resp.operation_histories[h_idx] = h_resp
+        resp.operation_histories = [
+            OperationHistoryResponse.create_from_object(h) for h in obj.operation_histories
+        ]
 
         resp.creator = UserResponse.create_from_object(obj.creator)
 
@@ -71,3 +78,18 @@ class SearchYourAggregatesResponse(DataclassMixin):
             total=obj.total,
             results=[YourAggregateResponse.create_from_object(i) for i in obj.results],
         )
+
+
+@dataclass
+class SearchOperationHistoriesResponse(DataclassMixin):
+    total: int
+    results: list[OperationHistoryResponse]
+
+    @classmethod
+    def create_from_object(
+        cls, obj: OperationHistorySearchResult
+    ) -> "SearchOperationHistoriesResponse":
+        return cls(
+            total=obj.total,
+            results=[OperationHistoryResponse.create_from_object(h) for h in obj.results],
+        )
@@ -1,26 +1,39 @@
 from io import BytesIO
 
-from app.adapter.controller.base import ControllerBase
+import orjson
+import pendulum
+
+from app.adapter.controller.base import ControllerBase, VersionResponse
 from app.adapter.controller.your_bounded_context.request import (
     CreateYourAggregateRequest,
     DeleteYourAggregateRequest,
     GetYourAggregateRequest,
+    SearchOperationHistoriesRequest,
     SearchYourAggregatesRequest,
     UpdateYourAggregateRequest,
     VoidYourAggregateRequest,
 )
 from app.adapter.controller.your_bounded_context.response import (
+    SearchOperationHistoriesResponse,
     SearchYourAggregatesResponse,
     YourAggregateResponse,
 )
-from app.adapter.repository.your_aggregate_repository import YourAggregateRepository
+from app.adapter.repository.your_aggregate_repository import (
+    YourAggregateRepository,
+    YourAggregateStamp,
+)
 from app.config import config
+from app.core.ddd_base import id_generator
 from app.core.your_bounded_context.use_case.your_aggregate_use_case import (
     YourAggregateUseCase,
 )
 from packages.dataclass2excel import create_xlsx
 from packages.dataclass2excel.type import YourAggregateExcel
 
+# the latest histories in the detail, all of them are paginated by `search_operation_histories`,
+# documented as the `maxItems` of `operationHistories` in the OpenAPI spec
+DETAIL_OPERATION_HISTORY_LIMIT = 20
+
 
 class YourAggregateController(ControllerBase):
     def __init__(self):
@@ -30,13 +43,59 @@ class YourAggregateController(ControllerBase):
         self.use_case = YourAggregateUseCase(self.repository)
         self.add_use_case(self.use_case)
 
-    @ControllerBase.connect_db_session()
+    @staticmethod
+    def create_your_aggregate_version(stamp: YourAggregateStamp) -> VersionResponse:
+        modified_at = int(stamp.modified_at.timestamp() * 1_000_000)
+        return VersionResponse(
+            f"{stamp.id}.{modified_at:x}.{stamp.history_id or 0:x}",
+            pendulum.instance(stamp.last_modified),
+        )
+
     async def get_your_aggregate(
         self, get_request: GetYourAggregateRequest
     ) -> YourAggregateResponse:
-        your_aggregate = await self.repository.load_your_aggregate(get_request.id, lock=False)
-        return YourAggregateResponse.create_from_object(your_aggregate)
+        your_aggregate, _ = await self.get_your_aggregate_with_version(get_request)
+        return your_aggregate
 
+    @ControllerBase.single_flight(key=lambda r: r.id)
+    @ControllerBase.connect_db_session()
+    async def get_your_aggregate_with_version(
+        self, get_request: GetYourAggregateRequest
+    ) -> tuple[YourAggregateResponse, VersionResponse]:
+        """The aggregate and its version read before it, by the same call,
+        so the version is never newer than the aggregate, even for the coalesced calls.
+        """
+        stamp = await self.repository.load_your_aggregate_stamp(get_request.id)
+        # a cached aggregate older than the stamp is not served
+        your_aggregate = await self.repository.load_your_aggregate(
+            get_request.id, lock=False, history_limit=DETAIL_OPERATION_HISTORY_LIMIT, stamp=stamp
+        )
+        return (
+            YourAggregateResponse.create_from_object(your_aggregate),
+            self.create_your_aggregate_version(stamp),
+        )
+
+    @ControllerBase.single_flight(key=lambda r: r.id)
+    @ControllerBase.connect_db_session()
+    async def get_your_aggregate_version(
+        self, get_request: GetYourAggregateRequest
+    ) -> VersionResponse:
+        stamp = await self.repository.load_your_aggregate_stamp(get_request.id)
+        return self.create_your_aggregate_version(stamp)
+
+    @ControllerBase.single_flight()
+    @ControllerBase.connect_db_session()
+    async def search_operation_histories(
+        self, search_request: SearchOperationHistoriesRequest
+    ) -> SearchOperationHistoriesResponse:
+        # not found instead of an empty page
+        await self.repository.load_your_aggregate(search_request.id, lock=False)
+        result = await self.repository.search_operation_histories(
+            search_request.id, search_request.offset, search_request.limit
+        )
+        return SearchOperationHistoriesResponse.create_from_object(result)
+
+    @ControllerBase.single_flight()
     @ControllerBase.connect_db_session()
     async def search_your_aggregates(
         self, search_request: SearchYourAggregatesRequest
@@ -56,6 +115,51 @@ class YourAggregateController(ControllerBase):
 
         return SearchYourAggregatesResponse.create_from_object(result)
 
+    @staticmethod
+    def create_your_aggregates_version(version: int | None) -> VersionResponse:
+        if version is None:
+            # matches no previous version
+            return VersionResponse(f"unknown.{id_generator.generate()}", None)
+        return VersionResponse(f"{version:x}", None)
+
+    @ControllerBase.single_flight(key=lambda r: None)
+    @ControllerBase.connect_db_session()
+    async def get_your_aggregates_version(
+        self, search_request: SearchYourAggregatesRequest
+    ) -> VersionResponse:
+        # any save may change any search, the searches are cached by the version as well
+        version = await self.repository.load_your_aggregates_version()
+        return self.create_your_aggregates_version(version)
+
+    async def search_your_aggregates_json(
+        self, search_request: SearchYourAggregatesRequest
+    ) -> orjson.Fragment:
+        document, _ = await self.search_your_aggregates_json_with_version(search_request)
+        return document
+
+    @ControllerBase.single_flight()
+    @ControllerBase.connect_db_session()
+    async def search_your_aggregates_json_with_version(
+        self, search_request: SearchYourAggregatesRequest
+    ) -> tuple[orjson.Fragment, VersionResponse]:
+        """The same response as `search_your_aggregates`, serialized by Postgres,
+        and the version of the table read before it by the same call.
+        """
+        version = await self.repository.load_your_aggregates_version()
+        document = await self.repository.search_your_aggregates_json(
+            ids=search_request.ids,
+            statuses=search_request.statuses,
+            date_fields=search_request.date_fields,
+            start_time=search_request.start_time,
+            end_time=search_request.end_time,
+            search_key_fields=search_request.search_key_fields,
+            search_keys=search_request.search_keys,
+            sort_by=search_request.sort_by,
+            offset=search_request.offset,
+            limit=search_request.limit,
+        )
+        return orjson.Fragment(document), self.create_your_aggregates_version(version)
+
     @ControllerBase.connect_db_session()
     async def export_your_aggregates(self, search_request: SearchYourAggregatesRequest) -> BytesIO:
         result = await self.repository.search_your_aggregates(
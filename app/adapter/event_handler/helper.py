@@ -1,11 +1,26 @@
 from collections.abc import Callable
+from contextlib import asynccontextmanager
 from functools import wraps
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.adapter.repository.base import session_provider
+from app.adapter.repository.base import session_provider, set_session_provider
+from app.adapter.repository.outbox_repository import OutboxRepository
+from app.config import config
 from app.core.ddd_base import DomainEvent, UseCaseBase
+from app.core.ddd_base.event_bus import USES_REQUEST_SESSION
 from app.logger import ServiceLogger
+from app.package_instance import message_queue_publisher, set_message_queue_publisher
+
+
+@asynccontextmanager
+async def background_event_scope():
+    """Runs a background event handler with its own session and publisher, not the request ones."""
+    set_session_provider()
+    set_message_queue_publisher()
+    yield
+    if message_queue_publisher.messages:
+        message_queue_publisher.publish_messages()
 
 
 class EventHandlerHelper:
@@ -14,6 +29,9 @@ class EventHandlerHelper:
         self.logger = ServiceLogger(self.__class__.__name__)
         self.use_cases: list[UseCaseBase] = []
 
+        self.message_queue_publisher = message_queue_publisher
+        self.outbox_repository = OutboxRepository(self.session_provider)
+
     @property
     def session(self) -> AsyncSession:
         return self.session_provider.session
@@ -31,20 +49,34 @@ class EventHandlerHelper:
     ):
         def inner(func: Callable):
             @wraps(func)
-            async def wrapper(event: DomainEvent, *args, **kwargs):
+            async def wrapper(event: DomainEvent | list[DomainEvent], *args, **kwargs):
+                # batch handlers receive the events of a unit of work, traced by the first one
+                parent_event = event[0] if isinstance(event, list) else event
                 async with self.session_provider:
                     try:
-                        self.set_tracing(event)
+                        self.set_tracing(parent_event)
                         await func(event, *args, **kwargs)
+                        if (
+                            config.message_queue_outbox == "true"
+                            and self.message_queue_publisher.messages
+                        ):
+                            # after-commit handlers run in a transaction of their own
+                            self.outbox_repository.add_messages(
+                                self.message_queue_publisher.encode_messages()
+                            )
                         await self.session.flush()
                     except Exception as e:
                         await self.session.rollback()
                         if exception_message:
                             self.logger.warning(exception_message)
                         else:
-                            self.logger.warning("%s event handler failed", type(event).__name__)
+                            self.logger.warning(
+                                "%s event handler failed", type(parent_event).__name__
+                            )
                         raise e
 
+            # nested in the transaction of the request, it shares its session
+            setattr(wrapper, USES_REQUEST_SESSION, True)
             return wrapper
 
         return inner
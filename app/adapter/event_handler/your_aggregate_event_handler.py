@@ -1,7 +1,7 @@
 import app.core.your_bounded_context.domain.event as your_aggregate_event
 from app.adapter.event_handler.helper import EventHandlerHelper
 from app.adapter.repository.your_aggregate_repository import YourAggregateRepository
-from app.core.ddd_base import event_bus
+from app.core.ddd_base import DispatchPhase, event_bus
 from app.core.your_bounded_context.domain.value_object.your_aggregate_value_object import (
     YourAggregateStatus,
     YourValueObject,
@@ -32,6 +32,8 @@ helper = YourAggregateEventHandlerHelper()
 
 
 class YourAggregateEventHandler:
+    # handlers using the database session of the request are never subscribed as concurrent,
+    # after-commit handlers do not hold the row locks of the request
     @staticmethod
     @event_bus.subscribe(event_types=[your_aggregate_event.YourAggregateCreated])
     @helper.connect_db_session()
@@ -47,22 +49,29 @@ class YourAggregateEventHandler:
             )
             await helper.use_case.update_your_aggregate(event.your_aggregate_id, v, event.doer)
 
+    # set-based, one query and one message for all voided aggregates of the unit of work
     @staticmethod
-    @event_bus.subscribe(event_types=[your_aggregate_event.YourAggregateVoided])
+    @event_bus.subscribe_batch(
+        event_types=[your_aggregate_event.YourAggregateVoided],
+        phase=DispatchPhase.AFTER_COMMIT,
+    )
     @helper.connect_db_session()
-    async def handle_your_aggregate_voided(
-        event: your_aggregate_event.YourAggregateVoided,
+    async def handle_your_aggregates_voided(
+        events: list[your_aggregate_event.YourAggregateVoided],
     ):
-        your_aggregate = await helper.repository.load_your_aggregate(
-            event.your_aggregate_id, lock=False
+        result = await helper.repository.search_your_aggregates(
+            ids=list(dict.fromkeys(e.your_aggregate_id for e in events)),
+            statuses=[YourAggregateStatus.VOIDED.value],
+            sort_by=["created_at"],
+            use_cache=False,
         )
-        if your_aggregate.status == YourAggregateStatus.VOIDED:
-            payload = YourAggregateVoided(event.your_aggregate_id)
+        if result.results:
+            payloads = [YourAggregateVoided(a.id) for a in result.results]
             message_queue_publisher.push_message(
                 RoutingKey.YOUR_AGGREGATE_SERVICE.value,
                 QueueMessage(
                     get_trace_id(),
                     YourAggregateServiceFuntion.YOUR_AGGREGATE_VOIDED,
-                    [payload],
+                    payloads,
                 ),
             )
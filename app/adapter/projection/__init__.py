@@ -0,0 +1,4 @@
+from .registry import Projection, ProjectionRegistry, projection_registry
+from .your_aggregate_projection import project_your_aggregate
+
+__all__ = ["Projection", "ProjectionRegistry", "project_your_aggregate", "projection_registry"]
@@ -0,0 +1,50 @@
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from app.core.ddd_base import DomainEvent
+
+
+@dataclass(frozen=True)
+class Projection:
+    name: str
+    event_types: tuple[type[DomainEvent], ...]
+    handler: Callable[[DomainEvent], Awaitable]
+    # clears the read model before it is rebuilt from the first event
+    reset: Callable[[], Awaitable] | None = None
+
+
+class ProjectionRegistry:
+    """Read models and caches built from domain events, rebuilt by `app/event_replay.py`."""
+
+    def __init__(self):
+        self.projections: dict[str, Projection] = {}
+
+    def register(
+        self,
+        name: str,
+        event_types: list[type[DomainEvent]],
+        reset: Callable[[], Awaitable] | None = None,
+    ):
+        """Decorator for registering a function as the handler of a projection.
+        :param name: Name of the projection.
+        :param event_types: Type of events to project, their subclasses are included.
+        :param reset: Clears the read model of the projection, called by a replay from scratch.
+        :return: The outer function.
+        """
+
+        def outer(func: Callable[[DomainEvent], Awaitable]):
+            self.projections[name] = Projection(name, tuple(event_types), func, reset)
+            return func
+
+        return outer
+
+    def get_projections(self, names: list[str] | None = None) -> list[Projection]:
+        if not names:
+            return list(self.projections.values())
+        unknown = set(names) - set(self.projections)
+        if unknown:
+            raise ValueError(f"Unknown projections {sorted(unknown)}")
+        return [self.projections[name] for name in names]
+
+
+projection_registry = ProjectionRegistry()
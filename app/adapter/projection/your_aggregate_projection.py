@@ -0,0 +1,62 @@
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+
+from app.adapter.projection.registry import projection_registry
+from app.adapter.repository.base import session_provider
+from app.adapter.repository.orm import YourAggregateModel
+from app.adapter.repository.your_aggregate_repository import YourAggregateRepository
+from app.core.your_bounded_context.domain.event import (
+    YourAggregateCreated,
+    YourAggregateDeleted,
+    YourAggregateUpdated,
+    YourAggregateVoided,
+)
+from app.core.your_bounded_context.domain.value_object.your_aggregate_value_object import (
+    YourAggregateStatus,
+)
+
+type YourAggregateEvent = (
+    YourAggregateCreated | YourAggregateUpdated | YourAggregateVoided | YourAggregateDeleted
+)
+
+
+# restores the rows of the aggregates, e.g. written after the backup a database is restored from,
+# the operation histories and archive rows are not projected
+@projection_registry.register(
+    "your_aggregate",
+    [YourAggregateCreated, YourAggregateUpdated, YourAggregateVoided, YourAggregateDeleted],
+)
+async def project_your_aggregate(event: YourAggregateEvent):
+    repository = YourAggregateRepository(session_provider)
+    session = repository.session
+    model = YourAggregateModel
+    at = event.tracer.created_at
+    match event:
+        case YourAggregateCreated():
+            values = {
+                "your_value_object": event.your_value_object.serialize(),
+                "status": YourAggregateStatus.CREATED.value,
+                "creator": event.doer.serialize(),
+                "created_at": at,
+                "updated_at": None,
+            }
+            stmt = insert(model).values(id=event.your_aggregate_id, **values)
+            await session.execute(
+                stmt.on_conflict_do_update(index_elements=[model.id], set_=values)
+            )
+        case YourAggregateUpdated():
+            await session.execute(
+                sa.update(model)
+                .where(model.id == event.your_aggregate_id)
+                .values(your_value_object=event.your_value_object.serialize(), updated_at=at)
+            )
+        case YourAggregateVoided():
+            await session.execute(
+                sa.update(model)
+                .where(model.id == event.your_aggregate_id)
+                .values(status=YourAggregateStatus.VOIDED.value, updated_at=at)
+            )
+        case YourAggregateDeleted():
+            await session.execute(sa.delete(model).where(model.id == event.your_aggregate_id))
+    # evicted from the read caches like the saves of the repository
+    repository.track_change(event.your_aggregate_id)
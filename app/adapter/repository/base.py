@@ -1,36 +1,130 @@
+import asyncio
 import json
 import re
-import uuid
-from contextvars import ContextVar
+from contextvars import ContextVar, Token
 from dataclasses import dataclass
-from typing import ClassVar, Generic, TypeVar
+from enum import Enum
+from typing import Any, ClassVar, Generic, TypeVar
 
+import orjson
+import pendulum
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import JSONB, JSONPATH
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH, aggregate_order_by, insert
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import InstrumentedAttribute
 from sqlalchemy.orm.state import InstanceState
 from sqlalchemy.sql.base import ExecutableOption
 from sqlalchemy.sql.expression import UnaryExpression
 from werkzeug.local import LocalProxy
 
+from app.adapter.repository.cache import (
+    CACHE_INVALIDATION_CHANNEL,
+    AggregateCache,
+    QueryCache,
+    create_invalidation_payload,
+    has_cache,
+    invalidate_caches,
+    model_to_row,
+    row_to_model,
+)
 from app.adapter.repository.orm import (
     ArchiveMixin,
     DomainEventModel,
+    TableVersionModel,
 )
-from app.core.ddd_base import AggregateRoot, DomainEvent
+from app.config import config
+from app.core.ddd_base import AggregateRoot, DomainEvent, event_bus, id_generator
+from app.logger import ServiceLogger
 from app.port.storage.sql.postgres import DB_Session
+from packages.json_diff import diff, patch
+
+logger = ServiceLogger(__name__)
+# the tables of repositories counting their changes saved in the session, see `count_changes`
+CHANGED_TABLES = "changed_tables"
+# the keys of the cached tables saved in the session, by table
+CHANGED_KEYS = "changed_keys"
+COUNT_CHANGES_RETRY_SECONDS = 1
+COUNT_CHANGES_MAX_RETRY_SECONDS = 30
+# the tables of the failed bumps of this process, their versions validate nothing
+# until a bump started after the failure succeeds
+unbumped_tables: set[str] = set()
+_retry_tasks: set[asyncio.Task] = set()
 
 
 class SessionProvider:
-    def __init__(self):
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = DB_Session):
         self.session: AsyncSession = None
         self.session_count = 0
+        self.transaction_token: Token | None = None
+        self.session_factory = session_factory
+
+    def create_session(self) -> AsyncSession:
+        return self.session_factory()
+
+    async def count_changes(self, tables: set[str]) -> bool:
+        """Bumps the versions of the tables after the commit, by a transaction of its own,
+        so the saves of a table do not wait for each other. A version is read before what it
+        versions, it may be older but never newer than what is read after it.
+        :return: False if the versions are not bumped.
+        """
+        # a bump started after a failure is newer than the failed one
+        recovered = tables & unbumped_tables
+        try:
+            async with self.create_session() as session:
+                # in one order, two bumps never wait for each other's rows
+                for table in sorted(tables):
+                    stmt = insert(TableVersionModel).values(table_name=table, version=1)
+                    await session.execute(
+                        stmt.on_conflict_do_update(
+                            index_elements=[TableVersionModel.table_name],
+                            set_={
+                                "version": TableVersionModel.version + 1,
+                                "updated_at": sa.func.now(),
+                            },
+                        )
+                    )
+                await session.commit()
+        except Exception as e:
+            logger.error("table versions %s not bumped: %s", sorted(tables), e, exc_info=e)
+            return False
+        unbumped_tables.difference_update(recovered)
+        return True
+
+    def retry_count_changes(self, tables: set[str]):
+        """Marks the versions of the tables unknown to this process and bumps them again
+        in the background, until a bump succeeds.
+        """
+        unbumped_tables.update(tables)
+        task = asyncio.create_task(self._retry_count_changes(tables))
+        _retry_tasks.add(task)
+        task.add_done_callback(_retry_tasks.discard)
+
+    async def _retry_count_changes(self, tables: set[str]):
+        delay = COUNT_CHANGES_RETRY_SECONDS
+        # bumped by another save meanwhile
+        while tables & unbumped_tables:
+            await asyncio.sleep(delay)
+            if await self.count_changes(tables & unbumped_tables):
+                return
+            delay = min(delay * 2, COUNT_CHANGES_MAX_RETRY_SECONDS)
+
+    async def notify_changes(self, changed_keys: dict[str, set[str]]):
+        """Notifies the other processes of the saved keys by one statement, delivered once the
+        transaction is committed.
+        """
+        notifies = [
+            sa.func.pg_notify(
+                CACHE_INVALIDATION_CHANNEL, create_invalidation_payload(table, sorted(keys))
+            )
+            for table, keys in changed_keys.items()
+        ]
+        await self.session.execute(sa.select(*notifies))
 
     async def __aenter__(self):
         if self.session_count == 0:
-            self.session = DB_Session()
+            self.session = self.create_session()
+            self.transaction_token = event_bus.begin_transaction()
         self.session_count += 1
         return self
 
@@ -38,8 +132,14 @@ class SessionProvider:
         self.session_count -= 1
         if self.session_count <= 0:
             self.session_count = 0
+            deferred = event_bus.end_transaction(self.transaction_token)
+            self.transaction_token = None
             try:
+                changed_keys = self.session.info.pop(CHANGED_KEYS, None)
+                if changed_keys:
+                    await self.notify_changes(changed_keys)
                 await self.session.commit()
+                changed_tables = self.session.info.pop(CHANGED_TABLES, None)
                 await self.session.__aexit__(exc_type, exc_val, exc_tb)
                 self.session = None
             except Exception as e:
@@ -48,13 +148,23 @@ class SessionProvider:
                 self.session = None
                 raise e
 
+            # evicted before the after-commit handlers read them
+            for table, keys in (changed_keys or {}).items():
+                invalidate_caches(table, list(keys))
+            if exc_type is None and changed_tables and not await self.count_changes(changed_tables):
+                self.retry_count_changes(changed_tables)
+            if exc_type is None and deferred:
+                # the row locks are released, the handlers open sessions of their own
+                for e in await event_bus.dispatch_after_commit(deferred):
+                    logger.error("after commit event handler failed: %s", e, exc_info=e)
+
 
 _session_provider = ContextVar("session_provider")
 session_provider: SessionProvider = LocalProxy(_session_provider)  # type: ignore[assignment]
 
 
-def set_session_provider():
-    _session_provider.set(SessionProvider())
+def set_session_provider(provider: SessionProvider | None = None):
+    _session_provider.set(provider or SessionProvider())
 
 
 set_session_provider()
@@ -66,6 +176,29 @@ class SearchKeyField:
     json_path: str | None = None
 
 
+def json_object(**values) -> sa.ColumnElement:
+    """`json_build_object` of the keyword arguments, the keys are SQL literals
+    since the variadic arguments can not be untyped parameters.
+    """
+    args = []
+    for key, value in values.items():
+        args.append(sa.literal_column(f"'{key}'"))
+        args.append(sa.null() if value is None else value)
+    return sa.func.json_build_object(*args)
+
+
+def json_timestamp(column: sa.ColumnElement) -> sa.ColumnElement:
+    """The UTC timestamp of a datetime column, as the responses serialize datetimes."""
+    return sa.cast(sa.extract("epoch", column), sa.Float)
+
+
+class ArchiveMode(Enum):
+    # every archive row is a copy of the whole row
+    FULL = "FULL"
+    # archive rows hold the changed columns, with periodic full snapshots
+    DELTA = "DELTA"
+
+
 MT = TypeVar("MT")  # Model Type
 AMT = TypeVar("AMT", bound="ArchiveMixin")  # Archive Model Type
 
@@ -76,6 +209,14 @@ class RepositoryBase(Generic[MT, AMT]):
     archive_model_class: type[AMT]
     search_key_fields: ClassVar[dict[str, SearchKeyField]]
     sort_by_fields: ClassVar[dict[str, InstrumentedAttribute]]
+    archive_mode: ClassVar[ArchiveMode] = ArchiveMode(config.archive_mode)
+    archive_snapshot_interval: ClassVar[int] = config.archive_snapshot_interval
+    # the read caches of the aggregates and of their searches,
+    # the other processes are notified of the saves
+    cache: ClassVar[AggregateCache | None] = None
+    search_cache: ClassVar[QueryCache | None] = None
+    # true: every committed save bumps the version of the table in `table_version`
+    count_changes: ClassVar[bool] = False
 
     def __init__(self, session_provider_: SessionProvider):
         self.session_provider = session_provider_
@@ -131,7 +272,7 @@ class RepositoryBase(Generic[MT, AMT]):
     async def _get_model(self, pkey):
         return await self.session.get(self.model_class, pkey)
 
-    async def _load(self, pkey, lock: bool):
+    async def _load_model(self, pkey, lock: bool):
         try:
             if lock:
                 model = await self.session.get(self.model_class, pkey, with_for_update=True)
@@ -143,19 +284,17 @@ class RepositoryBase(Generic[MT, AMT]):
         if not model:
             raise NoResultFound(f"{self.entity_name} {pkey} not found")
 
-        return self.model_to_entity(model)
+        return model
 
-    async def _search(
+    async def _load(self, pkey, lock: bool):
+        return self.model_to_entity(await self._load_model(pkey, lock))
+
+    def _add_search_key_filters(
         self,
         filters: list[sa.ColumnExpressionArgument],
         search_key_fields: list[str],
         search_keys: list[str] | None,
-        sort_by: list[str],
-        offset: int,
-        limit: int,
-        options: list[ExecutableOption] | None = None,
-        return_entity: bool = True,
-    ) -> tuple[int, list]:
+    ) -> list[sa.ColumnExpressionArgument]:
         q_filters = list(filters)
         if search_keys:
             search_key_filters = []
@@ -177,14 +316,48 @@ class RepositoryBase(Generic[MT, AMT]):
                         search_key_filters.append(c.regexp_match(search_key_regexp))
             if search_key_filters:
                 q_filters.append(sa.or_(*search_key_filters))
+        return q_filters
 
-        total_stmt = sa.select(sa.func.count()).select_from(self.model_class).where(*q_filters)
-        q_stmt = sa.select(self.model_class).where(*q_filters)
-
+    def _get_sort_by_exp(self, sort_by: list[str]) -> list[UnaryExpression]:
         sort_by_exp = self.create_sort_by_exp(sort_by)
         if not sort_by_exp:
             sort_by_exp = self.create_sort_by_exp(["-created"])
-        q_stmt = q_stmt.order_by(*sort_by_exp)
+        return sort_by_exp
+
+    async def _search(
+        self,
+        filters: list[sa.ColumnExpressionArgument],
+        search_key_fields: list[str],
+        search_keys: list[str] | None,
+        sort_by: list[str],
+        offset: int,
+        limit: int,
+        options: list[ExecutableOption] | None = None,
+        return_entity: bool = True,
+        cache_key: tuple | None = None,
+    ) -> tuple[int, list]:
+        """Returns the total and the page of the rows matching the filters and the search keys.
+        :param cache_key: The normalized filters, searches of entities are served by
+            `search_cache` if it is given.
+        """
+        q_filters = self._add_search_key_filters(filters, search_key_fields, search_keys)
+        search_cache = self._get_search_cache(cache_key if return_entity else None)
+        if search_cache is not None:
+            cache_key = await self._get_versioned_cache_key(cache_key)
+
+        results_key = (cache_key, tuple(sort_by), offset, limit)
+        if search_cache is not None:
+            version = search_cache.version
+            rows = search_cache.get_results(results_key)
+            if rows is not None:
+                total = await self._count(q_filters, cache_key)
+                return total, [
+                    self.model_to_entity(row_to_model(self.model_class, row))
+                    for row in orjson.loads(rows)
+                ]
+
+        q_stmt = sa.select(self.model_class).where(*q_filters)
+        q_stmt = q_stmt.order_by(*self._get_sort_by_exp(sort_by))
 
         q_stmt = q_stmt.offset(offset)
         if limit > 0:
@@ -193,28 +366,238 @@ class RepositoryBase(Generic[MT, AMT]):
         if options:
             q_stmt = q_stmt.options(*options)
 
-        total = await self.session.execute(total_stmt)
-        total = total.scalar() or 0
+        total = await self._count(q_filters, cache_key if return_entity else None)
         q = await self.session.execute(q_stmt)
 
         if return_entity:
-            return total, [self.model_to_entity(model) for model in q.scalars()]
+            models = list(q.scalars())
+            if search_cache is not None:
+                rows = orjson.dumps([model_to_row(m) for m in models])
+                search_cache.set_results(results_key, rows, version)
+            return total, [self.model_to_entity(model) for model in models]
         return total, list(q)
 
-    def _archive(self, model, event: DomainEvent | None):
+    def _get_search_cache(self, cache_key: tuple | None) -> QueryCache | None:
+        if cache_key is None or self.search_cache is None or not self.search_cache.enabled:
+            return None
+        return self.search_cache
+
+    async def _get_versioned_cache_key(self, cache_key: tuple) -> tuple:
+        """Adds the version of the table to the key when the changes are counted,
+        a search never returns a page older than the version it read,
+        even before the other processes' saves are notified.
+        """
+        if not self.count_changes:
+            return cache_key
+        return (await self._load_table_version(), cache_key)
+
+    async def _load_table_version(self) -> int:
+        """Returns the version of the table, 0 if it is never saved since counted,
+        see `is_table_version_known` before a client is given it.
+        """
+        stmt = sa.select(TableVersionModel.version).where(
+            TableVersionModel.table_name == self.model_class.__table__.name
+        )
+        return await self.session.scalar(stmt) or 0
+
+    def is_table_version_known(self) -> bool:
+        """False while a failed bump of the table is retried, the version may be older than
+        a committed save.
+        """
+        return self.model_class.__table__.name not in unbumped_tables
+
+    async def _count(
+        self, q_filters: list[sa.ColumnExpressionArgument], cache_key: tuple | None
+    ) -> int:
+        search_cache = self._get_search_cache(cache_key)
+        if search_cache is not None:
+            version = search_cache.version
+            total = search_cache.get_total(cache_key)
+            if total is not None:
+                return total
+
+        total_stmt = sa.select(sa.func.count()).select_from(self.model_class).where(*q_filters)
+        total = await self.session.scalar(total_stmt) or 0
+        if search_cache is not None:
+            search_cache.set_total(cache_key, total, version)
+        return total
+
+    async def _search_json(
+        self,
+        document: sa.ColumnElement,
+        filters: list[sa.ColumnExpressionArgument],
+        search_key_fields: list[str],
+        search_keys: list[str] | None,
+        sort_by: list[str],
+        offset: int,
+        limit: int,
+        cache_key: tuple | None = None,
+    ) -> str:
+        """Searches like `_search`, but Postgres builds the JSON of the result,
+        no model or entity is created.
+        :param document: The JSON of a row, built from the columns of the model.
+        :param cache_key: The normalized filters, see `_search`.
+        :return: The JSON text of `{"total": ..., "results": [document, ...]}`.
+        """
+        q_filters = self._add_search_key_filters(filters, search_key_fields, search_keys)
+        search_cache = self._get_search_cache(cache_key)
+        if search_cache is not None:
+            cache_key = await self._get_versioned_cache_key(cache_key)
+
+        total = None
+        results_key = ("json", cache_key, tuple(sort_by), offset, limit)
+        if search_cache is not None:
+            version = search_cache.version
+            total = search_cache.get_total(cache_key)
+            results = search_cache.get_results(results_key)
+            if total is not None and results is not None:
+                return f'{{"total": {total}, "results": {results}}}'
+
+        sort_by_exp = self._get_sort_by_exp(sort_by)
+        total_stmt = sa.select(sa.func.count()).select_from(self.model_class).where(*q_filters)
+        page_stmt = (
+            sa.select(
+                document.label("document"),
+                sa.func.row_number().over(order_by=sort_by_exp).label("position"),
+            )
+            .where(*q_filters)
+            .order_by(*sort_by_exp)
+            .offset(offset)
+        )
+        if limit > 0:
+            page_stmt = page_stmt.limit(limit)
+        page = page_stmt.subquery()
+
+        results = sa.func.json_agg(aggregate_order_by(page.c.document, page.c.position))
+        stmt = sa.select(
+            total_stmt.scalar_subquery() if total is None else sa.literal(total),
+            sa.cast(sa.func.coalesce(results, sa.literal_column("'[]'::json")), sa.Text),
+        ).select_from(page)
+        total, results = (await self.session.execute(stmt)).one()
+        if search_cache is not None:
+            search_cache.set_total(cache_key, total, version)
+            search_cache.set_results(results_key, results, version)
+        return f'{{"total": {total}, "results": {results}}}'
+
+    @classmethod
+    def _archive_columns(cls) -> dict[str, sa.Column]:
+        """Returns the columns of the model copied into the archive rows, except the id."""
+        archive_columns = cls.archive_model_class.__table__.columns
+        return {
+            c.key: c
+            for c in cls.model_class.__table__.columns
+            if c.key != "id" and c.key in archive_columns
+        }
+
+    async def _archive(self, model, event: DomainEvent | None):
         archive_model = self.archive_model_class()
-        archive_model.archive_id = str(uuid.uuid4())
+        archive_model.archive_id = id_generator.generate()
+        archive_model.id = model.id
         if event:
             archive_model.doer = event.doer.serialize()
-            archive_model.event_name = type(event).__name__
+            archive_model.event_name = event.EVENT_NAME
             archive_model.event_span_id = event.tracer.span_id
             archive_model.event_trace_id = event.tracer.trace_id
-        for attr, value in vars(model).items():
-            if not isinstance(value, InstanceState) and hasattr(archive_model, attr):
+
+        columns = self._archive_columns()
+        # unloaded columns, e.g. server defaults not flushed yet, are left to the archive table
+        state = {k: v for k, v in vars(model).items() if k in columns}
+        if self.archive_mode is ArchiveMode.FULL:
+            last_state = {}
+            # numbered by the insert itself, without a query per archive
+            archive_model.version = self._next_archive_version(model.id)
+            archive_model.snapshot = True
+        else:
+            last_version, snapshot_version, last_state = await self._load_archive_state(model.id)
+            archive_model.version = last_version + 1
+            archive_model.snapshot = (
+                last_version == 0
+                or archive_model.version - snapshot_version >= self.archive_snapshot_interval
+            )
+        if archive_model.snapshot:
+            for attr, value in state.items():
                 setattr(archive_model, attr, value)
+        else:
+            archive_model.delta = self._diff_archive_state(columns, last_state, state)
 
         self.session.add(archive_model)
 
+    @staticmethod
+    def _diff_archive_state(
+        columns: dict[str, sa.Column], old: dict[str, Any], new: dict[str, Any]
+    ) -> dict:
+        delta = {}
+        for key, value in new.items():
+            if isinstance(columns[key].type, JSONB):
+                column_delta = diff(old.get(key), value)
+            elif key not in old or old[key] != value:
+                is_datetime = isinstance(columns[key].type, sa.DateTime) and value is not None
+                column_delta = {"$replace": value.isoformat() if is_datetime else value}
+            else:
+                column_delta = None
+            if column_delta is not None:
+                delta[key] = column_delta
+        return delta
+
+    def _next_archive_version(self, pkey) -> sa.ScalarSelect:
+        """Returns the SQL of the version after the last archived one, 1 if the row is not
+        archived.
+        """
+        archive_class = self.archive_model_class
+        return (
+            sa.select(sa.func.coalesce(sa.func.max(archive_class.version), 0) + 1)
+            .where(archive_class.id == pkey)
+            .scalar_subquery()
+        )
+
+    async def _load_archive_state(
+        self, pkey, version: int | None = None
+    ) -> tuple[int, int, dict[str, Any]]:
+        """Rebuilds an archived version from the nearest snapshot before it.
+        :param pkey: The id of the archived row.
+        :param version: The version to rebuild, the last one by default.
+        :return: The version, the version of its snapshot and the columns of the row,
+            (0, 0, {}) if the row is not archived.
+        """
+        archive_class = self.archive_model_class
+        snapshot_filters = [archive_class.id == pkey, archive_class.snapshot.is_(True)]
+        filters = [archive_class.id == pkey]
+        if version is not None:
+            snapshot_filters.append(archive_class.version <= version)
+            filters.append(archive_class.version <= version)
+        snapshot_version = (
+            sa.select(sa.func.max(archive_class.version)).where(*snapshot_filters).scalar_subquery()
+        )
+        stmt = (
+            sa.select(archive_class)
+            .where(*filters, archive_class.version >= snapshot_version)
+            .order_by(archive_class.version)
+        )
+        archives = list(await self.session.scalars(stmt))
+        if not archives:
+            return 0, 0, {}
+
+        columns = self._archive_columns()
+        snapshot = archives[0]
+        state = {key: getattr(snapshot, key) for key in columns}
+        for archive in archives[1:]:
+            for key, column_delta in (archive.delta or {}).items():
+                if isinstance(columns[key].type, JSONB):
+                    state[key] = patch(state.get(key), column_delta)
+                else:
+                    value = column_delta["$replace"]
+                    if isinstance(columns[key].type, sa.DateTime) and value is not None:
+                        value = pendulum.parse(value)
+                    state[key] = value
+        return archives[-1].version, snapshot.version, state
+
+    async def _load_version(self, pkey, version: int):
+        """Returns the entity as archived in a version."""
+        last_version, _, state = await self._load_archive_state(pkey, version)
+        if last_version != version:
+            raise NoResultFound(f"{self.entity_name} {pkey} version {version} not found")
+        return self.model_to_entity(self.model_class(id=pkey, **state))
+
     async def _save(self, aggregate: AggregateRoot, model):
         if aggregate.is_delete:
             await self.session.delete(model)
@@ -225,9 +608,23 @@ class RepositoryBase(Generic[MT, AMT]):
             event = None
             if aggregate.all_events:
                 event = aggregate.all_events[-1]
-            self._archive(model, event)
+            await self._archive(model, event)
 
         for event in aggregate.all_events:
             self.session.add(DomainEventModel(**event.serialize()))
 
+        pkey = sa.inspect(model).mapper.primary_key_from_instance(model)[0]
+        self.track_change(str(pkey))
+
         await self.session.flush()
+
+    def track_change(self, pkey: str):
+        """Counts a row written in the session, for the writes not saved by `_save`."""
+        table = self.model_class.__table__.name
+        if self.count_changes:
+            # bumped once the transaction is committed
+            self.session.info.setdefault(CHANGED_TABLES, set()).add(table)
+
+        if has_cache(table):
+            # notified and evicted once per transaction, see `SessionProvider.notify_changes`
+            self.session.info.setdefault(CHANGED_KEYS, {}).setdefault(table, set()).add(pkey)
@@ -0,0 +1,283 @@
+import asyncio
+import os
+import threading
+from collections.abc import Callable, Hashable, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import orjson
+import psycopg
+import sqlalchemy as sa
+from cachetools import TTLCache
+
+from app.config import config
+from app.logger import ServiceLogger
+
+logger = ServiceLogger(__name__)
+RECONNECT_DELAY_SECONDS = 5
+# the writes of every process are notified on the channel once committed
+CACHE_INVALIDATION_CHANNEL = f"{config.postgres_schema}_cache_invalidation"
+# payloads of pg_notify must be shorter than 8000 bytes
+MAX_INVALIDATION_PAYLOAD_BYTES = 7900
+# tells the notifications of this process from the others, forked processes have their own pid
+_ORIGIN = os.urandom(8).hex()
+
+
+@dataclass
+class CacheStats:
+    name: str
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class CacheBase:
+    """Hit/miss counting and registration of the in-process caches of a table.
+
+    The cache is locked since the invalidation listener may run in a thread of its own.
+    """
+
+    def __init__(self, name: str, table: str, max_size: int, ttl: float):
+        self.name = name
+        self.table = table
+        # a size or ttl of 0 disables the cache
+        self.enabled = max_size > 0 and ttl > 0
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        caches.append(self)
+
+    def _count(self, value: Any | None) -> Any | None:
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def __len__(self) -> int:
+        raise NotImplementedError()
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        """Evicts what the committed writes of the rows of `keys` changed."""
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def stats(self) -> CacheStats:
+        lookups = self.hits + self.misses
+        return CacheStats(
+            self.name,
+            len(self),
+            self.max_size,
+            self.hits,
+            self.misses,
+            self.hits / lookups if lookups else 0.0,
+        )
+
+
+class AggregateCache(CacheBase):
+    """In-process read cache of aggregates by id, entries expire after `ttl` seconds
+    and the least recently used ones are evicted beyond `max_size`.
+
+    Values are immutable, e.g. serialized rows, so a hit never shares a mutable entity.
+    Every invalidation bumps the version, a value read before it is not cached.
+    """
+
+    def __init__(self, name: str, table: str, max_size: int, ttl: float):
+        super().__init__(name, table, max_size, ttl)
+        self.version = 0
+        self._cache: TTLCache = TTLCache(maxsize=max(max_size, 1), ttl=ttl or 1)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, key: Hashable, accept: Callable[[Any], bool] | None = None) -> Any | None:
+        """Returns the cached value, None for a miss.
+        :param accept: Check whether the value can serve the call, e.g. it has enough data.
+        """
+        with self._lock:
+            value = self._cache.get(key)
+        if value is not None and accept is not None and not accept(value):
+            value = None
+        return self._count(value)
+
+    def set(self, key: Hashable, value: Any, version: int):
+        """:param version: The `version` read before the value, it is not cached if any key
+        has been invalidated since, e.g. a write committed during the read.
+        """
+        if self.enabled:
+            with self._lock:
+                if version == self.version:
+                    self._cache[key] = value
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        with self._lock:
+            self.version += 1
+            for key in keys:
+                self._cache.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._cache.clear()
+
+
+class QueryCache(CacheBase):
+    """In-process cache of the pages and totals of searches, by normalized query.
+
+    Entries are keyed by the version of the table they were read at, every committed write
+    to the table bumps the version, so older entries are never hit again and expire.
+    Totals are shared by the pages of a query and kept for the longer `total_ttl`.
+    """
+
+    def __init__(self, name: str, table: str, max_size: int, ttl: float, total_ttl: float):
+        super().__init__(name, table, max_size, ttl)
+        self.enabled = self.enabled and total_ttl > 0
+        self.version = 0
+        self._results: TTLCache = TTLCache(maxsize=max(max_size, 1), ttl=ttl or 1)
+        self._totals: TTLCache = TTLCache(maxsize=max(max_size, 1), ttl=total_ttl or 1)
+
+    def __len__(self) -> int:
+        return len(self._results) + len(self._totals)
+
+    def get_results(self, key: Hashable) -> Any | None:
+        with self._lock:
+            return self._count(self._results.get((self.version, key)))
+
+    def set_results(self, key: Hashable, value: Any, version: int):
+        """:param version: The `version` read before the query."""
+        if self.enabled:
+            with self._lock:
+                self._results[(version, key)] = value
+
+    def get_total(self, key: Hashable) -> int | None:
+        with self._lock:
+            return self._count(self._totals.get((self.version, key)))
+
+    def set_total(self, key: Hashable, total: int, version: int):
+        if self.enabled:
+            with self._lock:
+                self._totals[(version, key)] = total
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        # any write may change any search
+        with self._lock:
+            self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._results.clear()
+            self._totals.clear()
+
+
+# every cache of the process
+caches: list[CacheBase] = []
+
+
+def get_cache_stats() -> list[CacheStats]:
+    return [c.stats() for c in caches]
+
+
+def has_cache(table: str) -> bool:
+    return any(c.table == table for c in caches)
+
+
+def invalidate_caches(table: str, keys: list | None):
+    """:param keys: The written keys, None for the whole table."""
+    for cache in caches:
+        if cache.table == table:
+            if keys is None:
+                cache.clear()
+            else:
+                cache.invalidate(keys)
+
+
+def _get_origin() -> str:
+    return f"{_ORIGIN}:{os.getpid()}"
+
+
+def create_invalidation_payload(table: str, keys: list) -> str:
+    """The notification of the keys written to a table, the whole table if they do not fit."""
+    payload = orjson.dumps({"table": table, "keys": keys, "origin": _get_origin()})
+    if len(payload) > MAX_INVALIDATION_PAYLOAD_BYTES:
+        payload = orjson.dumps({"table": table, "keys": None, "origin": _get_origin()})
+    return payload.decode()
+
+
+class CacheInvalidationListener:
+    """Evicts the keys written by the other processes from the caches of this process,
+    the writing process evicts its own keys once committed.
+
+    Notifications sent while not listening are lost, so all caches are cleared on every
+    (re)connection.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def invalidate(payload: str):
+        data = orjson.loads(payload)
+        if data.get("origin") != _get_origin():
+            invalidate_caches(data["table"], data["keys"])
+
+    async def run(self):
+        conninfo = config.sqlalchemy_database_url.replace("postgresql+psycopg", "postgresql", 1)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    conninfo, autocommit=True
+                ) as connection:
+                    await connection.execute(f'LISTEN "{CACHE_INVALIDATION_CHANNEL}"')
+                    for cache in caches:
+                        cache.clear()
+                    logger.info("Start invalidating caches by %s", CACHE_INVALIDATION_CHANNEL)
+                    async for notify in connection.notifies():
+                        self.invalidate(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Unexpected error, retrying...")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    def start(self):
+        """Runs the listener by the running event loop, while any cache is enabled."""
+        if self._task is None and any(c.enabled for c in caches):
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def start_thread(self):
+        """Runs the listener by an event loop of its own, for processes without a running loop."""
+        if any(c.enabled for c in caches):
+            threading.Thread(
+                target=asyncio.run, args=(self.run(),), name="cache-invalidation", daemon=True
+            ).start()
+
+
+cache_invalidation_listener = CacheInvalidationListener()
+
+
+def model_to_row(model) -> dict:
+    """The column values of a model, ready for orjson."""
+    return {c.key: getattr(model, c.key) for c in sa.inspect(type(model)).column_attrs}
+
+
+def row_to_model[T](model_class: type[T], row: dict) -> T:
+    """A transient model of the values of `model_to_row` decoded by orjson."""
+    values = dict(row)
+    for c in sa.inspect(model_class).column_attrs:
+        value = values.get(c.key)
+        if isinstance(value, str) and isinstance(c.columns[0].type, sa.DateTime):
+            values[c.key] = datetime.fromisoformat(value)
+    return model_class(**values)
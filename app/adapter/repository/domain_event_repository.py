@@ -0,0 +1,261 @@
+import re
+from collections.abc import AsyncIterator, Sequence
+
+import pendulum
+import sqlalchemy as sa
+from pendulum.datetime import DateTime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.adapter.repository.base import SessionProvider
+from app.adapter.repository.orm import (
+    DOMAIN_EVENT_DEFAULT_PARTITION,
+    DOMAIN_EVENT_PARTITION_PREFIX,
+    DomainEventModel,
+    ReplayCheckpointModel,
+)
+from app.config import config
+
+# the columns of `DomainEvent.serialize`, rows are decoded by `DomainEvent.deserialize`
+EVENT_COLUMNS = (
+    DomainEventModel.id,
+    DomainEventModel.name,
+    DomainEventModel.body,
+    DomainEventModel.version,
+    DomainEventModel.created_at,
+    DomainEventModel.span_id,
+    DomainEventModel.parent_span_id,
+    DomainEventModel.trace_id,
+)
+HASH_MASK = 0x7FFFFFFF
+# guards the recursion of a trace against cyclic spans
+MAX_TRACE_DEPTH = 64
+PARTITION_NAME_PATTERN = re.compile(rf"{DOMAIN_EVENT_PARTITION_PREFIX}(\d{{4}})(\d{{2}})")
+
+
+class DomainEventRepository:
+    """Reads the stored domain events back, e.g. to replay them into projections."""
+
+    def __init__(self, session_provider_: SessionProvider):
+        self.session_provider = session_provider_
+
+    @property
+    def session(self) -> AsyncSession:
+        return self.session_provider.session
+
+    async def get_last_event_id(self) -> int:
+        return await self.session.scalar(sa.select(sa.func.max(DomainEventModel.id))) or 0
+
+    async def load_trace_events(self, trace_id: str, span_id: str | None = None) -> list[sa.Row]:
+        """Loads the events of a trace by a recursive query on `parent_span_id`.
+        :param trace_id: The trace of the events.
+        :param span_id: Load the event of the span and the events it caused,
+            the whole trace by default, starting from the events without a parent in the trace.
+        :return: The rows of `EVENT_COLUMNS` with their `depth` in the tree,
+            ordered by depth then id.
+        """
+        anchor = sa.select(*EVENT_COLUMNS, sa.literal(0).label("depth")).where(
+            DomainEventModel.trace_id == trace_id
+        )
+        if span_id:
+            anchor = anchor.where(DomainEventModel.span_id == span_id)
+        else:
+            parent = aliased(DomainEventModel)
+            anchor = anchor.where(
+                ~sa.exists().where(
+                    parent.trace_id == trace_id,
+                    parent.span_id == DomainEventModel.parent_span_id,
+                )
+            )
+        tree = anchor.cte("trace_tree", recursive=True)
+        child = aliased(DomainEventModel)
+        tree = tree.union_all(
+            sa.select(
+                *(getattr(child, c.key) for c in EVENT_COLUMNS), (tree.c.depth + 1).label("depth")
+            ).where(
+                child.trace_id == trace_id,
+                child.parent_span_id == tree.c.span_id,
+                tree.c.depth < MAX_TRACE_DEPTH,
+            )
+        )
+        result = await self.session.execute(sa.select(tree).order_by(tree.c.depth, tree.c.id))
+        return list(result)
+
+    async def stream_events(
+        self,
+        names: list[str],
+        after_id: int,
+        until_id: int,
+        start_time: DateTime | None = None,
+        end_time: DateTime | None = None,
+        partition: int = 0,
+        partition_count: int = 1,
+        partition_key: str | None = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[sa.Row]]:
+        """Streams the events in id order by a server-side cursor, `batch_size` rows at a time.
+        :param names: Names of the events.
+        :param after_id: Stream the events after the id.
+        :param until_id: Stream the events until the id, included.
+        :param partition: Stream the events of the partition, from 0 to `partition_count` - 1.
+        :param partition_key: The body field to partition by, events with the same value keep
+            their order in one partition. The events are partitioned by id if it is not set.
+        :return: The batches of rows.
+        """
+        stmt = (
+            sa.select(*EVENT_COLUMNS)
+            .where(
+                DomainEventModel.name.in_(names),
+                DomainEventModel.id > after_id,
+                DomainEventModel.id <= until_id,
+            )
+            .order_by(DomainEventModel.id)
+        )
+        if start_time is not None:
+            stmt = stmt.where(DomainEventModel.created_at >= start_time)
+        if end_time is not None:
+            stmt = stmt.where(DomainEventModel.created_at <= end_time)
+        if partition_count > 1:
+            key = sa.cast(DomainEventModel.id, sa.Text)
+            if partition_key:
+                key = sa.func.coalesce(DomainEventModel.body[partition_key].astext, key)
+            stmt = stmt.where(
+                sa.func.hashtext(key).op("&")(HASH_MASK) % partition_count == partition
+            )
+
+        result = await self.session.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
+
+
+class ReplayCheckpointRepository:
+    """The last replayed event id of every partition of a replay."""
+
+    def __init__(self, session_provider_: SessionProvider):
+        self.session_provider = session_provider_
+
+    @property
+    def session(self) -> AsyncSession:
+        return self.session_provider.session
+
+    async def load_checkpoints(self, name: str) -> list[ReplayCheckpointModel]:
+        stmt = sa.select(ReplayCheckpointModel).where(ReplayCheckpointModel.name == name)
+        return list(await self.session.scalars(stmt))
+
+    async def save_checkpoint(
+        self, name: str, partition: int, partition_count: int, last_event_id: int
+    ):
+        stmt = insert(ReplayCheckpointModel).values(
+            name=name,
+            partition=partition,
+            partition_count=partition_count,
+            last_event_id=last_event_id,
+        )
+        await self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[ReplayCheckpointModel.name, ReplayCheckpointModel.partition],
+                set_={
+                    "partition_count": stmt.excluded.partition_count,
+                    "last_event_id": stmt.excluded.last_event_id,
+                    "updated_at": sa.func.now(),
+                },
+            )
+        )
+
+    async def delete_checkpoints(self, name: str):
+        await self.session.execute(
+            sa.delete(ReplayCheckpointModel).where(ReplayCheckpointModel.name == name)
+        )
+
+
+class DomainEventPartitionRepository:
+    """The monthly range partitions of the domain_event table, by `created_at` in UTC."""
+
+    def __init__(self, session_provider_: SessionProvider):
+        self.session_provider = session_provider_
+
+    @property
+    def session(self) -> AsyncSession:
+        return self.session_provider.session
+
+    @staticmethod
+    def partition_name(month: DateTime) -> str:
+        return f"{DOMAIN_EVENT_PARTITION_PREFIX}{month.format('YYYYMM')}"
+
+    async def list_partitions(self) -> dict[str, DateTime]:
+        """Returns the monthly partitions with the first moment of their month, in month order."""
+        result = await self.session.execute(
+            sa.text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass)"
+            ),
+            {"parent": f"{config.postgres_schema}.{DomainEventModel.__tablename__}"},
+        )
+        partitions = {}
+        for (name,) in result:
+            if match := PARTITION_NAME_PATTERN.fullmatch(name):
+                partitions[name] = pendulum.datetime(int(match[1]), int(match[2]), 1)
+        return dict(sorted(partitions.items(), key=lambda p: p[1]))
+
+    async def create_partition(self, month: DateTime) -> str:
+        """Creates the partition of a month.
+
+        The events of the month already in the default partition are moved to it,
+        the default partition would otherwise block attaching it.
+        :param month: Any moment of the month.
+        :return: The name of the partition.
+        """
+        start = month.in_timezone("UTC").start_of("month")
+        end = start.add(months=1)
+        schema = config.postgres_schema
+        table = DomainEventModel.__tablename__
+        name = self.partition_name(start)
+        bounds = {"start": start, "end": end}
+        await self.session.execute(
+            sa.text(
+                f"CREATE TABLE {schema}.{name} "
+                f"(LIKE {schema}.{table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+        )
+        await self.session.execute(
+            sa.text(
+                f"WITH moved AS (DELETE FROM {schema}.{DOMAIN_EVENT_DEFAULT_PARTITION} "
+                "WHERE created_at >= :start AND created_at < :end RETURNING *) "
+                f"INSERT INTO {schema}.{name} SELECT * FROM moved"
+            ),
+            bounds,
+        )
+        # bounds of DDL statements can not be bound parameters
+        await self.session.execute(
+            sa.text(
+                f"ALTER TABLE {schema}.{table} ATTACH PARTITION {schema}.{name} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+        return name
+
+    async def count_events(self, name: str) -> int:
+        return await self.session.scalar(
+            sa.text(f"SELECT count(*) FROM {config.postgres_schema}.{name}")
+        )
+
+    async def stream_partition(
+        self, name: str, batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[sa.RowMapping]]:
+        """Streams the events of a partition in id order by a server-side cursor."""
+        stmt = sa.text(f"SELECT * FROM {config.postgres_schema}.{name} ORDER BY id")
+        result = await self.session.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.mappings().partitions():
+            yield rows
+
+    async def detach_partition(self, name: str):
+        """Detaches a partition from the domain_event table and drops it."""
+        schema = config.postgres_schema
+        await self.session.execute(
+            sa.text(
+                f"ALTER TABLE {schema}.{DomainEventModel.__tablename__} "
+                f"DETACH PARTITION {schema}.{name}"
+            )
+        )
+        await self.session.execute(sa.text(f"DROP TABLE {schema}.{name}"))
@@ -1,12 +1,30 @@
 from .base import ArchiveMixin, Base, BaseMixin
-from .domain_event_model import DomainEventModel
-from .your_aggregate_model import YourAggregateArchiveModel, YourAggregateModel
+from .domain_event_model import (
+    DOMAIN_EVENT_DEFAULT_PARTITION,
+    DOMAIN_EVENT_PARTITION_PREFIX,
+    DomainEventModel,
+)
+from .outbox_model import OUTBOX_CHANNEL, OutboxModel
+from .replay_checkpoint_model import ReplayCheckpointModel
+from .table_version_model import TableVersionModel
+from .your_aggregate_model import (
+    YourAggregateArchiveModel,
+    YourAggregateModel,
+    YourAggregateOperationHistoryModel,
+)
 
 __all__ = [
+    "DOMAIN_EVENT_DEFAULT_PARTITION",
+    "DOMAIN_EVENT_PARTITION_PREFIX",
+    "OUTBOX_CHANNEL",
     "ArchiveMixin",
     "Base",
     "BaseMixin",
     "DomainEventModel",
+    "OutboxModel",
+    "ReplayCheckpointModel",
+    "TableVersionModel",
     "YourAggregateArchiveModel",
     "YourAggregateModel",
+    "YourAggregateOperationHistoryModel",
 ]
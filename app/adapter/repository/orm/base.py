@@ -1,9 +1,9 @@
 from datetime import datetime
 
-from sqlalchemy import UUID, DateTime, MetaData, String
+from sqlalchemy import UUID, Boolean, DateTime, Index, Integer, MetaData, String
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncAttrs
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm import DeclarativeBase, Mapped, declared_attr, mapped_column
 from sqlalchemy.sql import func
 
 from app.config import config
@@ -30,3 +30,20 @@ class ArchiveMixin:
     event_name: Mapped[str | None] = mapped_column(String, nullable=True)
     event_span_id: Mapped[str | None] = mapped_column(String, nullable=True)
     event_trace_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    # 1, 2, ... per archived id
+    version: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # true: the columns hold the whole row, false: only `delta` is set
+    snapshot: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    # the changed columns since the previous version, JSON diffs for JSON columns
+    delta: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+
+    @declared_attr.directive
+    def __table_args__(cls):
+        return (
+            Index(
+                f"ix_{config.postgres_schema}_{cls.__tablename__}_id_version",
+                "id",
+                "version",
+                unique=True,
+            ),
+        )
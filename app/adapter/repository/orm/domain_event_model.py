@@ -1,28 +1,50 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, DateTime, Index, Integer, String
+from sqlalchemy import DDL, BigInteger, DateTime, Index, Integer, String, event, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
 
 from app.adapter.repository.orm import Base
 from app.config import config
 
+# monthly partitions are named by the month, e.g. `domain_event_p202610`
+DOMAIN_EVENT_PARTITION_PREFIX = "domain_event_p"
+# catches the events of months without a partition, see `app/domain_event_maintenance.py`
+DOMAIN_EVENT_DEFAULT_PARTITION = "domain_event_default"
+
 
 class DomainEventModel(Base):
     __tablename__ = "domain_event"
     __table_args__ = (
+        # targeted instead of a GIN index of the whole body, which slows down every insert
         Index(
-            f"ix_{config.postgres_schema}_{__tablename__}_body",
-            "body",
-            postgresql_using="gin",
+            f"ix_{config.postgres_schema}_{__tablename__}_your_aggregate_id",
+            text("(body ->> 'your_aggregate_id')"),
         ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
 
     id: Mapped[int] = mapped_column(BigInteger, autoincrement=True, primary_key=True)
     name: Mapped[str] = mapped_column(String, nullable=True, index=True)
     body: Mapped[dict] = mapped_column(JSONB, nullable=True)
     version: Mapped[int] = mapped_column(Integer, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
-    span_id: Mapped[str] = mapped_column(String, nullable=True)
+    # the partition key is a part of the primary key
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
+    span_id: Mapped[str] = mapped_column(String, nullable=True, index=True)
     parent_span_id: Mapped[str | None] = mapped_column(String, nullable=True)
-    trace_id: Mapped[str] = mapped_column(String, nullable=True)
+    trace_id: Mapped[str] = mapped_column(String, nullable=True, index=True)
+
+
+event.listen(
+    DomainEventModel.__table__,
+    "after_create",
+    DDL(
+        f"""
+        CREATE TABLE {config.postgres_schema}.{DOMAIN_EVENT_DEFAULT_PARTITION}
+        PARTITION OF {config.postgres_schema}.domain_event DEFAULT;
+        """
+    ),
+)
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from sqlalchemy import DDL, BigInteger, DateTime, Index, LargeBinary, String, event, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from app.adapter.repository.orm import Base
+from app.config import config
+
+OUTBOX_CHANNEL = f"{config.postgres_schema}_outbox"
+
+
+class OutboxModel(Base):
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index(
+            f"ix_{config.postgres_schema}_{__tablename__}_unsent",
+            "id",
+            postgresql_where=text("sent_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, autoincrement=True, primary_key=True)
+    routing_key: Mapped[str] = mapped_column(String, nullable=False)
+    body: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    content_encoding: Mapped[str | None] = mapped_column(String, nullable=True)
+    trace_id: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=True, server_default=func.now()
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+# wake the outbox relay once per committed transaction, see `app/outbox_relay.py`
+event.listen(
+    OutboxModel.__table__,
+    "after_create",
+    DDL(
+        f"""
+        CREATE OR REPLACE FUNCTION {config.postgres_schema}.outbox_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('{OUTBOX_CHANNEL}', '');
+            RETURN NULL;
+        END
+        $$;
+        CREATE TRIGGER outbox_notify AFTER INSERT ON {config.postgres_schema}.outbox
+        FOR EACH STATEMENT EXECUTE FUNCTION {config.postgres_schema}.outbox_notify();
+        """
+    ),
+)
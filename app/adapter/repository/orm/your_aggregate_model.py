@@ -1,15 +1,17 @@
-from sqlalchemy import UUID, String
+from datetime import datetime
+
+from sqlalchemy import UUID, BigInteger, DateTime, Index, String
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.adapter.repository.orm import ArchiveMixin, Base, BaseMixin
+from app.config import config
 
 
 class YourAggregateMixin(BaseMixin):
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True)
     your_value_object: Mapped[dict] = mapped_column(JSONB, nullable=True)
     status: Mapped[str] = mapped_column(String, nullable=True)
-    operation_histories: Mapped[list] = mapped_column(JSONB, nullable=True)
 
 
 class YourAggregateModel(YourAggregateMixin, Base):
@@ -18,3 +20,22 @@ class YourAggregateModel(YourAggregateMixin, Base):
 
 class YourAggregateArchiveModel(ArchiveMixin, YourAggregateMixin, Base):
     __tablename__ = "your_aggregate_archive"
+
+
+# append-only, kept after the aggregate is deleted like its archive rows
+class YourAggregateOperationHistoryModel(Base):
+    __tablename__ = "your_aggregate_operation_history"
+    __table_args__ = (
+        Index(
+            f"ix_{config.postgres_schema}_{__tablename__}_aggregate",
+            "your_aggregate_id",
+            "id",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, autoincrement=True, primary_key=True)
+    your_aggregate_id: Mapped[str] = mapped_column(UUID(as_uuid=False), nullable=False)
+    type: Mapped[str] = mapped_column(String, nullable=False)
+    data: Mapped[list] = mapped_column(JSONB, nullable=False)
+    doer: Mapped[dict] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,52 @@
+import sqlalchemy as sa
+from pendulum.datetime import DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.adapter.repository.base import SessionProvider
+from app.adapter.repository.orm import OutboxModel
+from packages.message_queue import EncodedMessage
+
+
+class OutboxRepository:
+    """Messages written in the transaction of the request, published later by the outbox relay."""
+
+    def __init__(self, session_provider_: SessionProvider):
+        self.session_provider = session_provider_
+
+    @property
+    def session(self) -> AsyncSession:
+        return self.session_provider.session
+
+    def add_messages(self, messages: list[EncodedMessage]):
+        self.session.add_all(
+            OutboxModel(
+                routing_key=m.routing_key,
+                body=m.body,
+                content_encoding=m.content_encoding,
+                trace_id=m.trace_id,
+            )
+            for m in messages
+        )
+
+    async def lock_unsent_messages(self, limit: int) -> list[OutboxModel]:
+        """Locks the oldest unsent messages, rows locked by other relays are skipped."""
+        stmt = (
+            sa.select(OutboxModel)
+            .where(OutboxModel.sent_at.is_(None))
+            .order_by(OutboxModel.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(await self.session.scalars(stmt))
+
+    async def mark_sent(self, ids: list[int]):
+        if ids:
+            await self.session.execute(
+                sa.update(OutboxModel).where(OutboxModel.id.in_(ids)).values(sent_at=sa.func.now())
+            )
+
+    async def delete_sent(self, sent_before: DateTime) -> int:
+        result = await self.session.execute(
+            sa.delete(OutboxModel).where(OutboxModel.sent_at < sent_before)
+        )
+        return result.rowcount
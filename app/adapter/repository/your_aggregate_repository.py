@@ -1,29 +1,68 @@
+from dataclasses import dataclass
+from datetime import datetime
 from typing import ClassVar
 
+import orjson
 import pendulum
+import sqlalchemy as sa
 from pendulum.datetime import DateTime
 from sqlalchemy import and_, or_
+from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import load_only
 
-from app.adapter.repository.base import RepositoryBase, SearchKeyField
+from app.adapter.repository.base import (
+    RepositoryBase,
+    SearchKeyField,
+    json_object,
+    json_timestamp,
+)
+from app.adapter.repository.cache import (
+    AggregateCache,
+    QueryCache,
+    model_to_row,
+    row_to_model,
+)
 from app.adapter.repository.orm import (
     YourAggregateArchiveModel,
     YourAggregateModel,
+    YourAggregateOperationHistoryModel,
 )
+from app.config import config
 from app.core.ddd_base import User
 from app.core.your_bounded_context.domain.entity.your_aggregate import YourAggregate
 from app.core.your_bounded_context.domain.repository import (
+    OperationHistorySearchResult,
     SearchDateField,
     SearchResult,
     YourAggregateRepositoryInterface,
 )
 from app.core.your_bounded_context.domain.value_object.your_aggregate_value_object import (
     OperationHistory,
+    OperationHistoryData,
+    OperationHistoryType,
     YourAggregateStatus,
     YourValueObject,
 )
 
 
+@dataclass(frozen=True)
+class YourAggregateStamp:
+    """What every committed write of an aggregate changes, loaded without the aggregate."""
+
+    id: str
+    # the update time of the row, its creation time if never updated
+    modified_at: datetime
+    # the latest operation history, histories are appended without updating the row
+    history_id: int | None
+    history_created_at: datetime | None
+
+    @property
+    def last_modified(self) -> datetime:
+        if self.history_created_at is None:
+            return self.modified_at
+        return max(self.modified_at, self.history_created_at)
+
+
 class YourAggregateRepository(
     RepositoryBase[YourAggregateModel, YourAggregateArchiveModel], YourAggregateRepositoryInterface
 ):
@@ -36,9 +75,25 @@ class YourAggregateRepository(
         )
     }
     sort_by_fields: ClassVar = {"created_at": YourAggregateModel.created_at}
+    cache: ClassVar = AggregateCache(
+        "your_aggregate",
+        YourAggregateModel.__tablename__,
+        config.aggregate_cache_size,
+        config.aggregate_cache_ttl_seconds,
+    )
+    search_cache: ClassVar = QueryCache(
+        "your_aggregate_search",
+        YourAggregateModel.__tablename__,
+        config.search_cache_size,
+        config.search_cache_ttl_seconds,
+        config.search_cache_total_ttl_seconds,
+    )
+    count_changes: ClassVar = True
 
     @staticmethod
-    def model_to_entity(model: YourAggregateModel) -> YourAggregate:
+    def model_to_entity(
+        model: YourAggregateModel, operation_histories: list[OperationHistory] | None = None
+    ) -> YourAggregate:
         # if model field is JSON or JSONB and entity's property is:
         #   list of str/int/float: remember to create new list
         #   dict, list of dict: remember to use deepcopy
@@ -46,15 +101,151 @@ class YourAggregateRepository(
             model.id,
             YourValueObject.create(**model.your_value_object),
             YourAggregateStatus(model.status),
-            [OperationHistory.create(**h) for h in model.operation_histories],
+            operation_histories or [],
             User(**model.creator),
             pendulum.from_timestamp(model.created_at.timestamp()),
             (pendulum.from_timestamp(model.updated_at.timestamp()) if model.updated_at else None),
         )
 
-    async def load_your_aggregate(self, your_aggregate_id: str, lock: bool = True) -> YourAggregate:
-        obj = await self._load(your_aggregate_id, lock)
-        return obj
+    @staticmethod
+    def history_model_to_value_object(
+        model: YourAggregateOperationHistoryModel,
+    ) -> OperationHistory:
+        return OperationHistory(
+            OperationHistoryType(model.type),
+            [OperationHistoryData.create(**d) for d in model.data],
+            User(**model.doer),
+            pendulum.from_timestamp(model.created_at.timestamp()),
+        )
+
+    async def load_your_aggregate(
+        self,
+        your_aggregate_id: str,
+        lock: bool = True,
+        history_limit: int = 0,
+        use_cache: bool = True,
+        stamp: YourAggregateStamp | None = None,
+    ) -> YourAggregate:
+        """Loads an aggregate, loads without a lock are served by the read cache.
+        :param history_limit: Load the latest operation histories.
+        :param use_cache: False bypasses the read cache.
+        :param stamp: The stamp loaded before, the cached aggregate is served only if it is
+            as of the stamp, so what is loaded is never older than it.
+        """
+        use_cache = use_cache and not lock and self.cache.enabled
+        if use_cache:
+            # (history limit, stamp key, serialized rows)
+            cached = self.cache.get(
+                your_aggregate_id,
+                lambda v: v[0] >= history_limit
+                and (stamp is None or v[1] == (stamp.modified_at, stamp.history_id)),
+            )
+            if cached:
+                data = orjson.loads(cached[2])
+                model = row_to_model(YourAggregateModel, data["model"])
+                history_models = [
+                    row_to_model(YourAggregateOperationHistoryModel, h)
+                    for h in data["histories"][:history_limit]
+                ]
+                return self._to_entity(model, history_models)
+
+        version = self.cache.version
+        model = await self._load_model(your_aggregate_id, lock)
+        history_models = []
+        if history_limit > 0:
+            _, history_models = await self._search_operation_history_models(
+                your_aggregate_id, limit=history_limit
+            )
+        if use_cache:
+            data = {
+                "model": model_to_row(model),
+                "histories": [model_to_row(h) for h in history_models],
+            }
+            # the latest history is known only if any is loaded
+            stamp_key = None
+            if history_limit > 0:
+                stamp_key = (
+                    model.updated_at or model.created_at,
+                    history_models[0].id if history_models else None,
+                )
+            self.cache.set(
+                your_aggregate_id, (history_limit, stamp_key, orjson.dumps(data)), version
+            )
+        return self._to_entity(model, history_models)
+
+    async def load_your_aggregate_stamp(self, your_aggregate_id: str) -> YourAggregateStamp:
+        """Loads the stamp of an aggregate by one row of each table, from their primary keys."""
+        history = (
+            sa.select(YourAggregateOperationHistoryModel)
+            .where(YourAggregateOperationHistoryModel.your_aggregate_id == your_aggregate_id)
+            .order_by(YourAggregateOperationHistoryModel.id.desc())
+            .limit(1)
+        )
+        stmt = sa.select(
+            sa.func.coalesce(YourAggregateModel.updated_at, YourAggregateModel.created_at),
+            history.with_only_columns(YourAggregateOperationHistoryModel.id).scalar_subquery(),
+            history.with_only_columns(
+                YourAggregateOperationHistoryModel.created_at
+            ).scalar_subquery(),
+        ).where(YourAggregateModel.id == your_aggregate_id)
+        row = (await self.session.execute(stmt)).one_or_none()
+        if row is None:
+            raise NoResultFound(f"{self.entity_name} {your_aggregate_id} not found")
+        return YourAggregateStamp(your_aggregate_id, *row)
+
+    async def load_your_aggregates_version(self) -> int | None:
+        """Returns the version of the table, bumped by every committed save,
+        None if it is not known to be bumped by a save of this process.
+        """
+        version = await self._load_table_version()
+        return version if self.is_table_version_known() else None
+
+    def _to_entity(
+        self,
+        model: YourAggregateModel,
+        history_models: list[YourAggregateOperationHistoryModel],
+    ) -> YourAggregate:
+        # history models are the latest first
+        return self.model_to_entity(
+            model, [self.history_model_to_value_object(m) for m in reversed(history_models)]
+        )
+
+    async def _search_operation_history_models(
+        self, your_aggregate_id: str, offset: int = 0, limit: int = 0
+    ) -> tuple[int, list[YourAggregateOperationHistoryModel]]:
+        filters = [YourAggregateOperationHistoryModel.your_aggregate_id == your_aggregate_id]
+        total_stmt = (
+            sa.select(sa.func.count())
+            .select_from(YourAggregateOperationHistoryModel)
+            .where(*filters)
+        )
+        stmt = (
+            sa.select(YourAggregateOperationHistoryModel)
+            .where(*filters)
+            .order_by(YourAggregateOperationHistoryModel.id.desc())
+            .offset(offset)
+        )
+        if limit > 0:
+            stmt = stmt.limit(limit)
+
+        total = await self.session.scalar(total_stmt) or 0
+        models = await self.session.scalars(stmt)
+        return total, list(models)
+
+    async def search_operation_histories(
+        self, your_aggregate_id: str, offset: int = 0, limit: int = 0
+    ) -> OperationHistorySearchResult:
+        total, models = await self._search_operation_history_models(
+            your_aggregate_id, offset, limit
+        )
+        return OperationHistorySearchResult(
+            total, [self.history_model_to_value_object(m) for m in models]
+        )
+
+    async def load_your_aggregate_version(
+        self, your_aggregate_id: str, version: int
+    ) -> YourAggregate:
+        return await self._load_version(your_aggregate_id, version)
 
     async def save_your_aggregate(self, your_aggregate: YourAggregate):
         model: YourAggregateModel | None = await self._get_model(your_aggregate.id)
@@ -66,7 +257,17 @@ class YourAggregateRepository(
 
         model.your_value_object = your_aggregate.your_value_object.serialize()
         model.status = your_aggregate.status.value
-        model.operation_histories = [h.serialize() for h in your_aggregate.operation_histories]
+        # appended only, the cost of an update does not grow with the histories
+        self.session.add_all(
+            YourAggregateOperationHistoryModel(
+                your_aggregate_id=your_aggregate.id,
+                type=h.type.value,
+                data=[d.serialize() for d in h.data],
+                doer=h.doer.serialize(),
+                created_at=h.created_at,
+            )
+            for h in your_aggregate.flush_operation_histories()
+        )
 
         await self._save(your_aggregate, model)
 
@@ -115,6 +316,31 @@ class YourAggregateRepository(
 
         return filters
 
+    @staticmethod
+    def _get_search_cache_key(
+        ids: list[str] | None,
+        statuses: list[str] | None,
+        date_fields: list[str] | None,
+        start_time: DateTime | None,
+        end_time: DateTime | None,
+        search_key_fields: list[str] | None,
+        search_keys: list[str] | None,
+    ) -> tuple:
+        """The filters of a search, equal for the same filters in any order."""
+
+        def normalize(values: list[str] | None) -> tuple | None:
+            return None if values is None else tuple(sorted(set(values)))
+
+        return (
+            normalize(ids),
+            normalize(statuses),
+            normalize(date_fields),
+            start_time.timestamp() if start_time else None,
+            end_time.timestamp() if end_time else None,
+            normalize(search_key_fields) if search_keys else None,
+            normalize(search_keys),
+        )
+
     async def search_your_aggregates(
         self,
         ids: list[str] | None = None,
@@ -127,13 +353,84 @@ class YourAggregateRepository(
         sort_by: list[str] | None = None,
         offset: int = 0,
         limit: int = 0,
+        use_cache: bool = True,
     ) -> SearchResult:
+        """Searches the aggregates, served by the search cache of the normalized query.
+        :param use_cache: False bypasses the search cache.
+        """
         filters = self._get_search_filters(ids, statuses, date_fields, start_time, end_time)
+        cache_key = None
+        if use_cache:
+            cache_key = self._get_search_cache_key(
+                ids, statuses, date_fields, start_time, end_time, search_key_fields, search_keys
+            )
         total, items = await self._search(
-            filters, search_key_fields or [], search_keys, sort_by or [], offset, limit
+            filters,
+            search_key_fields or [],
+            search_keys,
+            sort_by or [],
+            offset,
+            limit,
+            cache_key=cache_key,
         )
         return SearchResult(total, items)
 
+    @staticmethod
+    def search_document() -> sa.ColumnElement:
+        # the JSON of YourAggregateResponse without operation histories, keep them in sync
+        your_value_object = YourAggregateModel.your_value_object
+        creator = YourAggregateModel.creator
+        return json_object(
+            id=YourAggregateModel.id,
+            yourValueObject=json_object(
+                propertyA=your_value_object["property_a"],
+                propertyB=your_value_object["property_b"],
+            ),
+            status=YourAggregateModel.status,
+            operationHistories=sa.literal_column("'[]'::json"),
+            creator=json_object(
+                id=creator["id"],
+                organization=json_object(id=creator["organization_id"], name=None),
+                name=creator["name"],
+                email=creator["email"],
+                mobile=creator["mobile"],
+            ),
+            createdAt=json_timestamp(YourAggregateModel.created_at),
+            updatedAt=json_timestamp(YourAggregateModel.updated_at),
+        )
+
+    async def search_your_aggregates_json(
+        self,
+        ids: list[str] | None = None,
+        statuses: list[str] | None = None,
+        date_fields: list[str] | None = None,
+        start_time: DateTime | None = None,
+        end_time: DateTime | None = None,
+        search_key_fields: list[str] | None = None,
+        search_keys: list[str] | None = None,
+        sort_by: list[str] | None = None,
+        offset: int = 0,
+        limit: int = 0,
+        use_cache: bool = True,
+    ) -> str:
+        """Read-only `search_your_aggregates`, returns the JSON of the response built by Postgres."""
+        filters = self._get_search_filters(ids, statuses, date_fields, start_time, end_time)
+        cache_key = None
+        if use_cache:
+            cache_key = self._get_search_cache_key(
+                ids, statuses, date_fields, start_time, end_time, search_key_fields, search_keys
+            )
+        return await self._search_json(
+            self.search_document(),
+            filters,
+            search_key_fields or [],
+            search_keys,
+            sort_by or [],
+            offset,
+            limit,
+            cache_key=cache_key,
+        )
+
     async def search_your_aggregate_models(
         self,
         ids: list[str] | None = None,
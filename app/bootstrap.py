@@ -0,0 +1,34 @@
+import functools
+import importlib
+
+from app.adapter.event_handler.helper import background_event_scope
+from app.config import config
+from app.core.ddd_base import (
+    DispatchMode,
+    EventWorkerPool,
+    IdVersion,
+    OverflowPolicy,
+    event_bus,
+    id_generator,
+)
+from app.logger import ServiceLogger
+
+
+@functools.cache
+def bootstrap():
+    """Configures the id generator and the event bus and subscribes the event handlers,
+    called once by the entry points of the processes before they handle anything.
+    """
+    id_generator.configure(IdVersion(config.id_version))
+    event_bus.configure(
+        DispatchMode(config.event_bus_dispatch_mode),
+        config.event_bus_max_concurrency,
+        EventWorkerPool(
+            config.event_worker_count,
+            config.event_worker_queue_size,
+            OverflowPolicy(config.event_worker_overflow_policy),
+            job_scope=background_event_scope,
+            logger=ServiceLogger(EventWorkerPool.__name__),
+        ),
+    )
+    importlib.import_module("app.adapter.event_handler")
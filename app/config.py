@@ -14,6 +14,11 @@ class DeploymentType(Enum):
     PROD = "PROD"
 
 
+class MessageQueueBackend(Enum):
+    RABBITMQ = "RABBITMQ"
+    IN_MEMORY = "IN_MEMORY"
+
+
 # env from manifest
 class Config:
     service_name = "ddd-service"
@@ -26,6 +31,13 @@ class Config:
         f"postgresql+psycopg://{database_username}:{quote_plus(database_password)}@{database_url}"
     )
     postgres_schema = os.environ.get("POSTGRES_SCHEMA", "ddd_service")
+    # monthly domain_event partitions, kept by `app/domain_event_maintenance.py`
+    domain_event_partition_months_ahead = int(
+        os.environ.get("DOMAIN_EVENT_PARTITION_MONTHS_AHEAD", "2")
+    )
+    # older partitions are exported to gzip NDJSON files in the directory and detached, 0 keeps all
+    domain_event_retention_months = int(os.environ.get("DOMAIN_EVENT_RETENTION_MONTHS", "0"))
+    domain_event_export_dir = os.environ.get("DOMAIN_EVENT_EXPORT_DIR", "exports/domain_event")
 
     # Server
     port = os.environ.get("PORT", "8080")
@@ -50,6 +62,63 @@ class Config:
         if datetime:
             return datetime.in_tz(self.time_zone).format(self.pendulum_datetime_format)
 
+    # UUID4 / UUID7, time-ordered ids of aggregates, spans and archive rows keep inserts local
+    id_version = os.environ.get("ID_VERSION", "UUID7")
+
+    # archive rows, FULL: copy of the whole row per archiving event,
+    # DELTA: changed columns only, with a full snapshot every `archive_snapshot_interval` versions
+    archive_mode = os.environ.get("ARCHIVE_MODE", "FULL")
+    archive_snapshot_interval = int(os.environ.get("ARCHIVE_SNAPSHOT_INTERVAL", "20"))
+
+    # in-process read cache of aggregates loaded without a lock, 0 disables it
+    aggregate_cache_size = int(os.environ.get("AGGREGATE_CACHE_SIZE", "10000"))
+    aggregate_cache_ttl_seconds = float(os.environ.get("AGGREGATE_CACHE_TTL_SECONDS", "30"))
+    # in-process cache of search pages and totals, invalidated by any write to the table
+    search_cache_size = int(os.environ.get("SEARCH_CACHE_SIZE", "1000"))
+    search_cache_ttl_seconds = float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", "5"))
+    search_cache_total_ttl_seconds = float(os.environ.get("SEARCH_CACHE_TOTAL_TTL_SECONDS", "30"))
+    # true: concurrent identical reads of a process share one call of the controller
+    single_flight = os.environ.get("SINGLE_FLIGHT", "true")
+
+    # event bus
+    # CONCURRENT: handlers subscribed as concurrent run together
+    event_bus_dispatch_mode = os.environ.get("EVENT_BUS_DISPATCH_MODE", "SEQUENTIAL")
+    event_bus_max_concurrency = int(os.environ.get("EVENT_BUS_MAX_CONCURRENCY", "8"))
+    # background handlers of the restful server
+    # BLOCK / DROP_NEWEST / DROP_OLDEST when the queue is full
+    event_worker_count = int(os.environ.get("EVENT_WORKER_COUNT", "4"))
+    event_worker_queue_size = int(os.environ.get("EVENT_WORKER_QUEUE_SIZE", "1000"))
+    event_worker_overflow_policy = os.environ.get("EVENT_WORKER_OVERFLOW_POLICY", "BLOCK")
+    event_worker_drain_timeout_second = float(
+        os.environ.get("EVENT_WORKER_DRAIN_TIMEOUT_SECOND", "10")
+    )
+
+    # message queue
+    # IN_MEMORY: process-local broker for tests and benchmarks without RabbitMQ
+    message_queue_backend = MessageQueueBackend(
+        os.environ.get("MESSAGE_QUEUE_BACKEND", MessageQueueBackend.RABBITMQ.value)
+    )
+    # gzip / zstd, bodies larger than the threshold are compressed, empty to disable
+    message_queue_compression = os.environ.get("MESSAGE_QUEUE_COMPRESSION", "")
+    message_queue_compression_threshold_bytes = int(
+        os.environ.get("MESSAGE_QUEUE_COMPRESSION_THRESHOLD_BYTES", "16384")
+    )
+    # merged messages larger than it are split into several messages, 0 to disable
+    message_queue_max_message_bytes = int(
+        os.environ.get("MESSAGE_QUEUE_MAX_MESSAGE_BYTES", "1048576")
+    )
+    # > 0: publish messages from a background thread per process, batched across requests
+    message_queue_linger_ms = float(os.environ.get("MESSAGE_QUEUE_LINGER_MS", "0"))
+    message_queue_max_batch_count = int(os.environ.get("MESSAGE_QUEUE_MAX_BATCH_COUNT", "500"))
+    message_queue_max_batch_bytes = int(os.environ.get("MESSAGE_QUEUE_MAX_BATCH_BYTES", "4194304"))
+    # true: messages of requests are written to the outbox table in the request transaction,
+    # and published by `app/outbox_relay.py`
+    message_queue_outbox = os.environ.get("MESSAGE_QUEUE_OUTBOX", "false")
+    outbox_batch_size = int(os.environ.get("OUTBOX_BATCH_SIZE", "500"))
+    # the relay also polls in case a notification is missed
+    outbox_poll_interval_second = float(os.environ.get("OUTBOX_POLL_INTERVAL_SECOND", "5"))
+    outbox_retention_hours = float(os.environ.get("OUTBOX_RETENTION_HOURS", "24"))
+
     # rabbitmq
     rabbitmq_host = os.environ.get("RABBITMQ_HOST", "localhost")
     rabbitmq_port = os.environ.get("RABBITMQ_PORT", "5672")
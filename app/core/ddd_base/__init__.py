@@ -1,12 +1,20 @@
 from .aggregate import AggregateRoot
 from .domain_event import DomainEvent, User
-from .event_bus import event_bus
+from .event_bus import DispatchMode, DispatchPhase, event_bus
+from .event_worker_pool import EventWorkerPool, OverflowPolicy
+from .identifier import IdVersion, id_generator
 from .use_case import UseCaseBase
 
 __all__ = [
     "AggregateRoot",
+    "DispatchMode",
+    "DispatchPhase",
     "DomainEvent",
+    "EventWorkerPool",
+    "IdVersion",
+    "OverflowPolicy",
     "UseCaseBase",
     "User",
     "event_bus",
+    "id_generator",
 ]
@@ -1,7 +1,7 @@
 import abc
-import uuid
 
-from app.core.ddd_base.domain_event import DomainEvent
+from app.core.ddd_base.domain_event import DomainEvent, TraceContext
+from app.core.ddd_base.identifier import id_generator
 
 
 class AggregateRoot(metaclass=abc.ABCMeta):
@@ -9,25 +9,27 @@ class AggregateRoot(metaclass=abc.ABCMeta):
         self.is_archive = False
         self.is_delete = False
         self.domain_events: list[DomainEvent] = []
+        self.trace_context = TraceContext()
 
     def add_event(self, event: DomainEvent):
+        event.share_trace_context(self.trace_context)
         self.domain_events.append(event)
         self.is_archive = True
 
     def clear_events(self):
         self.domain_events = []
+        self.trace_context = TraceContext()
         self.is_archive = False
 
     def save_events_tracing(
         self, parent_event: DomainEvent | None = None, trace_id: str | None = None
     ):
+        # the events of the aggregate share the context, it is set once for all of them
         if parent_event:
-            for event in self.domain_events:
-                event.tracer.parent_span_id = parent_event.tracer.span_id
-                event.tracer.trace_id = parent_event.tracer.trace_id
+            self.trace_context.parent_span_id = parent_event.tracer.span_id
+            self.trace_context.trace_id = parent_event.tracer.trace_id
         elif trace_id:
-            for event in self.domain_events:
-                event.tracer.trace_id = trace_id
+            self.trace_context.trace_id = trace_id
 
     @property
     def all_events(self) -> list[DomainEvent]:
@@ -39,4 +41,4 @@ class AggregateRoot(metaclass=abc.ABCMeta):
 
     @staticmethod
     def generate_id() -> str:
-        return str(uuid.uuid4())
+        return id_generator.generate()
@@ -1,44 +1,81 @@
 import dataclasses
-import enum
-import uuid
-from collections.abc import Iterable
+import time
+from datetime import datetime
 from functools import cached_property
+from typing import ClassVar, Self
 
 import pendulum
 from dataclass_mixins import DataclassMixin
 from pendulum.datetime import DateTime
 
+from app.core.ddd_base.exception import InvalidEventRegisterError
+from app.core.ddd_base.identifier import id_generator
+from packages.dataclass_codec import compile_decoder, compile_encoder
+
+
+class TraceContext:
+    """The trace shared by all events of an aggregate save, set once instead of per event."""
+
+    __slots__ = ("parent_span_id", "trace_id")
+
+    def __init__(self, trace_id: str | None = None, parent_span_id: str | None = None):
+        self.trace_id = trace_id
+        self.parent_span_id = parent_span_id
+
 
 class Tracer:
-    def __init__(self):
-        self._created_at = pendulum.now()
-        self._span_id = str(uuid.uuid4())
-        self._parent_span_id = None
-        self._trace_id = self._span_id
+    __slots__ = ("_clock_ns", "_created_at", "_span_id", "context")
+
+    def __init__(self, context: TraceContext | None = None):
+        # the wall clock of each tracer, `created_at` is the partition key of the stored events
+        self._clock_ns = time.time_ns()
+        self._created_at: DateTime | None = None
+        self._span_id: str | None = None
+        self.context = context or TraceContext()
+
+    @classmethod
+    def restore(
+        cls,
+        created_at: datetime | None,
+        span_id: str,
+        parent_span_id: str | None,
+        trace_id: str,
+    ) -> "Tracer":
+        """Returns the tracer of a stored event."""
+        tracer = cls(TraceContext(trace_id, parent_span_id))
+        if created_at is not None:
+            tracer._created_at = pendulum.instance(created_at)
+        tracer._span_id = span_id
+        return tracer
 
     @property
     def created_at(self) -> DateTime:
-        return self._created_at
+        if self._created_at is not None:
+            return self._created_at
+        # converted only when serialized
+        return pendulum.from_timestamp(self._clock_ns / 1e9, tz=pendulum.local_timezone())
 
     @property
     def span_id(self) -> str:
+        if self._span_id is None:
+            self._span_id = id_generator.generate()
         return self._span_id
 
     @property
     def parent_span_id(self) -> str | None:
-        return self._parent_span_id
+        return self.context.parent_span_id
 
     @parent_span_id.setter
     def parent_span_id(self, value: str):
-        self._parent_span_id = value
+        self.context.parent_span_id = value
 
     @property
     def trace_id(self) -> str:
-        return self._trace_id
+        return self.context.trace_id or self.span_id
 
     @trace_id.setter
     def trace_id(self, value: str):
-        self._trace_id = value
+        self.context.trace_id = value
 
 
 @dataclasses.dataclass(frozen=True)
@@ -50,20 +87,55 @@ class User(DataclassMixin):
     mobile: str | None = None
 
 
+# event classes by `EVENT_NAME`, to decode stored events
+_event_types: dict[str, type["DomainEvent"]] = {}
+
+
+def _qualified_name(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
 class DomainEvent:
     doer: User
     VERSION = 1
+    # the name of the stored events, the class name unless set by the class
+    EVENT_NAME: ClassVar[str]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "EVENT_NAME" not in cls.__dict__:
+            cls.EVENT_NAME = cls.__name__
+        registered = _event_types.get(cls.EVENT_NAME)
+        # the same class may be created again, e.g. by a dataclass with slots
+        if registered is not None and _qualified_name(registered) != _qualified_name(cls):
+            raise InvalidEventRegisterError(
+                f"Event name {cls.EVENT_NAME} of {_qualified_name(cls)} is taken by"
+                f" {_qualified_name(registered)}, set another EVENT_NAME"
+            )
+        _event_types[cls.EVENT_NAME] = cls
+
+    @staticmethod
+    def event_types() -> dict[str, type["DomainEvent"]]:
+        """Returns the event classes by `EVENT_NAME`."""
+        return dict(_event_types)
 
     @cached_property
     def tracer(self) -> Tracer:
         return Tracer()
 
+    def share_trace_context(self, context: TraceContext):
+        """Traces the event with the context shared by the events of a unit of work."""
+        # frozen events are not assignable, the cached property lives in the instance dict
+        tracer = self.__dict__.get("tracer")
+        if tracer is None:
+            self.__dict__["tracer"] = Tracer(context)
+        else:
+            tracer.context = context
+
     def serialize(self) -> dict:
-        dict_with_enum = dataclasses.asdict(self)
-        dict_of_event = self._convert_enum_dict(dict_with_enum)
         return {
-            "name": type(self).__name__,
-            "body": dict_of_event,
+            "name": self.EVENT_NAME,
+            "body": compile_encoder(type(self), camel_case=False, iso_datetime=True)(self),
             "created_at": self.tracer.created_at,
             "version": self.VERSION,
             "span_id": self.tracer.span_id,
@@ -71,32 +143,27 @@ class DomainEvent:
             "trace_id": self.tracer.trace_id,
         }
 
-    def _convert_enum_dict(self, target: dict) -> dict:
-        converted = {}
-        for k, v in target.items():
-            if isinstance(v, dict):
-                converted[k] = self._convert_enum_dict(v)
-            elif isinstance(v, (list, set)):
-                converted[k] = self._convert_enum_iterable(v)
-            elif isinstance(v, enum.Enum):
-                converted[k] = v.value
-            elif isinstance(v, DateTime):
-                converted[k] = v.isoformat()
-            else:
-                converted[k] = v
-        return converted
-
-    def _convert_enum_iterable(self, target: Iterable):
-        converted = []
-        for v in target:
-            if isinstance(v, dict):
-                converted.append(self._convert_enum_dict(v))
-            elif isinstance(v, (list, set)):
-                converted.append(self._convert_enum_iterable(v))
-            elif isinstance(v, enum.Enum):
-                converted.append(v.value)
-            elif isinstance(v, DateTime):
-                converted.append(v.isoformat())
-            else:
-                converted.append(v)
-        return converted
+    @classmethod
+    def upcast(cls, body: dict, version: int) -> dict:
+        """Converts the body of a stored event into the current `VERSION`,
+        override it when the fields of the event change.
+        """
+        if version != cls.VERSION:
+            raise ValueError(f"{cls.__name__} version {version} can not be upcast")
+        return body
+
+    @classmethod
+    def deserialize(cls, data: dict) -> Self:
+        """Builds an event from the output of `serialize`, e.g. a row of the domain event table.
+        :param data: The name, body, version and tracing of the event.
+        :return: The event of the class with the `EVENT_NAME` of `name`.
+        """
+        event_type = _event_types.get(data["name"])
+        if event_type is None or not issubclass(event_type, cls):
+            raise ValueError(f"Unknown event {data['name']}")
+        body = event_type.upcast(data["body"], data["version"] or event_type.VERSION)
+        event = compile_decoder(event_type, camel_case=False)(body)
+        event.__dict__["tracer"] = Tracer.restore(
+            data["created_at"], data["span_id"], data["parent_span_id"], data["trace_id"]
+        )
+        return event
@@ -1,26 +1,115 @@
+import asyncio
 from collections import defaultdict
-from collections.abc import Callable, Coroutine, Iterable
+from collections.abc import Callable, Coroutine
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+from enum import Enum
 from functools import wraps
 from typing import Any
 
 from app.core.ddd_base.domain_event import DomainEvent
+from app.core.ddd_base.event_worker_pool import EventWorkerPool
 from app.core.ddd_base.exception import InvalidEventRegisterError
 
 type AsyncEventHandler = Callable[[DomainEvent], Coroutine[Any, Any, Any]]
+type AsyncBatchEventHandler = Callable[[list[DomainEvent]], Coroutine[Any, Any, Any]]
+
+
+class DispatchMode(Enum):
+    # await the handlers one after another
+    SEQUENTIAL = "SEQUENTIAL"
+    # run the handlers subscribed as concurrent together
+    CONCURRENT = "CONCURRENT"
+
+
+class DispatchPhase(Enum):
+    # run inside the transaction that saved the event
+    IN_TRANSACTION = "IN_TRANSACTION"
+    # run after the transaction is committed, with a session of its own
+    AFTER_COMMIT = "AFTER_COMMIT"
+
+
+# set on functions using the database session of the request, they can not run concurrently
+USES_REQUEST_SESSION = "__uses_request_session__"
+
+
+@dataclass(frozen=True, slots=True)
+class _Subscription:
+    concurrent: bool
+    phase: DispatchPhase
+    background: bool
+    batch: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class _Dispatch:
+    handlers: tuple[AsyncEventHandler, ...]
+    sequential: tuple[AsyncEventHandler, ...]
+    concurrent: tuple[AsyncEventHandler, ...]
+    after_commit: tuple[AsyncEventHandler, ...]
+    background: tuple[AsyncEventHandler, ...]
+    batch: tuple[AsyncBatchEventHandler, ...]
+
+
+# function, event or events of a batch function, run in background or not
+type DeferredHandler = tuple[Callable, DomainEvent | list[DomainEvent], bool]
+
+# the after-commit handlers of the events published in the current transaction
+_deferred_handlers: ContextVar[list[DeferredHandler] | None] = ContextVar(
+    "deferred_handlers", default=None
+)
 
 
 class EventBus:
-    def __init__(self) -> None:
-        self._subscribed_for_events: dict[type[DomainEvent], set[AsyncEventHandler]] = defaultdict(
-            set
-        )
-        self._subscribed_for_all: set[AsyncEventHandler] = set()
+    def __init__(
+        self,
+        dispatch_mode: DispatchMode = DispatchMode.SEQUENTIAL,
+        max_concurrency: int = 8,
+        worker_pool: EventWorkerPool | None = None,
+    ) -> None:
+        # dicts keep the subscription order
+        self._subscribed_for_events: dict[
+            type[DomainEvent], dict[AsyncEventHandler, _Subscription]
+        ] = defaultdict(dict)
+        self._subscribed_for_all: dict[AsyncEventHandler, _Subscription] = {}
+        self._batch_subscriptions: dict[AsyncBatchEventHandler, _Subscription] = {}
+        self._dispatch_table: dict[type[DomainEvent], _Dispatch] = {}
+        self.dispatch_mode = dispatch_mode
+        self.max_concurrency = max_concurrency
+        self.worker_pool = worker_pool
+
+    def configure(
+        self,
+        dispatch_mode: DispatchMode,
+        max_concurrency: int,
+        worker_pool: EventWorkerPool | None = None,
+    ) -> None:
+        """Set how the handlers of an event are run.
+        :param dispatch_mode: Run the handlers one after another or concurrently.
+        :param max_concurrency: The maximum number of handlers of an event running at the same time.
+        :param worker_pool: Run the background handlers, they run inline if it is not started.
+        """
+        self.dispatch_mode = dispatch_mode
+        self.max_concurrency = max_concurrency
+        self.worker_pool = worker_pool
 
     def subscribe(
-        self, event_types: list[type[DomainEvent]] | None = None, all_event: bool = False
+        self,
+        event_types: list[type[DomainEvent]] | None = None,
+        all_event: bool = False,
+        concurrent: bool = False,
+        phase: DispatchPhase = DispatchPhase.IN_TRANSACTION,
+        background: bool = False,
     ):
         """Decorator for subscribing a function to a specific event.
-        :param event_types: Type of events to subscribe to.
+        :param event_types: Type of events to subscribe to, their subclasses are included.
+        :param concurrent: Run the function together with the other concurrent functions
+            in the concurrent mode. It must not use the database session of the request,
+            an `AsyncSession` can not be used by tasks at the same time.
+        :param phase: Run the function inside the transaction that saved the event,
+            or once it is committed. After-commit functions always run one after another.
+        :param background: Run the function by the worker pool once the transaction is committed,
+            the publisher does not wait for it.
         :return: The outer function.
         """
 
@@ -30,11 +119,56 @@ class EventBus:
                     "You can only register a function to some specific event or for all event"
                 )
 
+            if (
+                concurrent
+                and phase is DispatchPhase.IN_TRANSACTION
+                and not background
+                and getattr(func, USES_REQUEST_SESSION, False)
+            ):
+                raise InvalidEventRegisterError(
+                    f"{func.__qualname__} uses the database session of the request,"
+                    " it can not run concurrently"
+                )
+
+            subscription = _Subscription(concurrent, phase, background)
             if all_event:
-                self._subscribed_for_all.add(func)
+                self._subscribed_for_all[func] = subscription
             elif event_types:
                 for event_type in event_types:
-                    self._subscribed_for_events[event_type].add(func)
+                    self._subscribed_for_events[event_type][func] = subscription
+            self._dispatch_table.clear()
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return func(*args, **kwargs)
+
+            return wrapper
+
+        return outer
+
+    def subscribe_batch(
+        self,
+        event_types: list[type[DomainEvent]],
+        phase: DispatchPhase = DispatchPhase.IN_TRANSACTION,
+        background: bool = False,
+    ):
+        """Decorator for subscribing a function to the events of `publish_all` in one call.
+
+        The function receives the list of the events of the types, in the published order.
+        After-commit and background functions receive the events of the whole transaction.
+        :param event_types: Type of events to subscribe to, their subclasses are included.
+        :param phase: Run the function inside the transaction that saved the events,
+            or once it is committed.
+        :param background: Run the function by the worker pool once the transaction is committed.
+        :return: The outer function.
+        """
+
+        def outer(func: AsyncBatchEventHandler):
+            subscription = _Subscription(False, phase, background, batch=True)
+            self._batch_subscriptions[func] = subscription
+            for event_type in event_types:
+                self._subscribed_for_events[event_type][func] = subscription  # type: ignore[index]
+            self._dispatch_table.clear()
 
             @wraps(func)
             def wrapper(*args, **kwargs):
@@ -46,32 +180,184 @@ class EventBus:
 
     async def publish_all(self, events: list[DomainEvent]) -> None:
         """Publish all events and run the related subscribed functions.
+
+        Batch functions are called once with all of their events, after the other functions.
         :param events: Instances of domain events.
         """
+        batches: dict[AsyncBatchEventHandler, list[DomainEvent]] = {}
         for event in events:
-            await self.publish(event)
+            dispatch = self._dispatch(type(event))
+            await self._publish_event(event, dispatch)
+            for func in dispatch.batch:
+                batches.setdefault(func, []).append(event)
+
+        deferred = _deferred_handlers.get()
+        after_commit: list[DeferredHandler] = []
+        for func, batch in batches.items():
+            subscription = self._batch_subscriptions[func]
+            if subscription.background or subscription.phase is DispatchPhase.AFTER_COMMIT:
+                after_commit.append((func, batch, subscription.background))
+            else:
+                await func(batch)
+        if deferred is None:
+            await self.dispatch_after_commit(after_commit, raise_error=True)
+        else:
+            deferred.extend(after_commit)
 
     async def publish(self, event: DomainEvent) -> None:
-        """Emit an event and run the subscribed functions.
+        """Emit an event and run the subscribed functions, see `publish_all`.
+        :param event: Instance of domain event.
+        """
+        await self.publish_all([event])
+
+    async def _publish_event(self, event: DomainEvent, dispatch: _Dispatch) -> None:
+        """Run the functions subscribed to an event.
+
+        In concurrent mode the functions not subscribed as concurrent run first, in the
+        subscription order, then the concurrent ones run together. The first exception is raised after all of them finish.
+        After-commit and background functions are deferred to the end of the current transaction,
+        outside of a transaction they run right after the others.
         :param event: Instance of domain event.
+        :param dispatch: The functions subscribed to the event.
+        """
+        if dispatch.after_commit or dispatch.background:
+            deferred = _deferred_handlers.get()
+            if deferred is None:
+                await self._publish_in_transaction(event, dispatch)
+                await self.dispatch_after_commit(
+                    [
+                        *((func, event, False) for func in dispatch.after_commit),
+                        *((func, event, True) for func in dispatch.background),
+                    ],
+                    raise_error=True,
+                )
+                return
+            deferred.extend((func, event, False) for func in dispatch.after_commit)
+            deferred.extend((func, event, True) for func in dispatch.background)
+        await self._publish_in_transaction(event, dispatch)
+
+    def begin_transaction(self) -> Token:
+        """Start deferring the after-commit functions of published events.
+        :return: The token to end the transaction with.
+        """
+        return _deferred_handlers.set([])
+
+    def end_transaction(self, token: Token | None) -> list[DeferredHandler]:
+        """Stop deferring the after-commit functions.
+        :param token: The token returned by `begin_transaction`.
+        :return: The deferred functions with their events, run them after the commit.
+            The events of a batch function are merged into its first call.
         """
-        for func in self._event_funcs(event):
+        if token is None:
+            return []
+        deferred = _deferred_handlers.get() or []
+        _deferred_handlers.reset(token)
+
+        merged: list[DeferredHandler] = []
+        batches: dict[Callable, list[DomainEvent]] = {}
+        for func, event, background in deferred:
+            if isinstance(event, list):
+                if func in batches:
+                    batches[func].extend(event)
+                    continue
+                batches[func] = event
+            merged.append((func, event, background))
+        return merged
+
+    async def dispatch_after_commit(
+        self, deferred: list[DeferredHandler], raise_error: bool = False
+    ) -> list[Exception]:
+        """Run the deferred after-commit functions one after another,
+        and hand off the background functions to the worker pool.
+
+        A failed function does not stop the others, the transaction is already committed.
+        :param deferred: The functions returned by `end_transaction`.
+        :param raise_error: Raise the first exception after all of them finish.
+        :return: The exceptions raised by the functions.
+        """
+        errors = []
+        for func, event, background in deferred:
+            try:
+                if background and self.worker_pool and self.worker_pool.running:
+                    await self.worker_pool.submit(func, event)
+                else:
+                    await func(event)
+            except Exception as e:
+                errors.append(e)
+        if raise_error and errors:
+            raise errors[0]
+        return errors
+
+    async def _publish_in_transaction(self, event: DomainEvent, dispatch: _Dispatch) -> None:
+        if self.dispatch_mode is DispatchMode.SEQUENTIAL or len(dispatch.concurrent) <= 1:
+            for func in dispatch.handlers:
+                await func(event)
+            return
+
+        for func in dispatch.sequential:
             await func(event)
 
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(func: AsyncEventHandler):
+            async with semaphore:
+                return await func(event)
+
+        results = await asyncio.gather(
+            *(run(func) for func in dispatch.concurrent), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
     def deregister_all_events(self) -> None:
         """Clear all registered event handlers"""
-        self._subscribed_for_events = defaultdict(set)
-        self._subscribed_for_all = set()
+        self._subscribed_for_events = defaultdict(dict)
+        self._subscribed_for_all = {}
+        self._batch_subscriptions = {}
+        self._dispatch_table.clear()
 
     # ------------------------------------------
     # Private methods.
     # ------------------------------------------
-    def _event_funcs(self, event: DomainEvent) -> Iterable[AsyncEventHandler]:
-        """Returns an Iterable of the functions subscribed to a event.
-        :param event: Name of the event.
-        :return: A iterable to do things with.
+    def _dispatch(self, event_type: type[DomainEvent]) -> _Dispatch:
+        """Returns the functions subscribed to a event type, cached until the next subscription.
+        :param event_type: Type of the event.
+        :return: The functions in the subscription order, split by phase and concurrent or not.
         """
-        yield from self._subscribed_for_events[type(event)].union(self._subscribed_for_all)
+        dispatch = self._dispatch_table.get(event_type)
+        if dispatch:
+            return dispatch
+
+        # function: concurrent or not
+        subscribed: dict[AsyncEventHandler, bool] = {}
+        after_commit: dict[AsyncEventHandler, None] = {}
+        background: dict[AsyncEventHandler, None] = {}
+        batch: dict[AsyncBatchEventHandler, None] = {}
+        for subscriptions in [
+            *(self._subscribed_for_events.get(t, {}) for t in event_type.__mro__),
+            self._subscribed_for_all,
+        ]:
+            for func, subscription in subscriptions.items():
+                if subscription.batch:
+                    batch[func] = None
+                elif subscription.background:
+                    background[func] = None
+                elif subscription.phase is DispatchPhase.AFTER_COMMIT:
+                    after_commit[func] = None
+                else:
+                    subscribed[func] = subscribed.get(func, True) and subscription.concurrent
+
+        dispatch = _Dispatch(
+            tuple(subscribed),
+            tuple(func for func, concurrent in subscribed.items() if not concurrent),
+            tuple(func for func, concurrent in subscribed.items() if concurrent),
+            tuple(after_commit),
+            tuple(background),
+            tuple(batch),
+        )
+        self._dispatch_table[event_type] = dispatch
+        return dispatch
 
 
 event_bus = EventBus()
@@ -0,0 +1,142 @@
+import asyncio
+import contextvars
+import logging
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager, nullcontext
+from enum import Enum
+
+from app.core.ddd_base.domain_event import DomainEvent
+
+# function, event or events of a batch function, context of the publisher
+type Job = tuple[Callable, DomainEvent | list[DomainEvent], contextvars.Context]
+
+
+class OverflowPolicy(Enum):
+    # wait for a free slot, slows down the publisher
+    BLOCK = "BLOCK"
+    # drop the submitted event
+    DROP_NEWEST = "DROP_NEWEST"
+    # drop the oldest queued event to make room
+    DROP_OLDEST = "DROP_OLDEST"
+
+
+class EventWorkerPool:
+    """Runs event handlers by worker tasks of the event loop, off the path of the publisher.
+
+    Handlers wait in a bounded queue, the `overflow_policy` decides what happens when it is full.
+    The pool works after `start` is called in the event loop of the process, e.g. on the
+    startup of the ASGI lifespan, and is drained by `stop` on its shutdown.
+
+    Every handler runs in a copy of the context of the publisher, entered into `job_scope`,
+    e.g. to replace the instances bound to the request.
+    """
+
+    def __init__(
+        self,
+        worker_count: int = 4,
+        max_queue_size: int = 1000,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        job_scope: Callable[[], AbstractAsyncContextManager] | None = None,
+        logger: logging.Logger | None = None,
+    ):
+        self.worker_count = worker_count
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+        self.job_scope = job_scope or nullcontext
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self.dropped_count = 0
+        self._queue: asyncio.Queue[Job] | None = None
+        self._workers: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether submitted handlers are run by the workers of the current event loop."""
+        try:
+            return self._loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    @property
+    def pending_count(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self) -> None:
+        """Starts the workers in the running event loop."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._work(self._queue), name=f"{self.__class__.__name__}-{i}")
+            for i in range(self.worker_count)
+        ]
+
+    async def stop(self, timeout: float | None = None) -> bool:
+        """Waits for the queued handlers and stops the workers, returns False on timeout."""
+        if not self.running or self._queue is None:
+            return True
+        queue = self._queue
+        try:
+            await asyncio.wait_for(queue.join(), timeout)
+            drained = True
+        except TimeoutError:
+            drained = False
+            self.logger.warning("stop with %d pending event handlers", queue.qsize())
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+        return drained
+
+    async def submit(self, handler: Callable, event: DomainEvent | list[DomainEvent]) -> bool:
+        """Queues a handler with its event, returns False if it is dropped."""
+        if not self.running or self._queue is None:
+            raise RuntimeError(f"{self.__class__.__name__} is not started")
+        job = (handler, event, contextvars.copy_context())
+        match self.overflow_policy:
+            case OverflowPolicy.BLOCK:
+                await self._queue.put(job)
+                return True
+            case OverflowPolicy.DROP_OLDEST if self._queue.full():
+                dropped = self._queue.get_nowait()
+                self._queue.task_done()
+                self._drop(dropped)
+                self._queue.put_nowait(job)
+                return True
+            case _:
+                try:
+                    self._queue.put_nowait(job)
+                    return True
+                except asyncio.QueueFull:
+                    self._drop(job)
+                    return False
+
+    # ------------------------------------------
+    # Private methods.
+    # ------------------------------------------
+    def _drop(self, job: Job):
+        handler, event, _ = job
+        self.dropped_count += 1
+        self.logger.warning("queue is full, drop %s of %s", handler.__name__, _event_name(event))
+
+    async def _work(self, queue: asyncio.Queue[Job]):
+        while True:
+            handler, event, context = await queue.get()
+            try:
+                await asyncio.create_task(self._run(handler, event), context=context)
+            except Exception:
+                self.logger.exception("%s of %s failed", handler.__name__, _event_name(event))
+            finally:
+                queue.task_done()
+
+    async def _run(self, handler: Callable, event: DomainEvent | list[DomainEvent]):
+        async with self.job_scope():
+            await handler(event)
+
+
+def _event_name(event: DomainEvent | list[DomainEvent]) -> str:
+    if isinstance(event, list):
+        return f"{len(event)} events"
+    return type(event).__name__
@@ -0,0 +1,59 @@
+import os
+import threading
+import time
+import uuid
+from enum import Enum
+
+_COUNTER_MAX = 0xFFF
+
+
+class IdVersion(Enum):
+    # random, spreads inserts over the whole primary key index
+    UUID4 = "UUID4"
+    # time-ordered, inserts append to the right edge of the primary key index
+    UUID7 = "UUID7"
+
+
+class IdGenerator:
+    def __init__(self, id_version: IdVersion = IdVersion.UUID4) -> None:
+        self.id_version = id_version
+        self._last_ms = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def configure(self, id_version: IdVersion) -> None:
+        """Set the version of the ids of aggregates, spans and archive rows.
+        :param id_version: UUID4 or the time-ordered UUID7.
+        """
+        self.id_version = id_version
+
+    def generate(self) -> str:
+        if self.id_version is IdVersion.UUID7:
+            return str(self.uuid7())
+        return str(uuid.uuid4())
+
+    def uuid7(self) -> uuid.UUID:
+        """Returns a UUIDv7 of RFC 9562.
+
+        The 12 bits after the millisecond timestamp are a counter with a random start,
+        so the ids of a process generated within the same millisecond keep their order.
+        """
+        with self._lock:
+            ms = time.time_ns() // 1_000_000
+            if ms > self._last_ms:
+                self._last_ms = ms
+                self._counter = int.from_bytes(os.urandom(2)) & 0x7FF
+            else:
+                self._counter += 1
+                if self._counter > _COUNTER_MAX:
+                    # borrow the next millisecond instead of going backwards
+                    self._last_ms += 1
+                    self._counter = 0
+            last_ms, counter = self._last_ms, self._counter
+        rand_b = int.from_bytes(os.urandom(8)) & 0x3FFF_FFFF_FFFF_FFFF
+        return uuid.UUID(
+            int=(last_ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+        )
+
+
+id_generator = IdGenerator()
@@ -35,7 +35,9 @@ class YourAggregate(AggregateRoot):
         self._id = your_aggregate_id
         self._your_value_object = your_value_object
         self._status = status
+        # the loaded histories, e.g. the latest ones, histories are appended and never changed
         self._operation_histories = operation_histories
+        self._new_operation_histories: list[OperationHistory] = []
         self._creator = creator
         self._created_at = created_at
         self._updated_at = updated_at
@@ -54,7 +56,14 @@ class YourAggregate(AggregateRoot):
 
     @property
     def operation_histories(self) -> list[OperationHistory]:
-        return list(self._operation_histories)
+        return [*self._operation_histories, *self._new_operation_histories]
+
+    def flush_operation_histories(self) -> list[OperationHistory]:
+        """Returns the histories added since the aggregate was loaded, to be appended once."""
+        histories = self._new_operation_histories
+        self._operation_histories.extend(histories)
+        self._new_operation_histories = []
+        return histories
 
     @property
     def creator(self) -> User:
@@ -98,7 +107,7 @@ class YourAggregate(AggregateRoot):
     ):
         if self.status == YourAggregateStatus.VOIDED:
             raise YourAggregateStatusNotMatched(f"Your Aggregate {self.id} is in Voided status")
-        self._operation_histories.append(
+        self._new_operation_histories.append(
             OperationHistory.create_strictly(
                 type=operation_history_type,
                 data=[d for d in operation_history_data if d.before != d.after],
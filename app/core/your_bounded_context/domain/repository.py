@@ -5,6 +5,9 @@ from enum import Enum
 from pendulum.datetime import DateTime
 
 from app.core.your_bounded_context.domain.entity.your_aggregate import YourAggregate
+from app.core.your_bounded_context.domain.value_object.your_aggregate_value_object import (
+    OperationHistory,
+)
 
 
 class SearchDateField(Enum):
@@ -17,9 +20,32 @@ class SearchResult:
     results: list[YourAggregate]
 
 
+@dataclass(frozen=True)
+class OperationHistorySearchResult:
+    total: int
+    results: list[OperationHistory]
+
+
 class YourAggregateRepositoryInterface(metaclass=abc.ABCMeta):
+    # histories are not loaded unless `history_limit` > 0, the latest ones are loaded
+    @abc.abstractmethod
+    async def load_your_aggregate(
+        self, your_aggregate_id: str, lock: bool = True, history_limit: int = 0
+    ) -> YourAggregate:
+        pass
+
+    # the latest histories first
+    @abc.abstractmethod
+    async def search_operation_histories(
+        self, your_aggregate_id: str, offset: int = 0, limit: int = 0
+    ) -> OperationHistorySearchResult:
+        pass
+
+    # versions start from 1, one per archiving event
     @abc.abstractmethod
-    async def load_your_aggregate(self, your_aggregate_id: str) -> YourAggregate:
+    async def load_your_aggregate_version(
+        self, your_aggregate_id: str, version: int
+    ) -> YourAggregate:
         pass
 
     @abc.abstractmethod
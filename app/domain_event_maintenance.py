@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import gzip
+import os
+from pathlib import Path
+
+import orjson
+import pendulum
+
+from app.adapter.repository.base import session_provider
+from app.adapter.repository.domain_event_repository import DomainEventPartitionRepository
+from app.config import config
+from app.logger import ServiceLogger, setup_logging
+
+logger = ServiceLogger(__name__)
+
+
+class DomainEventMaintenance:
+    """Keeps the monthly partitions of the domain_event table, run it periodically, e.g. daily.
+
+    Partitions are created ahead of time so events never land in the default partition.
+    Partitions older than the retention are exported to gzip NDJSON files, one event per line,
+    then detached and dropped, so the indexes of the table stop growing with its history.
+    """
+
+    def __init__(
+        self,
+        months_ahead: int,
+        retention_months: int,
+        export_dir: str,
+        batch_size: int = 1000,
+    ):
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.export_dir = Path(export_dir)
+        self.batch_size = batch_size
+
+    async def create_partitions(self) -> list[str]:
+        """Creates the partitions of this month and the next `months_ahead` months."""
+        current = pendulum.now("UTC").start_of("month")
+        created = []
+        async with session_provider:
+            repository = DomainEventPartitionRepository(session_provider)
+            partitions = await repository.list_partitions()
+            for i in range(self.months_ahead + 1):
+                month = current.add(months=i)
+                if repository.partition_name(month) not in partitions:
+                    created.append(await repository.create_partition(month))
+        for name in created:
+            logger.info("Create partition %s", name)
+        return created
+
+    async def apply_retention(self, dry_run: bool = False) -> list[str]:
+        """Exports and detaches the partitions older than `retention_months`, 0 keeps all."""
+        if self.retention_months <= 0:
+            return []
+        oldest_kept = pendulum.now("UTC").start_of("month").subtract(months=self.retention_months)
+        async with session_provider:
+            partitions = await DomainEventPartitionRepository(session_provider).list_partitions()
+        expired = [name for name, month in partitions.items() if month < oldest_kept]
+        if dry_run:
+            logger.info("Expired partitions: %s", expired)
+            return expired
+
+        for name in expired:
+            path = await self.export_partition(name)
+            # another session, the partition is dropped only after the export is complete
+            async with session_provider:
+                await DomainEventPartitionRepository(session_provider).detach_partition(name)
+            logger.info("Detach partition %s, exported to %s", name, path)
+        return expired
+
+    async def export_partition(self, name: str) -> Path:
+        """Writes the events of a partition to `<export_dir>/<partition>.ndjson.gz`.
+
+        The file is written under a temporary name and renamed once all events are written,
+        an existing file means the partition is completely exported.
+        """
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        path = self.export_dir / f"{name}.ndjson.gz"
+        temp_path = path.with_name(f"{path.name}.tmp")
+        count = 0
+        async with session_provider:
+            repository = DomainEventPartitionRepository(session_provider)
+            expected = await repository.count_events(name)
+            with gzip.open(temp_path, "wb") as file:
+                async for rows in repository.stream_partition(name, self.batch_size):
+                    lines = b"".join(orjson.dumps(dict(row)) + b"\n" for row in rows)
+                    await asyncio.to_thread(file.write, lines)
+                    count += len(rows)
+        if count != expected:
+            temp_path.unlink()
+            raise RuntimeError(f"Export {name} wrote {count} of {expected} events")
+        os.replace(temp_path, path)
+        return path
+
+
+async def serve(args: argparse.Namespace):
+    setup_logging()
+
+    maintenance = DomainEventMaintenance(
+        args.months_ahead, args.retention_months, args.export_dir, args.batch_size
+    )
+    await maintenance.create_partitions()
+    await maintenance.apply_retention(args.dry_run)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create and retire domain_event partitions")
+    parser.add_argument(
+        "--months-ahead", type=int, default=config.domain_event_partition_months_ahead
+    )
+    parser.add_argument(
+        "--retention-months", type=int, default=config.domain_event_retention_months
+    )
+    parser.add_argument("--export-dir", default=config.domain_event_export_dir)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="only list the expired partitions")
+    asyncio.run(serve(parser.parse_args()))
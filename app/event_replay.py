@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+from collections.abc import Callable
+
+from pendulum.datetime import DateTime
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.adapter.projection import Projection, projection_registry
+from app.adapter.repository.base import SessionProvider, session_provider, set_session_provider
+from app.adapter.repository.domain_event_repository import (
+    DomainEventRepository,
+    ReplayCheckpointRepository,
+)
+from app.config import config
+from app.core.ddd_base import DomainEvent
+from app.logger import ServiceLogger, setup_logging
+from app.port.storage.sql.postgres import DB_Session
+
+logger = ServiceLogger(__name__)
+
+
+class EventReplayer:
+    """Replays the stored domain events into projections, e.g. to rebuild read models.
+
+    Events are streamed in id order by a server-side cursor per partition, the partitions run
+    concurrently. The projection writes of a batch are committed with the checkpoint of its
+    partition, so a stopped replay continues from the last committed batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        projections: list[Projection],
+        partition_count: int = 1,
+        partition_key: str | None = None,
+        batch_size: int = 1000,
+        session_factory: async_sessionmaker[AsyncSession] = DB_Session,
+        session_provider_factory: Callable[[], SessionProvider] = SessionProvider,
+    ):
+        self.name = name
+        self.projections = projections
+        self.partition_count = partition_count
+        self.partition_key = partition_key
+        self.batch_size = batch_size
+        self.session_factory = session_factory
+        self.session_provider_factory = session_provider_factory
+
+        event_types = tuple(t for p in projections for t in p.event_types)
+        self.event_names = [
+            name for name, t in DomainEvent.event_types().items() if issubclass(t, event_types)
+        ]
+
+    async def replay(
+        self,
+        start_id: int = 0,
+        end_id: int | None = None,
+        start_time: DateTime | None = None,
+        end_time: DateTime | None = None,
+        reset: bool = False,
+    ) -> int:
+        """Replays the events after `start_id` until `end_id`, returns the number of events.
+        :param end_id: The last event id, the last stored event by default.
+        :param reset: Drop the checkpoints and reset the projections before the replay.
+        """
+        async with session_provider:
+            checkpoint_repository = ReplayCheckpointRepository(session_provider)
+            if reset:
+                await checkpoint_repository.delete_checkpoints(self.name)
+                for projection in self.projections:
+                    if projection.reset:
+                        await projection.reset()
+            checkpoints = await checkpoint_repository.load_checkpoints(self.name)
+            if end_id is None:
+                end_id = await DomainEventRepository(session_provider).get_last_event_id()
+
+        if any(c.partition_count != self.partition_count for c in checkpoints):
+            raise ValueError(
+                f"Replay {self.name} was checkpointed with other partitions, replay with reset"
+            )
+        after_ids = {c.partition: c.last_event_id for c in checkpoints}
+        counts = await asyncio.gather(
+            *(
+                self.replay_partition(
+                    p, max(start_id, after_ids.get(p, 0)), end_id, start_time, end_time
+                )
+                for p in range(self.partition_count)
+            )
+        )
+        return sum(counts)
+
+    async def replay_partition(
+        self,
+        partition: int,
+        after_id: int,
+        end_id: int,
+        start_time: DateTime | None,
+        end_time: DateTime | None,
+    ) -> int:
+        # every partition runs in its own task, with its own sessions
+        set_session_provider(self.session_provider_factory())
+        stream_provider = SessionProvider(self.session_factory)
+        count = 0
+        async with stream_provider:
+            batches = DomainEventRepository(stream_provider).stream_events(
+                self.event_names,
+                after_id,
+                end_id,
+                start_time,
+                end_time,
+                partition,
+                self.partition_count,
+                self.partition_key,
+                self.batch_size,
+            )
+            async for rows in batches:
+                async with session_provider:
+                    for row in rows:
+                        await self.project(DomainEvent.deserialize(row._asdict()))
+                    await ReplayCheckpointRepository(session_provider).save_checkpoint(
+                        self.name, partition, self.partition_count, rows[-1].id
+                    )
+                count += len(rows)
+                logger.info(
+                    "Replay %s partition %d until event %d", self.name, partition, rows[-1].id
+                )
+        return count
+
+    async def project(self, event: DomainEvent):
+        for projection in self.projections:
+            if isinstance(event, projection.event_types):
+                await projection.handler(event)
+
+
+async def serve(args: argparse.Namespace):
+    setup_logging()
+
+    projections = projection_registry.get_projections(args.projection)
+    replayer = EventReplayer(
+        args.name or ",".join(sorted(p.name for p in projections)),
+        projections,
+        args.partitions,
+        args.partition_key,
+        args.batch_size,
+    )
+    count = await replayer.replay(
+        args.start_id,
+        args.end_id,
+        config.convert_to_datetime(args.start_time) if args.start_time else None,
+        config.convert_to_datetime(args.end_time) if args.end_time else None,
+        args.reset,
+    )
+    logger.info("Replay %s complete, %d events", replayer.name, count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay domain events into projections")
+    parser.add_argument("--projection", action="append", help="all projections by default")
+    parser.add_argument("--name", help="name of the checkpoints, the projection names by default")
+    parser.add_argument("--start-id", type=int, default=0, help="replay the events after the id")
+    parser.add_argument("--end-id", type=int, help="the last event id, included")
+    parser.add_argument("--start-time", help="replay the events created since the time")
+    parser.add_argument("--end-time", help="replay the events created until the time")
+    parser.add_argument("--partitions", type=int, default=1)
+    parser.add_argument("--partition-key", help="body field keeping the order, e.g. an id")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--reset", action="store_true", help="rebuild from scratch")
+    asyncio.run(serve(parser.parse_args()))
@@ -6,12 +6,15 @@ from enum import Enum
 
 from pika.adapters.utils import connection_workflow
 
-from app.config import config
+from app.adapter.repository.cache import cache_invalidation_listener
+from app.bootstrap import bootstrap
+from app.config import MessageQueueBackend, config
 from app.logger import ServiceLogger, setup_logging
-from app.package_instance import message_queue_publisher
+from app.package_instance import message_queue_flusher, message_queue_publisher
 from app.port.message_queue import (
     your_exchange_handler,
 )
+from packages.message_queue.in_memory_message_queue import InMemoryConsumer
 from packages.message_queue.rabbitmq_message_queue import RabbitMqConsumer
 
 logger = ServiceLogger(__name__)
@@ -38,6 +41,7 @@ class GracefulKiller:
 
 def serve(exchange_name: str, queue_name: str, routing_key: str):
     setup_logging()
+    bootstrap()
 
     match exchange_name:
         case Exchange.YOUR_EXCHANGE.value:
@@ -46,11 +50,20 @@ def serve(exchange_name: str, queue_name: str, routing_key: str):
             logger.error("Exchange %s not found", exchange_name)
             sys.exit(1)
 
-    consumer = RabbitMqConsumer(config.amqp_url, queue_name, routing_key, exchange_name)
+    consumer: RabbitMqConsumer | InMemoryConsumer
+    match config.message_queue_backend:
+        case MessageQueueBackend.IN_MEMORY:
+            consumer = InMemoryConsumer(queue_name, routing_key, exchange_name)
+        case _:
+            consumer = RabbitMqConsumer(config.amqp_url, queue_name, routing_key, exchange_name)
     consumer.logger = ServiceLogger(consumer.logger.name)
+    # the handlers run their own event loops, the listener runs in a thread
+    cache_invalidation_listener.start_thread()
     consumer.start_consume(external_handler)
     if message_queue_publisher.messages:
-        message_queue_publisher.publish_messages()
+        message_queue_publisher.publish_messages(sync=True)
+    if message_queue_flusher:
+        message_queue_flusher.close(timeout=SHUTDOWN_DELAY_SECONDS)
 
 
 if __name__ == "__main__":
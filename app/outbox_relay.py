@@ -0,0 +1,122 @@
+import asyncio
+import signal
+import time
+
+import pendulum
+import psycopg
+
+from app.adapter.repository.base import session_provider
+from app.adapter.repository.orm import OUTBOX_CHANNEL
+from app.adapter.repository.outbox_repository import OutboxRepository
+from app.config import config
+from app.logger import ServiceLogger, setup_logging
+from app.package_instance import create_message_queue_publisher
+from packages.message_queue import EncodedMessage, MessageQueuePublisherBase
+
+logger = ServiceLogger(__name__)
+RETRY_DELAY_SECONDS = 1
+PURGE_INTERVAL_SECONDS = 3600
+
+
+class OutboxRelay:
+    """Publishes the messages committed to the outbox table.
+
+    Woken by the notification of the outbox trigger, every batch is locked with
+    `FOR UPDATE SKIP LOCKED`, so several relays can run side by side.
+    """
+
+    def __init__(
+        self,
+        publisher: MessageQueuePublisherBase,
+        batch_size: int,
+        poll_interval_second: float,
+        retention_hours: float,
+        conninfo: str | None = None,
+    ):
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval_second = poll_interval_second
+        self.retention_hours = retention_hours
+        # the connection listening to the notifications, the database of the service by default
+        self.conninfo = conninfo or config.sqlalchemy_database_url.replace(
+            "postgresql+psycopg", "postgresql", 1
+        )
+        self.kill_now = False
+        self.next_purge_at = 0.0
+
+    def exit_gracefully(self):
+        logger.info("Stop relaying...")
+        self.kill_now = True
+
+    async def relay_batch(self) -> tuple[int, int]:
+        """Publishes one batch and marks it sent, returns the number of locked and sent rows."""
+        async with session_provider:
+            repository = OutboxRepository(session_provider)
+            rows = await repository.lock_unsent_messages(self.batch_size)
+            if not rows:
+                return 0, 0
+            messages = [
+                EncodedMessage(r.routing_key, r.body, r.content_encoding, r.trace_id) for r in rows
+            ]
+            sent = await asyncio.to_thread(self.publisher.publish_encoded_messages, messages)
+            await repository.mark_sent([r.id for r in rows[:sent]])
+        return len(rows), sent
+
+    async def relay(self):
+        while not self.kill_now:
+            locked, sent = await self.relay_batch()
+            if sent < locked:
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+            elif locked < self.batch_size:
+                return
+
+    async def purge(self):
+        if time.monotonic() < self.next_purge_at:
+            return
+        self.next_purge_at = time.monotonic() + PURGE_INTERVAL_SECONDS
+        async with session_provider:
+            count = await OutboxRepository(session_provider).delete_sent(
+                pendulum.now().subtract(hours=self.retention_hours)
+            )
+        logger.info("Purge %d sent messages", count)
+
+    async def run(self):
+        while not self.kill_now:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self.conninfo, autocommit=True
+                ) as connection:
+                    await connection.execute(f'LISTEN "{OUTBOX_CHANNEL}"')
+                    logger.info("Start relaying outbox by %s", OUTBOX_CHANNEL)
+                    while not self.kill_now:
+                        # also picks up the messages committed while not listening
+                        await self.relay()
+                        await self.purge()
+                        async for _ in connection.notifies(
+                            timeout=self.poll_interval_second, stop_after=1
+                        ):
+                            pass
+            except Exception:
+                logger.exception("Unexpected error, retrying...")
+                await asyncio.sleep(RETRY_DELAY_SECONDS)
+
+
+async def serve():
+    setup_logging()
+
+    publisher = create_message_queue_publisher()
+    publisher.logger = ServiceLogger(publisher.logger.name)
+    relay = OutboxRelay(
+        publisher,
+        config.outbox_batch_size,
+        config.outbox_poll_interval_second,
+        config.outbox_retention_hours,
+    )
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGINT, relay.exit_gracefully)
+    loop.add_signal_handler(signal.SIGTERM, relay.exit_gracefully)
+    await relay.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
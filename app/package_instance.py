@@ -2,20 +2,66 @@ from contextvars import ContextVar
 
 from werkzeug.local import LocalProxy
 
-from app.config import config
+from app.config import MessageQueueBackend, config
 from app.logger import ServiceLogger
+from packages.message_queue import ContentEncoding, MessageQueuePublisherBase
+from packages.message_queue.in_memory_message_queue import InMemoryPublisher
+from packages.message_queue.linger_flusher import LingerFlusher
 from packages.message_queue.rabbitmq_message_queue import RabbitMqPublisher
 
+
+def create_message_queue_publisher(
+    flusher: LingerFlusher | None = None,
+) -> MessageQueuePublisherBase:
+    content_encoding = (
+        ContentEncoding(config.message_queue_compression)
+        if config.message_queue_compression
+        else None
+    )
+    compress_threshold_bytes = config.message_queue_compression_threshold_bytes
+    max_message_bytes = config.message_queue_max_message_bytes or None
+    match config.message_queue_backend:
+        case MessageQueueBackend.IN_MEMORY:
+            return InMemoryPublisher(
+                config.rabbitmq_exchange_name,
+                content_encoding=content_encoding,
+                compress_threshold_bytes=compress_threshold_bytes,
+                max_message_bytes=max_message_bytes,
+                flusher=flusher,
+            )
+        case _:
+            return RabbitMqPublisher(
+                config.amqp_url,
+                config.rabbitmq_exchange_name,
+                content_encoding=content_encoding,
+                compress_threshold_bytes=compress_threshold_bytes,
+                max_message_bytes=max_message_bytes,
+                flusher=flusher,
+            )
+
+
 # global variables
+message_queue_flusher = (
+    LingerFlusher(
+        create_message_queue_publisher(),
+        linger_ms=config.message_queue_linger_ms,
+        max_batch_count=config.message_queue_max_batch_count,
+        max_batch_bytes=config.message_queue_max_batch_bytes,
+    )
+    if config.message_queue_linger_ms > 0
+    else None
+)
+if message_queue_flusher:
+    message_queue_flusher.logger = ServiceLogger(message_queue_flusher.logger.name)
 
 
 # context variables
 _message_queue_publisher = ContextVar("message_queue_publisher")
-message_queue_publisher: RabbitMqPublisher = LocalProxy(_message_queue_publisher)  # type: ignore[assignment]
+message_queue_publisher: MessageQueuePublisherBase = LocalProxy(_message_queue_publisher)  # type: ignore[assignment]
 
 
 def set_message_queue_publisher():
-    _message_queue_publisher.set(RabbitMqPublisher(config.amqp_url, config.rabbitmq_exchange_name))
+    _message_queue_publisher.set(create_message_queue_publisher(message_queue_flusher))
     message_queue_publisher.logger = ServiceLogger(message_queue_publisher.logger.name)
 
 
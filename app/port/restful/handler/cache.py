@@ -0,0 +1,9 @@
+from app.adapter.repository.cache import get_cache_stats as _get_cache_stats
+from app.port.restful.response import ApiResponse
+
+
+def get_cache_stats():
+    try:
+        return ApiResponse.success(_get_cache_stats())
+    except Exception as e:
+        return ApiResponse.error(str(e))
@@ -0,0 +1,20 @@
+from sqlalchemy.exc import NoResultFound
+
+from app.adapter.controller import domain_event_controller
+from app.adapter.controller.base import create_user
+from app.adapter.controller.domain_event.request import GetTraceRequest
+from app.port.restful.response import ApiResponse
+from app.trace import TokenInfo, get_trace_id
+
+
+async def get_trace(trace_id: str, token_info: TokenInfo, span_id: str | None = None):
+    try:
+        get_request = GetTraceRequest.create_strictly(
+            id=trace_id, span_id=span_id, doer=create_user(token_info), trace_id=get_trace_id()
+        )
+        trace = await domain_event_controller.get_trace(get_request)
+        return ApiResponse.success(trace)
+    except NoResultFound as e:
+        return ApiResponse.not_found(str(e))
+    except Exception as e:
+        return ApiResponse.error(str(e))
@@ -1,6 +1,7 @@
 from enum import Enum
 
 import pendulum
+from connexion import request
 from sqlalchemy.exc import NoResultFound
 
 from app.adapter.controller import your_aggregate_controller
@@ -9,12 +10,19 @@ from app.adapter.controller.your_bounded_context.request import (
     CreateYourAggregateRequest,
     DeleteYourAggregateRequest,
     GetYourAggregateRequest,
+    SearchOperationHistoriesRequest,
     SearchYourAggregatesRequest,
     UpdateYourAggregateRequest,
     VoidYourAggregateRequest,
 )
 from app.config import config
-from app.port.restful.response import ApiResponse, FileResponse
+from app.port.restful.response import (
+    ApiResponse,
+    FileResponse,
+    create_version_headers,
+    is_conditional,
+    is_not_modified,
+)
 from app.trace import TokenInfo, get_trace_id
 
 
@@ -23,8 +31,39 @@ async def get_your_aggregate(your_aggregate_id: str, token_info: TokenInfo):
         get_request = GetYourAggregateRequest.create_strictly(
             id=your_aggregate_id, doer=create_user(token_info), trace_id=get_trace_id()
         )
-        your_aggregate = await your_aggregate_controller.get_your_aggregate(get_request)
-        return ApiResponse.success(your_aggregate)
+        if is_conditional(request.headers):
+            # answered by the version alone if the client has it
+            version = await your_aggregate_controller.get_your_aggregate_version(get_request)
+            if is_not_modified(request.headers, version.version, version.last_modified):
+                return ApiResponse.not_modified(
+                    create_version_headers(version.version, version.last_modified)
+                )
+        # the version read with the body, the one above may be newer than it
+        your_aggregate, version = await your_aggregate_controller.get_your_aggregate_with_version(
+            get_request
+        )
+        return ApiResponse.success(
+            your_aggregate, headers=create_version_headers(version.version, version.last_modified)
+        )
+    except NoResultFound as e:
+        return ApiResponse.not_found(str(e))
+    except Exception as e:
+        return ApiResponse.error(str(e))
+
+
+async def search_operation_histories(
+    your_aggregate_id: str, token_info: TokenInfo, offset: int = 0, limit: int = 100
+):
+    try:
+        search_request = SearchOperationHistoriesRequest.create_strictly(
+            id=your_aggregate_id,
+            offset=offset,
+            limit=limit,
+            doer=create_user(token_info),
+            trace_id=get_trace_id(),
+        )
+        result = await your_aggregate_controller.search_operation_histories(search_request)
+        return ApiResponse.success(result)
     except NoResultFound as e:
         return ApiResponse.not_found(str(e))
     except Exception as e:
@@ -63,8 +102,18 @@ async def search_your_aggregates(
             doer=create_user(token_info),
             trace_id=get_trace_id(),
         )
-        result = await your_aggregate_controller.search_your_aggregates(search_request)
-        return ApiResponse.success(result)
+        if is_conditional(request.headers):
+            version = await your_aggregate_controller.get_your_aggregates_version(search_request)
+            if is_not_modified(request.headers, version.version, version.last_modified):
+                return ApiResponse.not_modified(
+                    create_version_headers(version.version, version.last_modified)
+                )
+        # the version read with the body, the one above may be newer than it
+        search = your_aggregate_controller.search_your_aggregates_json_with_version
+        result, version = await search(search_request)
+        return ApiResponse.success(
+            result, headers=create_version_headers(version.version, version.last_modified)
+        )
     except Exception as e:
         return ApiResponse.error(str(e))
 
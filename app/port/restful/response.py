@@ -1,12 +1,16 @@
+from collections.abc import Mapping
 from dataclasses import dataclass, is_dataclass
+from datetime import UTC
+from email.utils import format_datetime, parsedate_to_datetime
 from io import BytesIO
 from typing import Any
 
 import orjson
-from dataclass_mixins import to_camel_case_json
-from starlette.responses import JSONResponse, StreamingResponse
+from pendulum.datetime import DateTime
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
 from app.trace import get_trace_id
+from packages.dataclass_codec import compile_encoder
 
 
 @dataclass
@@ -21,7 +25,9 @@ class DefaultResponse(JSONResponse):
             if isinstance(value, list):
                 return [convert(v) for v in value]
             if is_dataclass(value):
-                return to_camel_case_json(value)
+                # the camelCase encoder of a response type is compiled on first use
+                return compile_encoder(type(value))(value)
+            # orjson.Fragment, e.g. JSON built by the database, is written as is
             return value
 
         return orjson.dumps(
@@ -33,7 +39,51 @@ class DefaultResponse(JSONResponse):
         )
 
 
+def to_http_date(value: DateTime) -> DateTime:
+    """Truncates the time to the whole seconds of the HTTP dates."""
+    return value.replace(microsecond=0).astimezone(UTC)
+
+
+def create_version_headers(version: str, last_modified: DateTime | None) -> dict[str, str]:
+    # weak, the bodies of a version differ by their trace ids
+    headers = {"ETag": f'W/"{version}"', "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(to_http_date(last_modified), usegmt=True)
+    return headers
+
+
+def is_conditional(request_headers: Mapping[str, str]) -> bool:
+    """Whether the request may be answered by a version, without loading the body."""
+    return "if-none-match" in request_headers or "if-modified-since" in request_headers
+
+
+def is_not_modified(
+    request_headers: Mapping[str, str], version: str, last_modified: DateTime | None
+) -> bool:
+    """Whether the version matches `If-None-Match`, or `If-Modified-Since` without it."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        etags = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+        return f'"{version}"' in etags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        modified_since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # as sent in `Last-Modified`, a change later in the same second is only seen by the ETag
+    return modified_since.tzinfo is not None and to_http_date(last_modified) <= modified_since
+
+
 class ResponseMixin:
+    @staticmethod
+    def not_modified(headers: dict[str, str] | None = None) -> Response:
+        return Response(status_code=304, headers=headers)
+
     @staticmethod
     def accepted(detail: Any = "Accepted") -> DefaultResponse:
         return DefaultResponse(DefaultContent("Accepted", detail), status_code=202)
@@ -61,8 +111,12 @@ class ResponseMixin:
 
 class ApiResponse(ResponseMixin):
     @staticmethod
-    def success(detail: Any = None, status_code: int = 200) -> DefaultResponse:
-        return DefaultResponse(DefaultContent("OK", detail), status_code=status_code)
+    def success(
+        detail: Any = None, status_code: int = 200, headers: dict[str, str] | None = None
+    ) -> DefaultResponse:
+        return DefaultResponse(
+            DefaultContent("OK", detail), status_code=status_code, headers=headers
+        )
 
 
 class FileResponse(ResponseMixin):
@@ -1,8 +1,20 @@
+import orjson
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.config import config
 
+
+def json_serializer(value) -> bytes:
+    # psycopg accepts bytes, JSON/JSONB values skip the str round trip of json.dumps
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+
 engine = create_async_engine(
-    config.sqlalchemy_database_url, pool_pre_ping=True, pool_recycle=600, pool_size=50
+    config.sqlalchemy_database_url,
+    pool_pre_ping=True,
+    pool_recycle=600,
+    pool_size=50,
+    json_serializer=json_serializer,
+    json_deserializer=orjson.loads,
 )
 DB_Session = async_sessionmaker(bind=engine, autoflush=False, autocommit=False)
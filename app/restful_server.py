@@ -1,4 +1,5 @@
 import os
+from contextlib import asynccontextmanager
 from copy import deepcopy
 from pathlib import Path
 
@@ -10,7 +11,10 @@ from connexion.options import SwaggerUIOptions
 from prance import ResolvingParser
 from starlette.middleware.cors import CORSMiddleware
 
+from app.adapter.repository.cache import cache_invalidation_listener
+from app.bootstrap import bootstrap
 from app.config import config
+from app.core.ddd_base import event_bus
 from app.logger import ServiceLogger, setup_logging
 from app.middleware import LoggingMiddleware
 from app.port.restful.response import ApiResponse, DefaultContent, DefaultResponse
@@ -50,6 +54,20 @@ def render_problem_exception(request: ConnexionRequest, ex: Exception) -> Connex
     return ConnexionResponse(resp.status_code, resp.media_type, resp.media_type, resp.body)
 
 
+@asynccontextmanager
+async def lifespan(app):
+    bootstrap()
+    # background event handlers run by the event loop of the worker, drained on shutdown
+    if event_bus.worker_pool:
+        event_bus.worker_pool.start()
+    # evicts the cached aggregates written by the other workers and processes
+    cache_invalidation_listener.start()
+    yield
+    await cache_invalidation_listener.stop()
+    if event_bus.worker_pool:
+        await event_bus.worker_pool.stop(config.event_worker_drain_timeout_second)
+
+
 def serve():
     setup_logging()
 
@@ -72,6 +90,7 @@ def serve():
         __name__,
         specification_dir=openapi_spec_dir,
         swagger_ui_options=swagger_ui_options,
+        lifespan=lifespan,
     )
 
     root = Path(openapi_spec_dir + "/api.yml")
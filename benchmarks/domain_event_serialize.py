@@ -0,0 +1,92 @@
+"""Per-event cost of the reflective DomainEvent serialization against the precompiled encoder.
+
+usage: python benchmarks/domain_event_serialize.py [--events 20000] [--histories 10]
+"""
+
+import argparse
+import dataclasses
+import enum
+import time
+from dataclasses import dataclass
+
+import pendulum
+from pendulum.datetime import DateTime
+
+from app.core.ddd_base import DomainEvent, User
+from app.core.your_bounded_context.domain.value_object.your_aggregate_value_object import (
+    OperationHistory,
+    OperationHistoryData,
+    OperationHistoryType,
+    YourAggregateStatus,
+    YourValueObject,
+)
+
+
+@dataclass(frozen=True)
+class BenchmarkEvent(DomainEvent):
+    your_aggregate_id: str
+    your_value_object: YourValueObject
+    status: YourAggregateStatus
+    operation_histories: list[OperationHistory]
+    doer: User
+
+
+def reflective_body(target):
+    """The previous path: deep copy by `dataclasses.asdict`, then convert every value."""
+
+    def convert(v):
+        if isinstance(v, dict):
+            return {k: convert(i) for k, i in v.items()}
+        if isinstance(v, (list, set)):
+            return [convert(i) for i in v]
+        if isinstance(v, enum.Enum):
+            return v.value
+        if isinstance(v, DateTime):
+            return v.isoformat()
+        return v
+
+    return convert(dataclasses.asdict(target))
+
+
+def create_event(histories: int) -> BenchmarkEvent:
+    doer = User(id="user-id", organization_id="organization-id", name="user")
+    return BenchmarkEvent(
+        "your-aggregate-id",
+        YourValueObject("a", 1),
+        YourAggregateStatus.VOIDED,
+        [
+            OperationHistory(
+                OperationHistoryType.UPDATED,
+                [OperationHistoryData("property_a", "a", "b")],
+                doer,
+                pendulum.now(),
+            )
+            for _ in range(histories)
+        ],
+        doer,
+    )
+
+
+def measure(func, events: int) -> float:
+    started = time.perf_counter()
+    for _ in range(events):
+        func()
+    return (time.perf_counter() - started) / events
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--histories", type=int, default=10)
+    args = parser.parse_args()
+
+    event = create_event(args.histories)
+    assert reflective_body(event) == event.serialize()["body"]
+
+    reflective = measure(lambda: reflective_body(event), args.events)
+    compiled = measure(event.serialize, args.events)
+    print(
+        f"serialize reflective {reflective * 1e6:>9.2f} us"
+        f"  compiled {compiled * 1e6:>9.2f} us"
+        f"  speedup {reflective / compiled:>6.2f}x"
+    )
@@ -0,0 +1,58 @@
+"""Insert rate, primary key index size and WAL volume of UUID4 against UUID7 ids,
+on the configured database. The benchmark tables are dropped afterwards.
+
+usage: python benchmarks/id_insert_throughput.py [--rows 200000] [--batch 1000]
+"""
+
+import argparse
+import time
+import uuid
+
+import psycopg
+
+from app.config import config
+from app.core.ddd_base import IdVersion
+from app.core.ddd_base.identifier import IdGenerator
+
+
+def bench_insert(connection: psycopg.Connection, id_version: IdVersion, rows: int, batch: int):
+    generator = IdGenerator(id_version)
+    table = f"id_benchmark_{id_version.value.lower()}"
+    connection.execute(f"DROP TABLE IF EXISTS {table}")
+    connection.execute(f"CREATE TABLE {table} (id uuid PRIMARY KEY, body jsonb NOT NULL)")
+    try:
+        (wal_start,) = connection.execute("SELECT pg_current_wal_lsn()").fetchone()
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            for _ in range(0, rows, batch):
+                cursor.executemany(
+                    f"INSERT INTO {table} (id, body) VALUES (%s, '{{}}')",
+                    [(uuid.UUID(generator.generate()),) for _ in range(batch)],
+                )
+        elapsed = time.perf_counter() - started
+
+        index_bytes, wal_bytes = connection.execute(
+            f"SELECT pg_relation_size('{table}_pkey'), "
+            "pg_wal_lsn_diff(pg_current_wal_lsn(), %s::pg_lsn)",
+            (wal_start,),
+        ).fetchone()
+    finally:
+        connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+    print(
+        f"{id_version.value:<6} {rows / elapsed:>10.0f} rows/s"
+        f"  pkey {index_bytes / 1024 / 1024:>8.1f} MiB"
+        f"  wal {float(wal_bytes) / 1024 / 1024:>8.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    conninfo = config.sqlalchemy_database_url.replace("postgresql+psycopg", "postgresql", 1)
+    with psycopg.connect(conninfo, autocommit=True) as connection:
+        for id_version in IdVersion:
+            bench_insert(connection, id_version, args.rows, args.batch)
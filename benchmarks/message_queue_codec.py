@@ -0,0 +1,58 @@
+"""Per-message cost of the reflective json path against the precompiled orjson codec.
+
+usage: python benchmarks/message_queue_codec.py [--messages 20000] [--items 10]
+"""
+
+import argparse
+import json
+import time
+
+import pendulum
+
+from packages.message_queue.message_queue import QueueMessage
+from packages.message_queue.type import YourAggregateServiceFuntion, YourAggregateVoided
+
+
+def create_message(items: int) -> QueueMessage:
+    return QueueMessage(
+        "trace-id",
+        YourAggregateServiceFuntion.YOUR_AGGREGATE_VOIDED,
+        [YourAggregateVoided(f"your-aggregate-{i}") for i in range(items)],
+        started=pendulum.now(),
+    )
+
+
+def measure(func, messages: int) -> float:
+    started = time.perf_counter()
+    for _ in range(messages):
+        func()
+    return (time.perf_counter() - started) / messages
+
+
+def report(name: str, reflective: float, compiled: float):
+    print(
+        f"{name:<8} reflective {reflective * 1e6:>9.2f} us"
+        f"  compiled {compiled * 1e6:>9.2f} us"
+        f"  speedup {reflective / compiled:>6.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=10)
+    args = parser.parse_args()
+
+    message = create_message(args.items)
+    body = message.encode()
+
+    report(
+        "encode",
+        measure(lambda: json.dumps(message.to_camel_case_json()), args.messages),
+        measure(message.encode, args.messages),
+    )
+    report(
+        "decode",
+        measure(lambda: QueueMessage.create_from_camel_case_json(json.loads(body)), args.messages),
+        measure(lambda: QueueMessage.decode(body), args.messages),
+    )
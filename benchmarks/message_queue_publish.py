@@ -0,0 +1,88 @@
+"""Throughput and latency of the publish path and of the queue handlers, without a broker.
+
+usage: python benchmarks/message_queue_publish.py [--messages 10000] [--batch 100]
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+from app.port.message_queue import your_exchange_handler
+from packages.message_queue.in_memory_message_queue import (
+    InMemoryBroker,
+    InMemoryConsumer,
+    InMemoryPublisher,
+)
+from packages.message_queue.message_queue import QueueMessage
+
+EXCHANGE = "benchmark-exchange"
+ROUTING_KEY = "benchmark-service"
+
+
+def percentile(samples: list[float], p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def report(name: str, count: int, elapsed: float, latencies: list[float] | None = None):
+    line = f"{name:<32} {count / elapsed:>12.0f} msg/s"
+    if latencies:
+        line += (
+            f"  p50 {statistics.median(latencies) * 1e6:>9.1f} us"
+            f"  p99 {percentile(latencies, 0.99) * 1e6:>9.1f} us"
+        )
+    print(line)
+
+
+def bench_publish(messages: int, batch: int):
+    broker = InMemoryBroker()
+    broker.queue_bind("sink", EXCHANGE, "#")
+    publisher = InMemoryPublisher(EXCHANGE, broker=broker)
+
+    latencies = []
+    started = time.perf_counter()
+    for i in range(0, messages, batch):
+        t = time.perf_counter()
+        for j in range(batch):
+            publisher.push_message(
+                ROUTING_KEY,
+                QueueMessage(f"trace-{i + j}", "example", [{"customer_name": "name"}]),
+            )
+        publisher.publish_messages()
+        latencies.append((time.perf_counter() - t) / batch)
+    report("publish (push + flush)", messages, time.perf_counter() - started, latencies)
+
+
+def bench_consume(messages: int):
+    broker = InMemoryBroker()
+    consumer = InMemoryConsumer("benchmark-queue", "#", EXCHANGE, broker=broker)
+    publisher = InMemoryPublisher(EXCHANGE, broker=broker)
+    for i in range(messages):
+        publisher.push_message(
+            ROUTING_KEY,
+            QueueMessage(f"trace-{i}", "example", [{"customer_name": "name"}]),
+        )
+    publisher.publish_messages()
+
+    latencies = []
+
+    def handler(message: QueueMessage):
+        t = time.perf_counter()
+        your_exchange_handler(message)
+        latencies.append(time.perf_counter() - t)
+
+    started = time.perf_counter()
+    count = consumer.consume_pending(handler)
+    report("consume (decode + handler)", count, time.perf_counter() - started, latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--batch", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    bench_publish(args.messages, args.batch)
+    bench_consume(args.messages)
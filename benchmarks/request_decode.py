@@ -0,0 +1,65 @@
+"""Decode time of a command body by `create_from_camel_case_json` against the compiled decoders
+used by `RequestBase.create_from_body`.
+
+usage: python benchmarks/request_decode.py [--items 5000] [--rounds 20]
+"""
+
+import argparse
+import statistics
+import time
+
+from app.adapter.controller.your_bounded_context.request import UpdateYourAggregateRequest
+from app.trace import TokenInfo, TokenOrganization, TokenUser
+
+TOKEN_INFO = TokenInfo(
+    "iss",
+    "sub",
+    "aud",
+    0,
+    0,
+    0,
+    TokenUser("user-id", None, "user", None),
+    TokenOrganization("organization-id", "organization"),
+    "raw-token",
+)
+
+
+def reflective_decode(payload: list[dict]) -> list[UpdateYourAggregateRequest]:
+    """The previous path of `RequestBase.create_from_body`."""
+    return [UpdateYourAggregateRequest.create_from_camel_case_json(p) for p in payload]
+
+
+def compiled_decode(payload: list[dict]) -> list[UpdateYourAggregateRequest]:
+    return [UpdateYourAggregateRequest.create_from_body(p, TOKEN_INFO, None) for p in payload]
+
+
+def measure(func, rounds: int) -> float:
+    latencies = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = [
+        {"id": f"your-aggregate-{i}", "yourValueObject": {"propertyA": "a", "propertyB": i}}
+        for i in range(args.items)
+    ]
+    assert [r.your_value_object for r in reflective_decode(payload)] == [
+        r.your_value_object for r in compiled_decode(payload)
+    ]
+
+    reflective = measure(lambda: reflective_decode(payload), args.rounds)
+    compiled = measure(lambda: compiled_decode(payload), args.rounds)
+    print(
+        f"decode reflective {reflective * 1e3:>9.2f} ms"
+        f"  compiled {compiled * 1e3:>9.2f} ms"
+        f"  speedup {reflective / compiled:>6.2f}x"
+    )
@@ -0,0 +1,93 @@
+"""Render time of a search response by `to_camel_case_json` against the compiled encoders
+used by `DefaultResponse`.
+
+usage: python benchmarks/response_render.py [--results 1000] [--histories 5] [--rounds 20]
+"""
+
+import argparse
+import statistics
+import time
+
+import orjson
+import pendulum
+from dataclass_mixins import to_camel_case_json
+
+from app.adapter.controller.base import OrganizationResponse, UserResponse
+from app.adapter.controller.your_bounded_context.response import (
+    OperationHistoryDataResponse,
+    OperationHistoryResponse,
+    SearchYourAggregatesResponse,
+    YourAggregateResponse,
+)
+from app.core.your_bounded_context.domain.value_object.your_aggregate_value_object import (
+    OperationHistoryType,
+    YourAggregateStatus,
+    YourValueObject,
+)
+from app.port.restful.response import ApiResponse
+
+
+def create_response(results: int, histories: int) -> SearchYourAggregatesResponse:
+    user = UserResponse(
+        "user-id", OrganizationResponse("organization-id", None), "user", None, None
+    )
+    now = pendulum.now()
+    return SearchYourAggregatesResponse(
+        results,
+        [
+            YourAggregateResponse(
+                f"your-aggregate-{i}",
+                YourValueObject("a", i),
+                YourAggregateStatus.CREATED,
+                [
+                    OperationHistoryResponse(
+                        OperationHistoryType.UPDATED,
+                        [OperationHistoryDataResponse("propertyA", "a", "b")],
+                        user,
+                        now,
+                    )
+                    for _ in range(histories)
+                ],
+                user,
+                now,
+                None,
+            )
+            for i in range(results)
+        ],
+    )
+
+
+def reflective_render(response: SearchYourAggregatesResponse) -> bytes:
+    """The previous path of `DefaultResponse.render`."""
+    return orjson.dumps({"code": "OK", "traceId": None, "data": to_camel_case_json(response)})
+
+
+def measure(func, rounds: int) -> float:
+    latencies = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results", type=int, default=1000)
+    parser.add_argument("--histories", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    response = create_response(args.results, args.histories)
+    assert (
+        orjson.loads(reflective_render(response))["data"]
+        == orjson.loads(ApiResponse.success(response).body)["data"]
+    )
+
+    reflective = measure(lambda: reflective_render(response), args.rounds)
+    compiled = measure(lambda: ApiResponse.success(response), args.rounds)
+    print(
+        f"render reflective {reflective * 1e3:>9.2f} ms"
+        f"  compiled {compiled * 1e3:>9.2f} ms"
+        f"  speedup {reflective / compiled:>6.2f}x"
+    )
@@ -0,0 +1,104 @@
+"""Latency of the search response built from entities against the JSON built by Postgres,
+rendered by `DefaultResponse`, on the configured database. The seeded rows are deleted afterwards.
+
+usage: python benchmarks/search_json.py [--rows 2000] [--rounds 200]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import orjson
+import sqlalchemy as sa
+
+from app.adapter.controller.your_bounded_context.response import SearchYourAggregatesResponse
+from app.adapter.repository.base import session_provider
+from app.adapter.repository.orm import YourAggregateModel
+from app.adapter.repository.your_aggregate_repository import YourAggregateRepository
+from app.port.restful.response import ApiResponse
+
+CREATOR_ID = "search-benchmark"
+LIMITS = [100, 1000]
+
+
+def percentile(samples: list[float], p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def report(name: str, limit: int, latencies: list[float], size: int):
+    print(
+        f"{name:<8} limit {limit:>5}"
+        f"  p50 {statistics.median(latencies) * 1e3:>8.2f} ms"
+        f"  p99 {percentile(latencies, 0.99) * 1e3:>8.2f} ms"
+        f"  {size / 1024:>8.1f} KiB"
+    )
+
+
+async def seed(rows: int):
+    async with session_provider:
+        session_provider.session.add_all(
+            YourAggregateModel(
+                id=str(uuid.uuid4()),
+                your_value_object={"property_a": f"value{i}", "property_b": i},
+                status="created",
+                creator={"id": CREATOR_ID, "organization_id": "org", "name": "benchmark"},
+            )
+            for i in range(rows)
+        )
+
+
+async def clean():
+    async with session_provider:
+        await session_provider.session.execute(
+            sa.delete(YourAggregateModel).where(
+                YourAggregateModel.creator["id"].astext == CREATOR_ID
+            )
+        )
+
+
+async def bench_entities(limit: int, rounds: int):
+    latencies = []
+    for _ in range(rounds):
+        t = time.perf_counter()
+        async with session_provider:
+            result = await YourAggregateRepository(session_provider).search_your_aggregates(
+                limit=limit
+            )
+        body = ApiResponse.success(SearchYourAggregatesResponse.create_from_object(result)).body
+        latencies.append(time.perf_counter() - t)
+    report("entities", limit, latencies, len(body))
+
+
+async def bench_json(limit: int, rounds: int):
+    latencies = []
+    for _ in range(rounds):
+        t = time.perf_counter()
+        async with session_provider:
+            document = await YourAggregateRepository(session_provider).search_your_aggregates_json(
+                limit=limit
+            )
+        body = ApiResponse.success(orjson.Fragment(document)).body
+        latencies.append(time.perf_counter() - t)
+    report("json", limit, latencies, len(body))
+
+
+async def main(rows: int, rounds: int):
+    await seed(rows)
+    try:
+        for limit in LIMITS:
+            await bench_entities(limit, rounds)
+            await bench_json(limit, rounds)
+    finally:
+        await clean()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.rounds))
@@ -32,6 +32,7 @@ def init():
         "app/port/restful/openapi/paths/health.yml",
         "app/port/restful/response.py",
         "app/port/storage",
+        "app/bootstrap.py",
         "app/config.py",
         "app/logger.py",
         "app/package_instance.py",
@@ -132,13 +133,6 @@ def init():
             ]
         )
 
-    with open(cwd.joinpath("app/adapter/__init__.py"), "w") as f:
-        f.writelines(
-            [
-                "import app.adapter.event_handler\n",
-            ]
-        )
-
 
 def add(name: str):
     def snake_to_pascal_case(s: str):
@@ -2,7 +2,8 @@
 
 import os
 
-from app.package_instance import message_queue_publisher
+from app.core.ddd_base import event_bus
+from app.package_instance import message_queue_flusher, message_queue_publisher
 
 wsgi_app = "app.restful_server:serve()"
 worker_class = "uvicorn_worker.UvicornWorker"
@@ -18,11 +19,24 @@ def post_worker_init(worker):
     pass
 
 
-def worker_exit(server, worker):
+def flush_message_queue():
     if message_queue_publisher.messages:
-        message_queue_publisher.publish_messages()
+        message_queue_publisher.publish_messages(sync=True)
+    if message_queue_flusher:
+        message_queue_flusher.close(timeout=float(timeout) / 2)
+
+
+def worker_exit(server, worker):
+    # the event worker pool is drained on the lifespan shutdown, before the event loop is closed
+    pool = event_bus.worker_pool
+    if pool and (pool.pending_count or pool.dropped_count):
+        server.log.warning(
+            "event worker pool: %d handlers not run, %d dropped",
+            pool.pending_count,
+            pool.dropped_count,
+        )
+    flush_message_queue()
 
 
 def on_exit(server):
-    if message_queue_publisher.messages:
-        message_queue_publisher.publish_messages()
+    flush_message_queue()
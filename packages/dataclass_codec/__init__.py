@@ -0,0 +1,19 @@
+from .dataclass_codec import (
+    DecodeError,
+    compile_decoder,
+    compile_encoder,
+    encode_value,
+    snake_case_keys,
+    to_camel_case,
+    to_snake_case,
+)
+
+__all__ = [
+    "DecodeError",
+    "compile_decoder",
+    "compile_encoder",
+    "encode_value",
+    "snake_case_keys",
+    "to_camel_case",
+    "to_snake_case",
+]
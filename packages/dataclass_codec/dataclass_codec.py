@@ -0,0 +1,296 @@
+import dataclasses
+import functools
+import types
+import typing
+from collections.abc import Callable
+from enum import Enum
+from typing import Any
+
+import pendulum
+from dataclass_mixins import camel_to_snake_case, snake_to_camel_case
+from pendulum.datetime import DateTime
+
+Converter = Callable[[Any], Any]
+
+
+class DecodeError(ValueError):
+    """A json value the compiled decoder of a dataclass can not convert."""
+
+
+_encoders: dict[tuple[type, bool, bool], Converter] = {}
+_decoders: dict[tuple[type, bool, bool], Converter] = {}
+
+
+@functools.cache
+def to_camel_case(name: str) -> str:
+    return snake_to_camel_case(name)
+
+
+@functools.cache
+def to_snake_case(name: str) -> str:
+    return camel_to_snake_case(name)
+
+
+def _identity(value):
+    return value
+
+
+def _type_hints(dc_type: type) -> dict[str, Any]:
+    try:
+        return typing.get_type_hints(dc_type)
+    except Exception:
+        return {f.name: f.type for f in dataclasses.fields(dc_type)}
+
+
+def _unwrap_optional(tp):
+    """Returns `X` of `X | None`, other types are returned as is."""
+    if typing.get_origin(tp) in (typing.Union, types.UnionType):
+        args = [a for a in typing.get_args(tp) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return tp
+
+
+# ------------------------------------------
+# Encode: dataclass -> json-ready dict
+# ------------------------------------------
+def encode_value(value, camel_case: bool = True, iso_datetime: bool = False):
+    """Converts any value the same way `to_camel_case_json`/`serialize` does, by runtime type."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, DateTime):
+        return value.isoformat() if iso_datetime else value.timestamp()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return compile_encoder(type(value), camel_case, iso_datetime)(value)
+    if isinstance(value, dict):
+        convert_key = to_camel_case if camel_case else _identity
+        return {
+            convert_key(k) if isinstance(k, str) else k: encode_value(v, camel_case, iso_datetime)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple, set)):
+        return [encode_value(v, camel_case, iso_datetime) for v in value]
+    return value
+
+
+def _encode_enum(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def _encode_datetime(value):
+    return value.timestamp() if isinstance(value, DateTime) else value
+
+
+def _encode_iso_datetime(value):
+    return value.isoformat() if isinstance(value, DateTime) else value
+
+
+def _field_encoder(tp, camel_case: bool, iso_datetime: bool) -> Converter:
+    tp = _unwrap_optional(tp)
+    if tp in (str, int, float, bool, type(None)):
+        return _identity
+    if isinstance(tp, type) and issubclass(tp, (Enum, DateTime)):
+        encode_datetime = _encode_iso_datetime if iso_datetime else _encode_datetime
+        return _encode_enum if issubclass(tp, Enum) else encode_datetime
+    if isinstance(tp, type) and dataclasses.is_dataclass(tp):
+        nested = _lazy_encoder(tp, camel_case, iso_datetime)
+        return lambda v: None if v is None else nested(v)
+    if typing.get_origin(tp) is list:
+        (item_type,) = typing.get_args(tp) or (Any,)
+        item = _field_encoder(item_type, camel_case, iso_datetime)
+        if item is _identity:
+            return lambda v: None if v is None else list(v)
+        return lambda v: None if v is None else [item(i) for i in v]
+    return functools.partial(encode_value, camel_case=camel_case, iso_datetime=iso_datetime)
+
+
+def _lazy_encoder(dc_type: type, camel_case: bool, iso_datetime: bool) -> Converter:
+    # resolved on first call so self-referencing dataclasses can be compiled
+    def encode(value):
+        return compile_encoder(dc_type, camel_case, iso_datetime)(value)
+
+    return encode
+
+
+def compile_encoder(
+    dc_type: type, camel_case: bool = True, iso_datetime: bool = False
+) -> Converter:
+    """
+    Returns a cached function that converts a dataclass instance into a json-ready dict.
+
+    Field names and per-field converters are resolved once per dataclass type,
+    enums become their values and pendulum DateTimes become timestamps.
+
+    :param dc_type: The type of the dataclass.
+
+    :param camel_case: Output camelCase keys, like `to_camel_case_json`, otherwise snake_case keys.
+
+    :param iso_datetime: Output pendulum DateTimes as ISO 8601 strings instead of timestamps.
+
+    :return: The encoder function.
+    """
+    key = (dc_type, camel_case, iso_datetime)
+    encoder = _encoders.get(key)
+    if encoder:
+        return encoder
+
+    hints = _type_hints(dc_type)
+    plan = [
+        (
+            f.name,
+            to_camel_case(f.name) if camel_case else f.name,
+            _field_encoder(hints.get(f.name, Any), camel_case, iso_datetime),
+        )
+        for f in dataclasses.fields(dc_type)
+    ]
+
+    def encoder(obj) -> dict:
+        return {key: convert(getattr(obj, name)) for name, key, convert in plan}
+
+    _encoders[key] = encoder
+    return encoder
+
+
+# ------------------------------------------
+# Decode: json dict -> dataclass
+# ------------------------------------------
+def snake_case_keys(value):
+    """Converts every dict key of untyped json data into snake_case, recursively."""
+    if isinstance(value, dict):
+        return {
+            to_snake_case(k) if isinstance(k, str) else k: snake_case_keys(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [snake_case_keys(v) for v in value]
+    return value
+
+
+def _decode_datetime(value):
+    if value is None or isinstance(value, DateTime):
+        return value
+    if isinstance(value, (int, float)):
+        return pendulum.from_timestamp(value)
+    d = pendulum.parse(value)
+    if not isinstance(d, DateTime):
+        raise ValueError(f"Expected DateTime, got {type(d)}, {d}")
+    return d
+
+
+# the json types accepted by the primitive fields of strict decoders, bool is not a number
+_PRIMITIVE_TYPES: dict[type, tuple[type, ...]] = {
+    str: (str,),
+    int: (int,),
+    float: (int, float),
+    bool: (bool,),
+}
+
+
+def _primitive_checker(tp: type) -> Converter:
+    accepted = _PRIMITIVE_TYPES[tp]
+
+    def check(value):
+        if value is None:
+            return None
+        if not isinstance(value, accepted) or (tp is not bool and isinstance(value, bool)):
+            raise TypeError(f"Expected {tp.__name__}, got {type(value).__name__}, {value!r}")
+        return value
+
+    return check
+
+
+def _field_decoder(tp, camel_case: bool, strict: bool) -> Converter:
+    tp = _unwrap_optional(tp)
+    if strict and tp in _PRIMITIVE_TYPES:
+        return _primitive_checker(tp)
+    if tp in (str, int, float, bool, type(None), Any):
+        return _identity
+    decoder: Converter | None = None
+    if isinstance(tp, type):
+        if issubclass(tp, Enum):
+            decoder = tp
+        elif issubclass(tp, DateTime):
+            return _decode_datetime
+        elif dataclasses.is_dataclass(tp):
+            decoder = _lazy_decoder(tp, camel_case, strict)
+    elif typing.get_origin(tp) is list:
+        (item_type,) = typing.get_args(tp) or (Any,)
+        item = _field_decoder(item_type, camel_case, strict)
+        if item is _identity:
+            decoder = snake_case_keys if camel_case else list
+        else:
+
+            def decoder(v):
+                if strict and not isinstance(v, list):
+                    raise TypeError(f"Expected list, got {type(v).__name__}, {v!r}")
+                return [item(i) for i in v]
+
+    if decoder is None:
+        # unions of several types, dicts and untyped data keep their json shape
+        return snake_case_keys if camel_case else _identity
+
+    def decode(value):
+        if value is None:
+            return None
+        if isinstance(tp, type) and isinstance(value, tp):
+            return value
+        return decoder(value)
+
+    return decode
+
+
+def _lazy_decoder(dc_type: type, camel_case: bool, strict: bool) -> Converter:
+    def decode(value):
+        return compile_decoder(dc_type, camel_case, strict)(value)
+
+    return decode
+
+
+def compile_decoder(dc_type: type, camel_case: bool = True, strict: bool = False) -> Converter:
+    """
+    Returns a cached function that builds a dataclass instance from a json dict.
+
+    Unknown keys are ignored, missing fields use their default or None,
+    untyped data (dict, Any, unions) is returned as is with snake_case keys.
+
+    :param dc_type: The type of the dataclass.
+
+    :param camel_case: Input keys are camelCase, like `create_from_camel_case_json`, otherwise snake_case.
+
+    :param strict: Reject str/int/float/bool fields of other json types,
+        other fields are not checked. Off for the data encoded by this service itself.
+
+    :return: The decoder function, it raises `DecodeError` for the values it can not convert.
+    """
+    key = (dc_type, camel_case, strict)
+    decoder = _decoders.get(key)
+    if decoder:
+        return decoder
+
+    hints = _type_hints(dc_type)
+    plan: dict[str, Converter] = {}
+    defaults = {}
+    for f in dataclasses.fields(dc_type):
+        if not f.init:
+            continue
+        plan[f.name] = _field_decoder(hints.get(f.name, Any), camel_case, strict)
+        if f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING:
+            defaults[f.name] = None
+    convert_key = to_snake_case if camel_case else _identity
+
+    def decoder(data: dict):
+        if not isinstance(data, dict):
+            raise DecodeError(f"Expected an object for {dc_type.__name__}, got {data!r}")
+        kwargs = dict(defaults)
+        for k, v in data.items():
+            name = convert_key(k)
+            convert = plan.get(name)
+            if convert:
+                try:
+                    kwargs[name] = convert(v)
+                except (TypeError, ValueError) as e:
+                    raise DecodeError(f"{dc_type.__name__}.{name}: {e}") from e
+        return dc_type(**kwargs)
+
+    _decoders[key] = decoder
+    return decoder
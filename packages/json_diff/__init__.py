@@ -0,0 +1,3 @@
+from .json_diff import diff, patch
+
+__all__ = ["diff", "patch"]
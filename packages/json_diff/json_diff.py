@@ -0,0 +1,52 @@
+"""Deltas between JSON documents, compact for documents that grow by appending to lists.
+
+A delta is a JSON object with one of the operations:
+- `{"$replace": value}`: the new value.
+- `{"$append": [...]}`: the items appended to a list.
+- `{"$patch": {key: delta}, "$remove": [key, ...]}`: the changed and removed keys of an object.
+"""
+
+import copy
+from typing import Any
+
+_MISSING = object()
+
+
+def diff(old: Any, new: Any) -> dict | None:
+    """Returns the delta from `old` to `new`, None if they are equal."""
+    if type(old) is type(new) and old == new:
+        return None
+    if isinstance(old, dict) and isinstance(new, dict):
+        delta: dict[str, Any] = {}
+        patches = {}
+        for key, value in new.items():
+            old_value = old.get(key, _MISSING)
+            if old_value is _MISSING:
+                patches[key] = {"$replace": value}
+            elif (d := diff(old_value, value)) is not None:
+                patches[key] = d
+        if patches:
+            delta["$patch"] = patches
+        removed = [key for key in old if key not in new]
+        if removed:
+            delta["$remove"] = removed
+        return delta
+    if isinstance(old, list) and isinstance(new, list) and new[: len(old)] == old:
+        return {"$append": new[len(old) :]}
+    return {"$replace": new}
+
+
+def patch(old: Any, delta: dict | None) -> Any:
+    """Returns `old` with the delta of `diff` applied, `old` is not modified."""
+    if delta is None:
+        return old
+    if "$replace" in delta:
+        return copy.deepcopy(delta["$replace"])
+    if "$append" in delta:
+        return [*old, *copy.deepcopy(delta["$append"])]
+    result = dict(old)
+    for key in delta.get("$remove", ()):
+        result.pop(key, None)
+    for key, value_delta in delta.get("$patch", {}).items():
+        result[key] = patch(result.get(key), value_delta)
+    return result
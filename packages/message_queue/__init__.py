@@ -1,6 +1,9 @@
+from .compression import ContentEncoding
 from .message_queue import (
+    EncodedMessage,
     MessageQueueConnection,
     MessageQueueConsumerInterface,
+    MessageQueuePublisherBase,
     MessageQueuePublisherInterface,
     OperationType,
     QueueHandler,
@@ -8,8 +11,11 @@ from .message_queue import (
 )
 
 __all__ = [
+    "ContentEncoding",
+    "EncodedMessage",
     "MessageQueueConnection",
     "MessageQueueConsumerInterface",
+    "MessageQueuePublisherBase",
     "MessageQueuePublisherInterface",
     "OperationType",
     "QueueHandler",
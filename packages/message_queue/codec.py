@@ -0,0 +1,31 @@
+from typing import Any
+
+import orjson
+
+from packages.dataclass_codec import compile_decoder, compile_encoder
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+
+def loads(body: str | bytes) -> Any:
+    return orjson.loads(body)
+
+
+def encode_payload(obj) -> dict:
+    """Converts a dataclass into a camelCase payload with its precompiled plan."""
+    return compile_encoder(type(obj))(obj)
+
+
+def decode_payload[T](dc_type: type[T], data: dict, camel_case: bool = True) -> T:
+    """Builds a dataclass from a payload with its precompiled plan."""
+    return compile_decoder(dc_type, camel_case)(data)
+
+
+def precompile(*dc_types: type):
+    """Compiles the encode/decode plans of payload types ahead of the first message."""
+    for dc_type in dc_types:
+        compile_encoder(dc_type)
+        compile_decoder(dc_type)
+        compile_decoder(dc_type, camel_case=False)
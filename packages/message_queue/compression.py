@@ -0,0 +1,35 @@
+import gzip
+from enum import Enum
+
+import zstandard
+
+
+class ContentEncoding(Enum):
+    """Message body encodings, sent as the AMQP `content_encoding` property."""
+
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def compress(body: bytes, content_encoding: ContentEncoding) -> bytes:
+    match content_encoding:
+        case ContentEncoding.GZIP:
+            return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        case ContentEncoding.ZSTD:
+            # compressors are not thread-safe, create one per call
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+
+def decompress(body: bytes, content_encoding: str | None) -> bytes:
+    """Decodes a message body by its `content_encoding`, bodies without one are returned as is."""
+    if not content_encoding:
+        return body
+    match ContentEncoding(content_encoding):
+        case ContentEncoding.GZIP:
+            return gzip.decompress(body)
+        case ContentEncoding.ZSTD:
+            return zstandard.ZstdDecompressor().decompress(body)
@@ -0,0 +1,354 @@
+import contextlib
+import functools
+import heapq
+import itertools
+import logging
+import re
+import signal
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import pendulum
+
+from packages.message_queue import codec
+from packages.message_queue.compression import ContentEncoding, decompress
+from packages.message_queue.linger_flusher import LingerFlusher
+from packages.message_queue.message_queue import (
+    MessageQueueConsumerInterface,
+    MessageQueuePublisherBase,
+    QueueHandler,
+    QueueMessage,
+)
+
+
+@functools.cache
+def compile_topic_pattern(pattern: str) -> re.Pattern:
+    """Compiles an AMQP topic binding key into a regular expression.
+
+    * (star) can substitute for exactly one word.
+    # (hash) can substitute for zero or more words.
+    """
+    # every word is matched together with the dot in front of it,
+    # so `#` can swallow zero words without leaving a dangling separator
+    regex = ""
+    for word in pattern.split("."):
+        match word:
+            case "#":
+                regex += r"(?:\.[^.]*)*"
+            case "*":
+                regex += r"\.[^.]*"
+            case _:
+                regex += r"\." + re.escape(word)
+    return re.compile(regex)
+
+
+def topic_match(pattern: str, routing_key: str) -> bool:
+    return compile_topic_pattern(pattern).fullmatch("." + routing_key) is not None
+
+
+@dataclass
+class InMemoryDelivery:
+    delivery_tag: int
+    exchange: str
+    routing_key: str
+    body: bytes
+    properties: dict = field(default_factory=dict)
+    redelivered: bool = False
+
+
+class InMemoryQueue:
+    def __init__(self, name: str):
+        self.name = name
+        self.ready: deque[InMemoryDelivery] = deque()
+        # (available at, sequence, delivery), ordered by monotonic time
+        self.delayed: list[tuple[float, int, InMemoryDelivery]] = []
+        self.unacked: dict[int, InMemoryDelivery] = {}
+        self.dead_letters: list[InMemoryDelivery] = []
+
+    def promote_delayed(self, now: float):
+        while self.delayed and self.delayed[0][0] <= now:
+            _, _, delivery = heapq.heappop(self.delayed)
+            self.ready.append(delivery)
+
+    def next_delayed_at(self) -> float | None:
+        return self.delayed[0][0] if self.delayed else None
+
+
+class InMemoryBroker:
+    """A process-local stand-in for a RabbitMQ topic exchange.
+
+    Supports topic routing (`*`/`#`), delayed delivery and ack/nack of deliveries.
+    State is shared by every publisher and consumer in the same process only.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._bindings: dict[str, list[tuple[str, str]]] = {}
+        self._queues: dict[str, InMemoryQueue] = {}
+        self._delivery_tags = itertools.count(1)
+        self._sequence = itertools.count()
+
+    def exchange_declare(self, exchange: str):
+        with self._condition:
+            self._bindings.setdefault(exchange, [])
+
+    def queue_declare(self, queue: str) -> InMemoryQueue:
+        with self._condition:
+            if queue not in self._queues:
+                self._queues[queue] = InMemoryQueue(queue)
+            return self._queues[queue]
+
+    def queue_bind(self, queue: str, exchange: str, routing_key: str):
+        with self._condition:
+            self.queue_declare(queue)
+            bindings = self._bindings.setdefault(exchange, [])
+            if (routing_key, queue) not in bindings:
+                bindings.append((routing_key, queue))
+
+    def publish(
+        self,
+        exchange: str,
+        routing_key: str,
+        body: str | bytes,
+        properties: dict | None = None,
+        delay_seconds: float = 0,
+    ) -> int:
+        """Routes a message to every bound queue, returns the number of queues routed to."""
+        with self._condition:
+            queues = {
+                queue
+                for pattern, queue in self._bindings.get(exchange, [])
+                if topic_match(pattern, routing_key)
+            }
+            for queue in queues:
+                self._enqueue(queue, exchange, routing_key, body, properties, delay_seconds)
+            if queues:
+                self._condition.notify_all()
+            return len(queues)
+
+    def publish_to_queue(
+        self,
+        queue: str,
+        body: str | bytes,
+        properties: dict | None = None,
+        delay_seconds: float = 0,
+    ):
+        """Enqueues a message to one queue directly, bypassing the exchange."""
+        with self._condition:
+            self.queue_declare(queue)
+            self._enqueue(queue, "", queue, body, properties, delay_seconds)
+            self._condition.notify_all()
+
+    def get(self, queue: str, timeout: float | None = None) -> InMemoryDelivery | None:
+        """Takes the next ready delivery of a queue, waits up to `timeout` seconds for one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            q = self.queue_declare(queue)
+            while True:
+                now = time.monotonic()
+                q.promote_delayed(now)
+                if q.ready:
+                    delivery = q.ready.popleft()
+                    q.unacked[delivery.delivery_tag] = delivery
+                    return delivery
+
+                waits = [t - now for t in (deadline, q.next_delayed_at()) if t is not None]
+                if deadline is not None and now >= deadline:
+                    return None
+                self._condition.wait(min(waits) if waits else None)
+
+    def ack(self, queue: str, delivery_tag: int):
+        with self._condition:
+            self._queues[queue].unacked.pop(delivery_tag, None)
+
+    def nack(self, queue: str, delivery_tag: int, requeue: bool = True):
+        with self._condition:
+            q = self._queues[queue]
+            delivery = q.unacked.pop(delivery_tag, None)
+            if delivery is None:
+                return
+            if requeue:
+                delivery.redelivered = True
+                q.ready.appendleft(delivery)
+                self._condition.notify_all()
+            else:
+                q.dead_letters.append(delivery)
+
+    def recover(self, queue: str):
+        """Requeues every unacknowledged delivery, like closing the consumer channel."""
+        with self._condition:
+            q = self._queues[queue]
+            for delivery_tag in sorted(q.unacked, reverse=True):
+                delivery = q.unacked.pop(delivery_tag)
+                delivery.redelivered = True
+                q.ready.appendleft(delivery)
+            self._condition.notify_all()
+
+    def message_count(self, queue: str, include_delayed: bool = False) -> int:
+        with self._condition:
+            q = self.queue_declare(queue)
+            q.promote_delayed(time.monotonic())
+            return len(q.ready) + (len(q.delayed) if include_delayed else 0)
+
+    def unacked_count(self, queue: str) -> int:
+        with self._condition:
+            return len(self.queue_declare(queue).unacked)
+
+    def dead_letters(self, queue: str) -> list[InMemoryDelivery]:
+        with self._condition:
+            return list(self.queue_declare(queue).dead_letters)
+
+    def reset(self):
+        with self._condition:
+            self._bindings = {}
+            self._queues = {}
+
+    def _enqueue(
+        self,
+        queue: str,
+        exchange: str,
+        routing_key: str,
+        body: str | bytes,
+        properties: dict | None,
+        delay_seconds: float,
+    ):
+        delivery = InMemoryDelivery(
+            next(self._delivery_tags),
+            exchange,
+            routing_key,
+            body.encode() if isinstance(body, str) else body,
+            dict(properties or {}),
+        )
+        q = self._queues[queue]
+        if delay_seconds > 0:
+            heapq.heappush(
+                q.delayed, (time.monotonic() + delay_seconds, next(self._sequence), delivery)
+            )
+        else:
+            q.ready.append(delivery)
+
+
+in_memory_broker = InMemoryBroker()
+
+
+class InMemoryPublisher(MessageQueuePublisherBase):
+    def __init__(
+        self,
+        exchange_name: str,
+        broker: InMemoryBroker | None = None,
+        content_encoding: ContentEncoding | None = None,
+        compress_threshold_bytes: int = 16 * 1024,
+        max_message_bytes: int | None = None,
+        flusher: LingerFlusher | None = None,
+    ):
+        super().__init__(content_encoding, compress_threshold_bytes, max_message_bytes, flusher)
+
+        self.broker = broker or in_memory_broker
+        self.exchange_name = exchange_name
+        self.broker.exchange_declare(exchange_name)
+
+    def connect(self) -> contextlib.nullcontext:
+        return contextlib.nullcontext()
+
+    def basic_publish(self, routing_key: str, body: bytes, content_encoding: str | None = None):
+        properties = {"content_encoding": content_encoding} if content_encoding else None
+        self.broker.publish(self.exchange_name, routing_key, body, properties)
+
+
+class InMemoryConsumer(MessageQueueConsumerInterface):
+    def __init__(
+        self,
+        queue_name: str,
+        routing_key: str,
+        exchange_name: str,
+        broker: InMemoryBroker | None = None,
+        poll_timeout_second: float = 0.5,
+    ):
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.exit_gracefully)
+            signal.signal(signal.SIGTERM, self.exit_gracefully)
+        self.kill_now = False
+        self.logger = logging.getLogger(f"{self.__class__.__name__}:{queue_name}")
+
+        self.broker = broker or in_memory_broker
+        self.queue_name = queue_name
+        self.routing_key = routing_key
+        self.exchange_name = exchange_name
+        self.poll_timeout_second = poll_timeout_second
+
+        self.broker.exchange_declare(exchange_name)
+        self.broker.queue_bind(queue_name, exchange_name, routing_key)
+
+    def exit_gracefully(self, signalnum=None, handler=None):
+        self.logger.info("Stop consuming...")
+        self.kill_now = True
+
+    def start_consume(self, handler: QueueHandler):
+        self.logger.info(
+            "Start consuming %s from %s by %s",
+            self.queue_name,
+            self.exchange_name,
+            self.routing_key,
+        )
+        while not self.kill_now:
+            delivery = self.broker.get(self.queue_name, timeout=self.poll_timeout_second)
+            if delivery:
+                self.handle_delivery(handler, delivery)
+
+    def consume_pending(self, handler: QueueHandler) -> int:
+        """Handles every delivery that is ready now without blocking, returns how many."""
+        count = 0
+        while delivery := self.broker.get(self.queue_name, timeout=0):
+            self.handle_delivery(handler, delivery)
+            count += 1
+        return count
+
+    def handle_delivery(self, handler: QueueHandler, delivery: InMemoryDelivery):
+        # data: raw data
+        # message: `QueueMessage`, data is snake case
+        data = codec.loads(decompress(delivery.body, delivery.properties.get("content_encoding")))
+        message = QueueMessage.from_payload(data)
+
+        now = pendulum.now()
+        if message.started and message.started > now:
+            # hold the message back in the broker instead of redelivering it right away
+            self.broker.publish_to_queue(
+                self.queue_name,
+                delivery.body,
+                delivery.properties,
+                delay_seconds=(message.started - now).total_seconds(),
+            )
+            self.broker.ack(self.queue_name, delivery.delivery_tag)
+            return
+
+        try:
+            self.logger.info("message", extra={"detail": data, "traceId": message.trace_id})
+            handler(message)
+        except Exception as e:
+            message.started = pendulum.now().add(seconds=message.retry_delay_second)
+            retry = message.attempt_number == -1
+            if not retry:
+                message.attempt_number -= 1
+                retry = message.attempt_number > 0
+
+            if retry:
+                self.logger.warning("Consume failed: %s", e, extra={"traceId": message.trace_id})
+                self.logger.info(
+                    "Retry message, remaining %s times",
+                    message.attempt_number,
+                    extra={"traceId": message.trace_id},
+                )
+                # the retried body is plain json, so the content encoding is not carried over
+                self.broker.publish_to_queue(
+                    self.queue_name,
+                    message.encode(),
+                    delay_seconds=message.retry_delay_second,
+                )
+            else:
+                self.logger.exception("Consume failed: %s", e, extra={"traceId": message.trace_id})
+                self.broker.nack(self.queue_name, delivery.delivery_tag, requeue=False)
+                return
+
+        self.broker.ack(self.queue_name, delivery.delivery_tag)
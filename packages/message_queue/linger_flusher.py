@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from packages.message_queue.message_queue import EncodedMessage, MessageQueuePublisherBase
+
+
+class LingerFlusher:
+    """Publishes messages handed off by publishers from a background thread of the process.
+
+    A message waits up to `linger_ms` for others, so messages of concurrent requests are
+    published in one burst over one connection. A batch is published earlier once it reaches
+    `max_batch_count` messages or `max_batch_bytes` bytes.
+
+    A batch the publisher fails to publish is retried after `retry_delay_second`, doubled on
+    every failure in a row up to `max_retry_delay_second`. The messages are logged and dropped
+    after `max_retries` retries without any of them being published.
+
+    The thread is started on the first hand-off of every process, so an instance created
+    before a fork (e.g. gunicorn `preload_app`) works in each forked worker.
+    """
+
+    def __init__(
+        self,
+        publisher: MessageQueuePublisherBase,
+        linger_ms: float = 5,
+        max_batch_count: int = 500,
+        max_batch_bytes: int = 4 * 1024 * 1024,
+        retry_delay_second: float = 1,
+        max_retry_delay_second: float = 30,
+        max_retries: int = 5,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.publisher = publisher
+        self.linger_second = linger_ms / 1000
+        self.max_batch_count = max_batch_count
+        self.max_batch_bytes = max_batch_bytes
+        self.retry_delay_second = retry_delay_second
+        self.max_retry_delay_second = max_retry_delay_second
+        self.max_retries = max_retries
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._pending: deque[EncodedMessage] = deque()
+        self._pending_bytes = 0
+        self._pending_since = 0.0
+        self._retry_at = 0.0
+        self._failures = 0
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+
+    def _check_pid(self):
+        # threads and locks of the parent are not usable after a fork
+        if self._pid != os.getpid():
+            self._reset()
+
+    def submit(self, messages: list[EncodedMessage]) -> bool:
+        """Hands off encoded messages, returns False if the flusher is closed."""
+        self._check_pid()
+        with self._condition:
+            if self._closed:
+                return False
+            if not messages:
+                return True
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=self.__class__.__name__, daemon=True
+                )
+                self._thread.start()
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.extend(messages)
+            self._pending_bytes += sum(len(m.body) for m in messages)
+            self._condition.notify_all()
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Publishes the pending messages now and waits for them, returns False on timeout."""
+        self._check_pid()
+        with self._condition:
+            if not self._pending and not self._in_flight:
+                return True
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._in_flight, timeout
+            )
+
+    def close(self, timeout: float | None = None) -> bool:
+        """Publishes the pending messages and stops the thread, returns False on timeout."""
+        self._check_pid()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread:
+            thread.join(timeout)
+        with self._condition:
+            return not self._pending and not self._in_flight
+
+    @property
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self._in_flight = len(batch)
+
+            unsent = self._publish(batch)
+
+            with self._condition:
+                self._in_flight = 0
+                if len(unsent) < len(batch):
+                    self._failures = 0
+                if unsent:
+                    self._failures += 1
+                    if self._failures > self.max_retries:
+                        self.logger.error(
+                            "drop %d messages after %d retries", len(unsent), self.max_retries
+                        )
+                        self._failures = 0
+                    else:
+                        # keep the order, the failed messages are published first on retry
+                        self._pending.extendleft(reversed(unsent))
+                        self._pending_bytes += sum(len(m.body) for m in unsent)
+                        delay = self.retry_delay_second * 2 ** (self._failures - 1)
+                        self._retry_at = time.monotonic() + min(delay, self.max_retry_delay_second)
+                self._condition.notify_all()
+
+    def _next_batch(self) -> list[EncodedMessage] | None:
+        # called with the condition held, waits until a batch is due
+        while True:
+            now = time.monotonic()
+            if not self._pending:
+                if self._closed:
+                    return None
+                self._flush_requested = False
+                self._condition.wait()
+                continue
+
+            due_at = self._pending_since + self.linger_second
+            if (
+                self._flush_requested
+                or self._closed
+                or len(self._pending) >= self.max_batch_count
+                or self._pending_bytes >= self.max_batch_bytes
+            ):
+                due_at = now
+            due_at = max(due_at, self._retry_at)
+            if now >= due_at:
+                return self._take_batch(now)
+            self._condition.wait(due_at - now)
+
+    def _take_batch(self, now: float) -> list[EncodedMessage]:
+        batch: list[EncodedMessage] = []
+        size = 0
+        while self._pending and len(batch) < self.max_batch_count:
+            message = self._pending[0]
+            if batch and size + len(message.body) > self.max_batch_bytes:
+                break
+            batch.append(self._pending.popleft())
+            size += len(message.body)
+        self._pending_bytes -= size
+        if not self._pending:
+            self._pending_since = now
+        return batch
+
+    def _publish(self, batch: list[EncodedMessage]) -> list[EncodedMessage]:
+        """Publishes a batch over one connection, returns the messages not published."""
+        sent = self.publisher.publish_encoded_messages(batch)
+        if sent < len(batch):
+            self.logger.warning("retry %d messages", len(batch) - sent)
+        return batch[sent:]
@@ -1,8 +1,11 @@
 import abc
+import logging
 from collections.abc import Callable
+from contextlib import AbstractContextManager
+from copy import deepcopy
 from dataclasses import dataclass
 from enum import Enum
-from typing import Self
+from typing import TYPE_CHECKING, Self
 
 import pika
 from dataclass_mixins import DataclassMixin
@@ -11,6 +14,13 @@ from pika.adapters.blocking_connection import BlockingChannel
 from pika.adapters.utils import connection_workflow
 from pika.exchange_type import ExchangeType
 
+from packages.dataclass_codec import DecodeError
+from packages.message_queue import codec
+from packages.message_queue.compression import ContentEncoding, compress
+
+if TYPE_CHECKING:
+    from packages.message_queue.linger_flusher import LingerFlusher
+
 
 class OperationType(Enum):
     PUBLISH = "PUBLISH"
@@ -45,7 +55,35 @@ class QueueMessage(DataclassMixin):
         return self
 
     def to_payload(self) -> dict:
-        return self.to_camel_case_json()
+        return codec.encode_payload(self)
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> Self:
+        try:
+            return codec.decode_payload(cls, payload)
+        except DecodeError:
+            # values of legacy payloads the compiled plan can not convert, e.g. datetime formats
+            return cls.create_from_camel_case_json(payload)
+
+    def encode(self) -> bytes:
+        return codec.dumps(self.to_payload())
+
+    @classmethod
+    def decode(cls, body: str | bytes) -> Self:
+        return cls.from_payload(codec.loads(body))
+
+    def get_data[T](self, payload_type: type[T]) -> list[T]:
+        """Builds typed payloads from `data`, whose keys are snake case after decoding."""
+        data = self.data if isinstance(self.data, list) else [self.data]
+        return [codec.decode_payload(payload_type, d, camel_case=False) for d in data]
+
+
+@dataclass
+class EncodedMessage:
+    routing_key: str
+    body: bytes
+    content_encoding: str | None
+    trace_id: str | None
 
 
 class MessageQueuePublisherInterface(metaclass=abc.ABCMeta):
@@ -58,6 +96,199 @@ class MessageQueuePublisherInterface(metaclass=abc.ABCMeta):
         pass
 
 
+class MessageQueuePublisherBase(MessageQueuePublisherInterface):
+    """Buffers messages per routing key and publishes them through a broker connection.
+
+    Messages pushed with the same trace id and function name are merged into one message.
+    Subclasses only provide the broker connection and the raw publish call.
+
+    :param content_encoding: Compress bodies larger than `compress_threshold_bytes` with it,
+        the encoding is sent as the `content_encoding` property so consumers can decompress.
+
+    :param compress_threshold_bytes: The minimum json size of a body to compress.
+
+    :param max_message_bytes: Split merged messages whose json is larger than it into several
+        messages of the same trace id and function name, each with a part of `data`.
+
+    :param flusher: Hand off messages to a `LingerFlusher` on `publish_messages`,
+        which publishes them in the background together with messages of other publishers.
+    """
+
+    def __init__(
+        self,
+        content_encoding: ContentEncoding | None = None,
+        compress_threshold_bytes: int = 16 * 1024,
+        max_message_bytes: int | None = None,
+        flusher: "LingerFlusher | None" = None,
+    ):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.messages: dict[str, dict[str, QueueMessage]] = {}
+        self.content_encoding = content_encoding
+        self.compress_threshold_bytes = compress_threshold_bytes
+        self.max_message_bytes = max_message_bytes
+        self.flusher = flusher
+
+    @abc.abstractmethod
+    def connect(self) -> AbstractContextManager:
+        pass
+
+    @abc.abstractmethod
+    def basic_publish(self, routing_key: str, body: bytes, content_encoding: str | None = None):
+        pass
+
+    def clean_messages(self):
+        self.messages = {}
+
+    def push_message(self, routing_key: str, message: QueueMessage, auto_publish: bool = False):
+        if auto_publish:
+            payload = message.to_payload()
+            self.publish_raw_message(routing_key, payload)
+        else:
+            if routing_key not in self.messages:
+                self.messages[routing_key] = {}
+            function_name = (
+                message.function_name
+                if isinstance(message.function_name, str)
+                else message.function_name.value
+            )
+            m_key = f"{message.trace_id}_{function_name}"
+            if m_key not in self.messages[routing_key]:
+                self.messages[routing_key][m_key] = message
+            else:
+                self.messages[routing_key][m_key] += message
+
+    def publish_messages(self, sync: bool = False):
+        """
+        Publishes the buffered messages.
+
+        With a flusher the messages are handed off to it and published in the background,
+        `sync=True` publishes them before returning.
+        """
+        if self.flusher and not sync:
+            try:
+                encoded_messages = self.encode_messages()
+                if not self.flusher.submit(encoded_messages):
+                    # the flusher is closed, e.g. the worker is exiting
+                    self.publish_encoded_messages(encoded_messages)
+            except Exception as e:
+                self.logger.error("publish messages error: %s", e)
+            return
+
+        try:
+            with self.connect():
+                copy_messages = deepcopy(self.messages)
+                for routing_key, messages in copy_messages.items():
+                    for m_key, message in messages.items():
+                        payload = message.to_payload()
+                        self.logger.info(
+                            "publish message to %s",
+                            routing_key,
+                            extra={"detail": payload, "traceId": message.trace_id},
+                        )
+                        self.publish_payload(routing_key, payload)
+                        self.logger.info("publish complete", extra={"traceId": message.trace_id})
+                        self.messages[routing_key].pop(m_key)
+                self.messages = {}
+        except Exception as e:
+            self.logger.error("publish messages error: %s", e)
+
+    def encode_messages(self) -> list[EncodedMessage]:
+        """Encodes the buffered messages into message bodies and empties the buffer."""
+        encoded_messages = []
+        for routing_key, messages in self.messages.items():
+            for message in messages.values():
+                payload = message.to_payload()
+                self.logger.info(
+                    "publish message to %s",
+                    routing_key,
+                    extra={"detail": payload, "traceId": message.trace_id},
+                )
+                encoded_messages.extend(
+                    EncodedMessage(routing_key, body, content_encoding, message.trace_id)
+                    for body, content_encoding in self.encode_payload(payload)
+                )
+        self.messages = {}
+        return encoded_messages
+
+    def publish_encoded_messages(self, messages: list[EncodedMessage]) -> int:
+        """Publishes encoded messages over one connection, returns how many were published."""
+        sent = 0
+        try:
+            with self.connect():
+                for m in messages:
+                    self.basic_publish(m.routing_key, m.body, m.content_encoding)
+                    sent += 1
+                    self.logger.info("publish complete", extra={"traceId": m.trace_id})
+        except Exception as e:
+            self.logger.error("publish messages error: %s", e)
+        return sent
+
+    def publish_raw_message(self, routing_key: str, message: dict, message_logging: bool = True):
+        with self.connect():
+            trace_id = message.get("traceId")
+            if message_logging:
+                self.logger.info(
+                    "publish message to %s",
+                    routing_key,
+                    extra={"detail": message, "traceId": trace_id},
+                )
+            self.publish_payload(routing_key, message)
+            if message_logging:
+                self.logger.info("publish complete", extra={"traceId": trace_id})
+
+    def publish_payload(self, routing_key: str, payload: dict):
+        bodies = self.encode_payload(payload)
+        if len(bodies) > 1:
+            self.logger.info(
+                "split message into %d messages",
+                len(bodies),
+                extra={"traceId": payload.get("traceId")},
+            )
+        for body, content_encoding in bodies:
+            self.basic_publish(routing_key, body, content_encoding)
+
+    def encode_payload(self, payload: dict) -> list[tuple[bytes, str | None]]:
+        """Serializes a payload into message bodies with their content encoding."""
+        body = codec.dumps(payload)
+        if self.max_message_bytes and len(body) > self.max_message_bytes:
+            bodies = [codec.dumps(chunk) for chunk in self.split_payload(payload)]
+        else:
+            bodies = [body]
+        return [self.compress_body(body) for body in bodies]
+
+    def compress_body(self, body: bytes) -> tuple[bytes, str | None]:
+        if self.content_encoding and len(body) > self.compress_threshold_bytes:
+            return compress(body, self.content_encoding), self.content_encoding.value
+        return body, None
+
+    def split_payload(self, payload: dict) -> list[dict]:
+        """
+        Splits the `data` list of a payload into chunks whose json fits in `max_message_bytes`.
+
+        Every chunk keeps the other fields of the payload, an item larger than the limit is
+        sent alone. Payloads with dict data can not be split and are returned as is.
+        """
+        data = payload.get("data")
+        if not self.max_message_bytes or not isinstance(data, list) or len(data) <= 1:
+            return [payload]
+
+        envelope_size = len(codec.dumps({**payload, "data": []}))
+        chunks: list[dict] = []
+        chunk: list = []
+        size = envelope_size
+        for item in data:
+            # one more byte for the separator
+            item_size = len(codec.dumps(item)) + 1
+            if chunk and size + item_size > self.max_message_bytes:
+                chunks.append({**payload, "data": chunk})
+                chunk = []
+                size = envelope_size
+            chunk.append(item)
+            size += item_size
+        chunks.append({**payload, "data": chunk})
+        return chunks
+
+
 QueueHandler = Callable[[QueueMessage], None]
 
 
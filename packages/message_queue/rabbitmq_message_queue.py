@@ -1,7 +1,5 @@
-import json
 import logging
 import signal
-from copy import deepcopy
 
 import pendulum
 import pika
@@ -10,24 +8,31 @@ import pika.exceptions
 import pika.spec
 from pika.exchange_type import ExchangeType
 
+from packages.message_queue import codec
+from packages.message_queue.compression import ContentEncoding, decompress
+from packages.message_queue.linger_flusher import LingerFlusher
 from packages.message_queue.message_queue import (
     MessageQueueConnection,
     MessageQueueConsumerInterface,
-    MessageQueuePublisherInterface,
+    MessageQueuePublisherBase,
     OperationType,
     QueueHandler,
     QueueMessage,
 )
 
 
-class RabbitMqPublisher(MessageQueuePublisherInterface):
+class RabbitMqPublisher(MessageQueuePublisherBase):
     def __init__(
         self,
         amqp_url: str,
         exchange_name: str,
         exchange_type: ExchangeType = ExchangeType.topic,
+        content_encoding: ContentEncoding | None = None,
+        compress_threshold_bytes: int = 16 * 1024,
+        max_message_bytes: int | None = None,
+        flusher: LingerFlusher | None = None,
     ):
-        self.logger = logging.getLogger(self.__class__.__name__)
+        super().__init__(content_encoding, compress_threshold_bytes, max_message_bytes, flusher)
 
         self.connection = MessageQueueConnection(
             amqp_url,
@@ -35,72 +40,22 @@ class RabbitMqPublisher(MessageQueuePublisherInterface):
             exchange_name=exchange_name,
             exchange_type=exchange_type,
         )
-        self.messages: dict[str, dict[str, QueueMessage]] = {}
-
-    def clean_messages(self):
-        self.messages = {}
-
-    def push_message(self, routing_key: str, message: QueueMessage, auto_publish: bool = False):
-        if auto_publish:
-            payload = message.to_payload()
-            self.publish_raw_message(routing_key, payload)
-        else:
-            if routing_key not in self.messages:
-                self.messages[routing_key] = {}
-            function_name = (
-                message.function_name
-                if isinstance(message.function_name, str)
-                else message.function_name.value
-            )
-            m_key = f"{message.trace_id}_{function_name}"
-            if m_key not in self.messages[routing_key]:
-                self.messages[routing_key][m_key] = message
-            else:
-                self.messages[routing_key][m_key] += message
 
-    def publish_messages(self):
-        try:
-            with self.connection:
-                copy_messages = deepcopy(self.messages)
-                for routing_key, messages in copy_messages.items():
-                    for m_key, message in messages.items():
-                        payload = message.to_payload()
-                        self.logger.info(
-                            "publish message to %s",
-                            routing_key,
-                            extra={"detail": payload, "traceId": message.trace_id},
-                        )
-                        if not self.connection.channel:
-                            raise RuntimeError("Publish channel not found")
-                        self.connection.channel.basic_publish(
-                            exchange=self.connection.exchange_name,
-                            routing_key=routing_key,
-                            body=json.dumps(payload),
-                        )
-                        self.logger.info("publish complete", extra={"traceId": message.trace_id})
-                        self.messages[routing_key].pop(m_key)
-                self.messages = {}
-        except Exception as e:
-            self.logger.error("publish messages error: %s", e)
+    def connect(self) -> MessageQueueConnection:
+        return self.connection
 
-    def publish_raw_message(self, routing_key: str, message: dict, message_logging: bool = True):
-        with self.connection:
-            trace_id = message.get("traceId")
-            if message_logging:
-                self.logger.info(
-                    "publish message to %s",
-                    routing_key,
-                    extra={"detail": message, "traceId": trace_id},
-                )
-            if not self.connection.channel:
-                raise RuntimeError("Publish channel not found")
-            self.connection.channel.basic_publish(
-                exchange=self.connection.exchange_name,
-                routing_key=routing_key,
-                body=json.dumps(message),
-            )
-            if message_logging:
-                self.logger.info("publish complete", extra={"traceId": trace_id})
+    def basic_publish(self, routing_key: str, body: bytes, content_encoding: str | None = None):
+        if not self.connection.channel:
+            raise RuntimeError("Publish channel not found")
+        self.connection.channel.basic_publish(
+            exchange=self.connection.exchange_name,
+            routing_key=routing_key,
+            body=body,
+            properties=pika.BasicProperties(
+                content_type="application/json",
+                content_encoding=content_encoding,
+            ),
+        )
 
 
 class RabbitMqConsumer(MessageQueueConsumerInterface):
@@ -146,8 +101,8 @@ class RabbitMqConsumer(MessageQueueConsumerInterface):
         ):
             # data: raw data
             # message: `QueueMessage`, data is snake case
-            data = json.loads(body)
-            message = QueueMessage.create_from_camel_case_json(data)
+            data = codec.loads(decompress(body, properties.content_encoding))
+            message = QueueMessage.from_payload(data)
 
             try:
                 if message.started:
@@ -3,6 +3,8 @@ from enum import Enum
 
 from dataclass_mixins import DataclassMixin
 
+from packages.message_queue.codec import precompile
+
 
 class RoutingKey(Enum):
     YOUR_AGGREGATE_SERVICE = "your-aggregate-service"
@@ -15,3 +17,6 @@ class YourAggregateServiceFuntion(Enum):
 @dataclass
 class YourAggregateVoided(DataclassMixin):
     your_aggregate_id: str
+
+
+precompile(YourAggregateVoided)
@@ -0,0 +1,3 @@
+from .single_flight import SingleFlight
+
+__all__ = ["SingleFlight"]
@@ -0,0 +1,62 @@
+import pendulum
+import pytest
+from sqlalchemy.exc import NoResultFound
+
+from app.adapter.controller.domain_event.domain_event_controller import DomainEventController
+from app.adapter.controller.domain_event.request import GetTraceRequest
+from app.adapter.repository.base import session_provider
+from app.adapter.repository.orm import DomainEventModel
+
+pytestmark = pytest.mark.asyncio
+
+TRACE_ID = "test-trace-tree"
+TRACE_EVENT_COUNT = 4
+SUBTREE_EVENT_COUNT = 2
+
+
+async def add_event(name: str, span_id: str, parent_span_id: str | None = None):
+    session_provider.session.add(
+        DomainEventModel(
+            name=name,
+            body={"your_aggregate_id": span_id},
+            version=1,
+            created_at=pendulum.now(),
+            span_id=span_id,
+            parent_span_id=parent_span_id,
+            trace_id=TRACE_ID,
+        )
+    )
+
+
+async def test_get_trace_tree():
+    async with session_provider:
+        await add_event("Root", "span-root")
+        await add_event("Child", "span-child", "span-root")
+        await add_event("GrandChild", "span-grandchild", "span-child")
+        # the parent span is not an event of the trace, e.g. the request
+        await add_event("Orphan", "span-orphan", "span-request")
+
+    controller = DomainEventController()
+    trace = await controller.get_trace(
+        GetTraceRequest.create_strictly(id=TRACE_ID, doer={"id": "test-user-id"})
+    )
+    assert trace.total == TRACE_EVENT_COUNT
+    assert [e.name for e in trace.events] == ["Root", "Orphan"]
+    child = trace.events[0].children[0]
+    assert child.name == "Child"
+    assert [e.name for e in child.children] == ["GrandChild"]
+
+    subtree = await controller.get_trace(
+        GetTraceRequest.create_strictly(
+            id=TRACE_ID, span_id="span-child", doer={"id": "test-user-id"}
+        )
+    )
+    assert subtree.total == SUBTREE_EVENT_COUNT
+    assert [e.name for e in subtree.events] == ["Child"]
+
+
+async def test_get_unknown_trace():
+    with pytest.raises(NoResultFound):
+        await DomainEventController().get_trace(
+            GetTraceRequest.create_strictly(id="unknown-trace", doer={"id": "test-user-id"})
+        )
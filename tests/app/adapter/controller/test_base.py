@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from app.adapter.controller.base import ControllerBase
+from app.adapter.controller.your_bounded_context.request import (
+    CreateYourAggregateRequest,
+    GetYourAggregateRequest,
+    SearchYourAggregatesRequest,
+)
+from app.trace import TokenInfo, TokenOrganization, TokenUser
+from packages.dataclass_codec import DecodeError, compile_decoder
+
+TOKEN_INFO = TokenInfo(
+    "iss",
+    "sub",
+    "aud",
+    0,
+    0,
+    0,
+    TokenUser("test-user-id", None, "test-user", None),
+    TokenOrganization("test-organization-id", "test-organization"),
+    "raw-token",
+)
+CALLER_COUNT = 10
+
+
+class CountingController(ControllerBase):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    @ControllerBase.single_flight()
+    async def get(self, request: GetYourAggregateRequest) -> int:
+        self.count += 1
+        count = self.count
+        await asyncio.sleep(0)
+        return count
+
+
+def test_create_from_body():
+    body = {"yourValueObject": {"propertyA": "value1", "propertyB": 123}, "unknown": 1}
+    request = CreateYourAggregateRequest.create_from_body(body, TOKEN_INFO, "trace-id")
+
+    assert request.your_value_object == (
+        CreateYourAggregateRequest.create_from_camel_case_json(body).your_value_object
+    )
+    assert request.doer.id == TOKEN_INFO.user.id
+    assert request.doer.organization_id == TOKEN_INFO.organization.id
+    assert request.trace_id == "trace-id"
+
+
+def test_create_from_body_rejects_mistyped_fields():
+    decode = compile_decoder(CreateYourAggregateRequest, strict=True)
+    with pytest.raises(DecodeError):
+        decode({"yourValueObject": {"propertyA": "value1", "propertyB": "123"}})
+    with pytest.raises(DecodeError):
+        decode({"yourValueObject": {"propertyA": "value1", "propertyB": True}})
+    with pytest.raises(DecodeError):
+        compile_decoder(SearchYourAggregatesRequest, strict=True)({"ids": "id"})
+
+    # the errors are raised by the reflective path
+    def fallback(body):
+        raise ValueError("reflective")
+
+    body = {"yourValueObject": {"propertyA": "value1", "propertyB": "123"}}
+    with pytest.MonkeyPatch.context() as m:
+        m.setattr(CreateYourAggregateRequest, "create_from_camel_case_json", fallback)
+        with pytest.raises(ValueError, match="reflective"):
+            CreateYourAggregateRequest.create_from_body(body, TOKEN_INFO, None)
+
+
+def test_create_search_request_from_body():
+    body = {
+        "ids": ["id"],
+        "searchKeyFields": ["yourValueObjectA"],
+        "searchKeys": ["value1"],
+        "sortBy": ["-createdAt"],
+        "offset": 0,
+        "limit": 100,
+    }
+    request = SearchYourAggregatesRequest.create_from_body(body, TOKEN_INFO, None)
+
+    assert request.ids == ["id"]
+    assert request.statuses is None
+    assert request.search_key_fields == ["your_value_object_a"]
+    assert request.sort_by == ["-created_at"]
+
+
+async def test_single_flight():
+    controller = CountingController()
+    requests = [
+        GetYourAggregateRequest.create_from_body({"id": "id"}, TOKEN_INFO, f"trace-{i}")
+        for i in range(CALLER_COUNT)
+    ]
+
+    assert await asyncio.gather(*(controller.get(r) for r in requests)) == [1] * CALLER_COUNT
+    other = GetYourAggregateRequest.create_from_body({"id": "other"}, TOKEN_INFO, None)
+    assert await asyncio.gather(controller.get(requests[0]), controller.get(other)) == [2, 3]
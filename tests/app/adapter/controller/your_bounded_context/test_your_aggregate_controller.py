@@ -1,11 +1,14 @@
+import orjson
 import pytest
 import pytest_asyncio
 import sqlalchemy as sa
+from dataclass_mixins import to_camel_case_json
 
 from app.adapter.controller.your_bounded_context.request import (
     CreateYourAggregateRequest,
     DeleteYourAggregateRequest,
     GetYourAggregateRequest,
+    SearchOperationHistoriesRequest,
     SearchYourAggregatesRequest,
     UpdateYourAggregateRequest,
     VoidYourAggregateRequest,
@@ -14,7 +17,9 @@ from app.adapter.controller.your_bounded_context.your_aggregate_controller impor
     YourAggregateController,
 )
 from app.adapter.repository.base import DomainEventModel
+from app.adapter.repository.orm import OutboxModel, YourAggregateOperationHistoryModel
 from app.adapter.repository.your_aggregate_repository import YourAggregateModel
+from app.config import config
 from app.core.your_bounded_context.domain.value_object.your_aggregate_value_object import (
     OperationHistoryType,
     YourAggregateStatus,
@@ -30,6 +35,15 @@ from tests.utils.rabbitmq_test_helper import TemporaryQueueWatcher
 pytestmark = pytest.mark.asyncio
 
 
+async def load_latest_history_type(test_db_session, your_aggregate_id: str) -> str:
+    return await test_db_session.scalar(
+        sa.select(YourAggregateOperationHistoryModel.type)
+        .where(YourAggregateOperationHistoryModel.your_aggregate_id == your_aggregate_id)
+        .order_by(YourAggregateOperationHistoryModel.id.desc())
+        .limit(1)
+    )
+
+
 @pytest_asyncio.fixture(autouse=False, scope="function")
 async def created_your_aggregate_id():
     controller = YourAggregateController()
@@ -73,7 +87,10 @@ async def test_create_your_aggregate(test_db_session, created_your_aggregate_id)
         == your_value_object["property_a"] + "_test_event_handler"
     )
     assert your_aggregate.your_value_object["property_b"] == your_value_object["property_b"]
-    assert your_aggregate.operation_histories[-1]["type"] == OperationHistoryType.UPDATED.value
+    assert (
+        await load_latest_history_type(test_db_session, your_aggregate.id)
+        == OperationHistoryType.UPDATED.value
+    )
     assert domain_event.name == "YourAggregateUpdated"
 
 
@@ -85,6 +102,87 @@ async def test_get_your_aggregate(created_your_aggregate_id):
     assert your_aggregate.id == created_your_aggregate_id
 
 
+async def test_get_your_aggregate_with_latest_histories(created_your_aggregate_id):
+    controller = YourAggregateController()
+    get_request = GetYourAggregateRequest.create_strictly(id=created_your_aggregate_id)
+    your_aggregate = await controller.get_your_aggregate(get_request)
+
+    # created, then updated by the event handler
+    assert [h.type for h in your_aggregate.operation_histories] == [
+        OperationHistoryType.CREATED,
+        OperationHistoryType.UPDATED,
+    ]
+
+
+async def test_get_your_aggregate_version(created_your_aggregate_id):
+    controller = YourAggregateController()
+    get_request = GetYourAggregateRequest.create_strictly(id=created_your_aggregate_id)
+    search_request = SearchYourAggregatesRequest.create_strictly(offset=0, limit=10)
+    version = await controller.get_your_aggregate_version(get_request)
+    search_version = await controller.get_your_aggregates_version(search_request)
+    assert await controller.get_your_aggregate_version(get_request) == version
+    # the versions read with the bodies
+    your_aggregate, body_version = await controller.get_your_aggregate_with_version(get_request)
+    assert your_aggregate.id == created_your_aggregate_id
+    assert body_version == version
+    _, body_version = await controller.search_your_aggregates_json_with_version(search_request)
+    assert body_version == search_version
+
+    await controller.update_your_aggregate(
+        UpdateYourAggregateRequest.create_strictly(
+            id=created_your_aggregate_id,
+            your_value_object={"property_a": "value2", "property_b": 2},
+            doer={"id": "test-user-id"},
+        )
+    )
+    new_version = await controller.get_your_aggregate_version(get_request)
+    assert new_version.version != version.version
+    assert new_version.last_modified >= version.last_modified
+    assert (await controller.get_your_aggregates_version(search_request)) != search_version
+
+
+async def test_search_operation_histories(created_your_aggregate_id):
+    controller = YourAggregateController()
+    request = SearchOperationHistoriesRequest.create_strictly(
+        id=created_your_aggregate_id, offset=0, limit=1, doer={"id": "test-user-id"}
+    )
+    histories = await controller.search_operation_histories(request)
+
+    # the latest first
+    latest_first = [OperationHistoryType.UPDATED, OperationHistoryType.CREATED]
+    assert histories.total == len(latest_first)
+    assert [h.type for h in histories.results] == latest_first[:1]
+
+    request = SearchOperationHistoriesRequest.create_strictly(
+        id=created_your_aggregate_id, offset=1, limit=1, doer={"id": "test-user-id"}
+    )
+    histories = await controller.search_operation_histories(request)
+
+    assert [h.type for h in histories.results] == latest_first[1:]
+
+
+async def test_search_your_aggregates_json(created_your_aggregate_id):
+    controller = YourAggregateController()
+    request = SearchYourAggregatesRequest.create_strictly(
+        ids=[created_your_aggregate_id, "00000000-0000-0000-0000-000000000000"],
+        offset=0,
+        limit=100,
+        doer={"id": "test-user-id"},
+    )
+    document = await controller.search_your_aggregates_json(request)
+    your_aggregates = await controller.search_your_aggregates(request)
+
+    # the same response as the one built from the entities
+    assert orjson.loads(orjson.dumps(document)) == orjson.loads(
+        orjson.dumps(to_camel_case_json(your_aggregates))
+    )
+
+    request.ids = []
+    document = await controller.search_your_aggregates_json(request)
+
+    assert orjson.loads(orjson.dumps(document)) == {"total": 0, "results": []}
+
+
 async def test_search_your_aggregates_by_search_key_fields(created_your_aggregate_id):
     controller = YourAggregateController()
     request = SearchYourAggregatesRequest.create_strictly(
@@ -237,7 +335,10 @@ async def test_update_your_aggregate(test_db_session, created_your_aggregate_id)
     assert your_aggregate.status == YourAggregateStatus.CREATED.value
     assert your_aggregate.your_value_object["property_a"] == your_value_object["property_a"]
     assert your_aggregate.your_value_object["property_b"] == your_value_object["property_b"]
-    assert your_aggregate.operation_histories[-1]["type"] == OperationHistoryType.UPDATED.value
+    assert (
+        await load_latest_history_type(test_db_session, your_aggregate.id)
+        == OperationHistoryType.UPDATED.value
+    )
     assert domain_event.name == "YourAggregateUpdated"
 
 
@@ -300,7 +401,10 @@ async def test_void_your_aggregate(test_db_session, test_rabbitmq, created_your_
     )
 
     assert your_aggregate.status == YourAggregateStatus.VOIDED.value
-    assert your_aggregate.operation_histories[-1]["type"] == OperationHistoryType.VOIDED.value
+    assert (
+        await load_latest_history_type(test_db_session, your_aggregate.id)
+        == OperationHistoryType.VOIDED.value
+    )
     assert domain_event.name == "YourAggregateVoided"
 
     queue_watcher.assert_message_published(
@@ -311,3 +415,28 @@ async def test_void_your_aggregate(test_db_session, test_rabbitmq, created_your_
         )
     )
     queue_watcher.close()
+
+
+async def test_void_your_aggregate_with_outbox(
+    test_db_session, created_your_aggregate_id, monkeypatch
+):
+    monkeypatch.setattr(config, "message_queue_outbox", "true")
+
+    controller = YourAggregateController()
+    request = VoidYourAggregateRequest.create_strictly(
+        id=created_your_aggregate_id, doer={"id": "test-user-id"}
+    )
+    your_aggregate_id = await controller.void_your_aggregate(request)
+
+    outbox: OutboxModel = (
+        (await test_db_session.execute(sa.select(OutboxModel).order_by(OutboxModel.id.desc())))
+        .scalars()
+        .first()
+    )
+    message = QueueMessage.decode(outbox.body)
+
+    assert outbox.routing_key == RoutingKey.YOUR_AGGREGATE_SERVICE.value
+    assert outbox.sent_at is None
+    assert message.function_name == YourAggregateServiceFuntion.YOUR_AGGREGATE_VOIDED.value
+    assert message.get_data(YourAggregateVoided) == [YourAggregateVoided(your_aggregate_id)]
+    assert not controller.message_queue_publisher.messages
@@ -0,0 +1,345 @@
+import asyncio
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.exc import NoResultFound
+
+from app.adapter.controller.your_bounded_context.request import (
+    CreateYourAggregateRequest,
+    SearchYourAggregatesRequest,
+    UpdateYourAggregateRequest,
+)
+from app.adapter.controller.your_bounded_context.your_aggregate_controller import (
+    YourAggregateController,
+)
+from app.adapter.repository import base as base_module
+from app.adapter.repository import cache as cache_module
+from app.adapter.repository.base import ArchiveMode, SessionProvider, session_provider
+from app.adapter.repository.cache import CacheInvalidationListener, create_invalidation_payload
+from app.adapter.repository.orm import YourAggregateArchiveModel, YourAggregateModel
+from app.adapter.repository.your_aggregate_repository import YourAggregateRepository
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_delta_archive_rebuilds_versions(monkeypatch, test_db_session):
+    monkeypatch.setattr(YourAggregateRepository, "archive_mode", ArchiveMode.DELTA)
+    monkeypatch.setattr(YourAggregateRepository, "archive_snapshot_interval", 2)
+
+    controller = YourAggregateController()
+    your_aggregate_id = await controller.create_your_aggregate(
+        CreateYourAggregateRequest.create_strictly(
+            your_value_object={"property_a": "value1", "property_b": 1},
+            doer={"id": "test-user-id"},
+        )
+    )
+    # the created event handler updates it once
+    for i in [3, 4]:
+        await controller.update_your_aggregate(
+            UpdateYourAggregateRequest.create_strictly(
+                id=your_aggregate_id,
+                your_value_object={"property_a": f"value{i}", "property_b": i},
+                doer={"id": "test-user-id"},
+            )
+        )
+
+    archives = (
+        await test_db_session.scalars(
+            sa.select(YourAggregateArchiveModel)
+            .where(YourAggregateArchiveModel.id == your_aggregate_id)
+            .order_by(YourAggregateArchiveModel.version)
+        )
+    ).all()
+    assert [(a.version, a.snapshot) for a in archives] == [
+        (1, True),
+        (2, False),
+        (3, True),
+        (4, False),
+    ]
+    # only the changed keys are stored
+    assert archives[3].your_value_object is None
+    assert archives[3].delta["your_value_object"] == {
+        "$patch": {"property_a": {"$replace": "value4"}, "property_b": {"$replace": 4}}
+    }
+
+    async with session_provider:
+        repository = YourAggregateRepository(session_provider)
+        versions = [
+            await repository.load_your_aggregate_version(your_aggregate_id, v) for v in range(1, 5)
+        ]
+        with pytest.raises(NoResultFound):
+            await repository.load_your_aggregate_version(your_aggregate_id, 5)
+
+    assert [v.your_value_object.property_a for v in versions] == [
+        "value1",
+        "value1_test_event_handler",
+        "value3",
+        "value4",
+    ]
+
+
+async def test_full_archive_numbers_versions(monkeypatch, test_db_session):
+    monkeypatch.setattr(YourAggregateRepository, "archive_mode", ArchiveMode.FULL)
+
+    controller = YourAggregateController()
+    your_aggregate_id = await controller.create_your_aggregate(
+        CreateYourAggregateRequest.create_strictly(
+            your_value_object={"property_a": "value1", "property_b": 1},
+            doer={"id": "test-user-id"},
+        )
+    )
+    await controller.update_your_aggregate(
+        UpdateYourAggregateRequest.create_strictly(
+            id=your_aggregate_id,
+            your_value_object={"property_a": "value3", "property_b": 3},
+            doer={"id": "test-user-id"},
+        )
+    )
+
+    archives = (
+        await test_db_session.scalars(
+            sa.select(YourAggregateArchiveModel)
+            .where(YourAggregateArchiveModel.id == your_aggregate_id)
+            .order_by(YourAggregateArchiveModel.version)
+        )
+    ).all()
+    assert [(a.version, a.snapshot) for a in archives] == [(1, True), (2, True), (3, True)]
+    assert archives[2].your_value_object["property_a"] == "value3"
+
+
+async def test_read_cache_is_invalidated_by_updates():
+    YourAggregateRepository.cache.clear()
+    controller = YourAggregateController()
+    your_aggregate_id = await controller.create_your_aggregate(
+        CreateYourAggregateRequest.create_strictly(
+            your_value_object={"property_a": "value1", "property_b": 1},
+            doer={"id": "test-user-id"},
+        )
+    )
+
+    async def load(**kwargs):
+        async with session_provider:
+            return await YourAggregateRepository(session_provider).load_your_aggregate(
+                your_aggregate_id, lock=False, **kwargs
+            )
+
+    stats = YourAggregateRepository.cache.stats()
+    first = await load(history_limit=2)
+    second = await load(history_limit=1)
+    assert second is not first
+    assert second.your_value_object == first.your_value_object
+    assert second.operation_histories == first.operation_histories[-1:]
+    assert YourAggregateRepository.cache.stats().hits == stats.hits + 1
+
+    # more histories than cached, or bypassed
+    await load(history_limit=3)
+    await load(use_cache=False)
+    assert YourAggregateRepository.cache.stats().hits == stats.hits + 1
+
+    await controller.update_your_aggregate(
+        UpdateYourAggregateRequest.create_strictly(
+            id=your_aggregate_id,
+            your_value_object={"property_a": "value2", "property_b": 2},
+            doer={"id": "test-user-id"},
+        )
+    )
+    your_aggregate = await load()
+    assert your_aggregate.your_value_object.property_a == "value2"
+
+
+async def test_invalidation_payload_evicts_cached_keys(monkeypatch):
+    cache = YourAggregateRepository.cache
+    cache.clear()
+    cache.set("id-1", (0, None, b"{}"), cache.version)
+    cache.set("id-2", (0, None, b"{}"), cache.version)
+    payload = create_invalidation_payload(YourAggregateModel.__tablename__, ["id-1"])
+
+    # the writing process has evicted its own keys
+    CacheInvalidationListener.invalidate(payload)
+    assert cache.get("id-1") is not None
+
+    monkeypatch.setattr(cache_module, "_ORIGIN", "other-process")
+    CacheInvalidationListener.invalidate(payload)
+    assert cache.get("id-1") is None
+    assert cache.get("id-2") is not None
+
+    # too many keys for one notification
+    CacheInvalidationListener.invalidate(
+        create_invalidation_payload(YourAggregateModel.__tablename__, ["id"] * 2000)
+    )
+    assert cache.get("id-2") is None
+
+
+async def test_saves_of_a_transaction_are_notified_once(monkeypatch):
+    controller = YourAggregateController()
+    notified = []
+
+    async def notify_changes(self, changed_keys):
+        notified.append(changed_keys)
+
+    monkeypatch.setattr(SessionProvider, "notify_changes", notify_changes)
+    your_aggregate_id = await controller.create_your_aggregate(
+        CreateYourAggregateRequest.create_strictly(
+            your_value_object={"property_a": "value1", "property_b": 1},
+            doer={"id": "test-user-id"},
+        )
+    )
+
+    # the created event handler updates it in the same transaction
+    assert notified == [{YourAggregateModel.__tablename__: {your_aggregate_id}}]
+
+
+async def test_value_read_before_invalidation_is_not_cached():
+    cache = YourAggregateRepository.cache
+    cache.clear()
+    version = cache.version
+
+    # a write is committed while the row is read
+    cache.invalidate(["id-1"])
+    cache.set("id-1", (0, None, b"{}"), version)
+
+    assert cache.get("id-1") is None
+
+
+async def test_search_cache_is_invalidated_by_writes():
+    controller = YourAggregateController()
+    your_aggregate_id = await controller.create_your_aggregate(
+        CreateYourAggregateRequest.create_strictly(
+            your_value_object={"property_a": "value1", "property_b": 1},
+            doer={"id": "test-user-id"},
+        )
+    )
+
+    async def search(**kwargs):
+        async with session_provider:
+            return await YourAggregateRepository(session_provider).search_your_aggregates(
+                statuses=["created", "voided"], limit=10, **kwargs
+            )
+
+    cache = YourAggregateRepository.search_cache
+    first = await search(ids=[your_aggregate_id, "00000000-0000-0000-0000-000000000000"])
+    stats = cache.stats()
+    # the same filters in another order
+    second = await search(ids=["00000000-0000-0000-0000-000000000000", your_aggregate_id])
+    assert second.total == first.total == 1
+    assert second.results[0] is not first.results[0]
+    assert second.results[0].your_value_object == first.results[0].your_value_object
+    # the page and the total
+    assert cache.stats().hits == stats.hits + 2
+
+    await search(ids=[your_aggregate_id], use_cache=False)
+    assert cache.stats().hits == stats.hits + 2
+
+    await controller.update_your_aggregate(
+        UpdateYourAggregateRequest.create_strictly(
+            id=your_aggregate_id,
+            your_value_object={"property_a": "value2", "property_b": 2},
+            doer={"id": "test-user-id"},
+        )
+    )
+    result = await search(ids=[your_aggregate_id, "00000000-0000-0000-0000-000000000000"])
+    assert result.results[0].your_value_object.property_a == "value2"
+
+
+async def test_stamp_and_table_version_change_with_saves():
+    controller = YourAggregateController()
+    your_aggregate_id = await controller.create_your_aggregate(
+        CreateYourAggregateRequest.create_strictly(
+            your_value_object={"property_a": "value1", "property_b": 1},
+            doer={"id": "test-user-id"},
+        )
+    )
+
+    async def load():
+        async with session_provider:
+            repository = YourAggregateRepository(session_provider)
+            return (
+                await repository.load_your_aggregate_stamp(your_aggregate_id),
+                await repository.load_your_aggregates_version(),
+            )
+
+    stamp, version = await load()
+    assert stamp.history_id is not None
+    assert await load() == (stamp, version)
+
+    await controller.update_your_aggregate(
+        UpdateYourAggregateRequest.create_strictly(
+            id=your_aggregate_id,
+            your_value_object={"property_a": "value2", "property_b": 2},
+            doer={"id": "test-user-id"},
+        )
+    )
+    new_stamp, new_version = await load()
+    assert new_stamp.history_id > stamp.history_id
+    assert new_stamp.last_modified >= stamp.last_modified
+    assert new_version > version
+
+    # a cached aggregate older than the stamp is not served
+    async with session_provider:
+        your_aggregate = await YourAggregateRepository(session_provider).load_your_aggregate(
+            your_aggregate_id, lock=False, history_limit=1, stamp=new_stamp
+        )
+    assert your_aggregate.your_value_object.property_a == "value2"
+
+    with pytest.raises(NoResultFound):
+        async with session_provider:
+            await YourAggregateRepository(session_provider).load_your_aggregate_stamp(
+                "00000000-0000-0000-0000-000000000000"
+            )
+
+
+async def test_failed_table_version_bump_is_never_validated(monkeypatch):
+    controller = YourAggregateController()
+    your_aggregate_id = await controller.create_your_aggregate(
+        CreateYourAggregateRequest.create_strictly(
+            your_value_object={"property_a": "value1", "property_b": 1},
+            doer={"id": "test-user-id"},
+        )
+    )
+    search_request = SearchYourAggregatesRequest.create_strictly(
+        ids=None,
+        statuses=None,
+        date_fields=None,
+        start_time=None,
+        end_time=None,
+        search_key_fields=None,
+        search_keys=None,
+        sort_by=None,
+        offset=0,
+        limit=10,
+        doer={"id": "test-user-id"},
+        trace_id=None,
+    )
+
+    async def load_version() -> str:
+        return (await controller.get_your_aggregates_version(search_request)).version
+
+    version = await load_version()
+
+    count_changes = SessionProvider.count_changes
+    failures = []
+
+    async def fail_once(self, tables):
+        if not failures:
+            failures.append(tables)
+            return False
+        return await count_changes(self, tables)
+
+    monkeypatch.setattr(SessionProvider, "count_changes", fail_once)
+    monkeypatch.setattr(base_module, "COUNT_CHANGES_RETRY_SECONDS", 0)
+    await controller.update_your_aggregate(
+        UpdateYourAggregateRequest.create_strictly(
+            id=your_aggregate_id,
+            your_value_object={"property_a": "value2", "property_b": 2},
+            doer={"id": "test-user-id"},
+        )
+    )
+    assert failures == [{YourAggregateModel.__tablename__}]
+
+    # matches neither the version before the save nor another response
+    unknown = await load_version()
+    assert unknown not in (version, await load_version())
+
+    await asyncio.gather(*base_module._retry_tasks)
+    assert not base_module.unbumped_tables
+    assert int(await load_version(), 16) > int(version, 16)
@@ -0,0 +1,151 @@
+import time
+from dataclasses import dataclass
+
+import pendulum
+import pytest
+from pendulum.datetime import DateTime
+
+from app.core.ddd_base import AggregateRoot, DomainEvent, User
+from app.core.ddd_base.exception import InvalidEventRegisterError
+from app.core.your_bounded_context.domain.value_object.your_aggregate_value_object import (
+    OperationHistory,
+    OperationHistoryData,
+    OperationHistoryType,
+    YourAggregateStatus,
+)
+
+
+@dataclass(frozen=True)
+class SerializeTestEvent(DomainEvent):
+    status: YourAggregateStatus
+    happened_at: DateTime
+    histories: list[OperationHistory]
+    tags: set[str]
+    extra: dict
+    doer: User
+    note: str | None = None
+
+
+def test_serialize_converts_nested_values_to_jsonb_ready_body():
+    happened_at = pendulum.datetime(2026, 10, 19, 8, tz="UTC")
+    doer = User(id="user-id", name="user")
+    event = SerializeTestEvent(
+        YourAggregateStatus.VOIDED,
+        happened_at,
+        [
+            OperationHistory(
+                OperationHistoryType.UPDATED,
+                [OperationHistoryData("property_a", "a", "b")],
+                doer,
+                happened_at,
+            )
+        ],
+        {"tag"},
+        {"status": YourAggregateStatus.VOIDED, "at": [happened_at]},
+        doer,
+    )
+
+    serialized = event.serialize()
+
+    assert serialized["name"] == "SerializeTestEvent"
+    assert serialized["span_id"] == event.tracer.span_id
+    assert serialized["body"] == {
+        "status": YourAggregateStatus.VOIDED.value,
+        "happened_at": happened_at.isoformat(),
+        "histories": [
+            {
+                "type": OperationHistoryType.UPDATED.value,
+                "data": [{"field": "property_a", "before": "a", "after": "b"}],
+                "doer": {
+                    "id": "user-id",
+                    "organization_id": None,
+                    "name": "user",
+                    "email": None,
+                    "mobile": None,
+                },
+                "created_at": happened_at.isoformat(),
+            }
+        ],
+        "tags": ["tag"],
+        "extra": {"status": YourAggregateStatus.VOIDED.value, "at": [happened_at.isoformat()]},
+        "doer": {
+            "id": "user-id",
+            "organization_id": None,
+            "name": "user",
+            "email": None,
+            "mobile": None,
+        },
+        "note": None,
+    }
+
+
+@dataclass(frozen=True)
+class TraceTestEvent(DomainEvent):
+    value: int
+
+
+class TraceTestAggregate(AggregateRoot):
+    def mark_as_delete(self):
+        self.is_delete = True
+
+
+def test_events_of_aggregate_share_trace_context():
+    parent = TraceTestEvent(0)
+    aggregate = TraceTestAggregate()
+    before = pendulum.now()
+    aggregate.add_event(TraceTestEvent(1))
+    aggregate.add_event(TraceTestEvent(2))
+
+    aggregate.save_events_tracing(parent_event=parent)
+    first, second = aggregate.all_events
+
+    assert first.tracer.context is second.tracer.context
+    assert first.tracer.trace_id == second.tracer.trace_id == parent.tracer.trace_id
+    assert first.tracer.parent_span_id == parent.tracer.span_id
+    assert first.tracer.span_id != second.tracer.span_id
+    assert before <= first.tracer.created_at <= second.tracer.created_at <= pendulum.now()
+
+
+def test_created_at_follows_wall_clock(monkeypatch):
+    # e.g. stepped by NTP after the process started
+    stepped_at = pendulum.datetime(2030, 1, 1, tz="UTC")
+    monkeypatch.setattr(time, "time_ns", lambda: int(stepped_at.timestamp()) * 1_000_000_000)
+
+    assert TraceTestEvent(1).tracer.created_at == stepped_at
+
+
+def test_deserialize_serialized_event():
+    event = TraceTestEvent(1)
+    event.tracer.trace_id = "trace-id"
+
+    restored = DomainEvent.deserialize(event.serialize())
+
+    assert restored == event
+    assert restored.tracer.span_id == event.tracer.span_id
+    assert restored.tracer.trace_id == "trace-id"
+    assert restored.tracer.created_at == event.tracer.created_at
+
+    with pytest.raises(ValueError, match="version"):
+        DomainEvent.deserialize({**event.serialize(), "version": TraceTestEvent.VERSION + 1})
+
+
+def test_event_names_are_unique():
+    def define_trace_test_event():
+        @dataclass(frozen=True)
+        class TraceTestEvent(DomainEvent):
+            value: int
+
+        return TraceTestEvent
+
+    with pytest.raises(InvalidEventRegisterError, match="TraceTestEvent"):
+        define_trace_test_event()
+
+    @dataclass(frozen=True)
+    class RenamedTestEvent(DomainEvent):
+        EVENT_NAME = "OtherTraceTestEvent"
+        value: int
+
+    assert TraceTestEvent.EVENT_NAME == "TraceTestEvent"
+    assert DomainEvent.event_types()["TraceTestEvent"] is TraceTestEvent
+    assert DomainEvent.event_types()["OtherTraceTestEvent"] is RenamedTestEvent
+    assert DomainEvent.deserialize(RenamedTestEvent(1).serialize()) == RenamedTestEvent(1)
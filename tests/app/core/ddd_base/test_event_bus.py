@@ -0,0 +1,206 @@
+import asyncio
+from dataclasses import dataclass
+
+import pytest
+
+from app.core.ddd_base import DispatchMode, DispatchPhase, DomainEvent
+from app.core.ddd_base.event_bus import USES_REQUEST_SESSION, EventBus
+from app.core.ddd_base.exception import InvalidEventRegisterError
+
+pytestmark = pytest.mark.asyncio
+
+HANDLER_DELAY_SECONDS = 0.05
+CONCURRENT_HANDLER_COUNT = 3
+
+
+@dataclass
+class BaseTestEvent(DomainEvent):
+    value: int
+
+
+@dataclass
+class ChildTestEvent(BaseTestEvent):
+    pass
+
+
+@dataclass
+class OtherTestEvent(DomainEvent):
+    value: int
+
+
+async def test_subscriptions_include_subclasses():
+    bus = EventBus()
+    calls = []
+
+    @bus.subscribe(event_types=[BaseTestEvent])
+    async def on_base(event):
+        calls.append(("base", type(event)))
+
+    @bus.subscribe(all_event=True)
+    async def on_all(event):
+        calls.append(("all", type(event)))
+
+    await bus.publish(ChildTestEvent(1))
+    await bus.publish(OtherTestEvent(1))
+
+    assert calls == [("base", ChildTestEvent), ("all", ChildTestEvent), ("all", OtherTestEvent)]
+
+    @bus.subscribe(event_types=[ChildTestEvent])
+    async def on_child(event):
+        calls.append(("child", type(event)))
+
+    calls.clear()
+    await bus.publish(ChildTestEvent(1))
+
+    assert calls == [("child", ChildTestEvent), ("base", ChildTestEvent), ("all", ChildTestEvent)]
+
+
+async def test_concurrent_dispatch_runs_sequential_handlers_first():
+    bus = EventBus(DispatchMode.CONCURRENT, max_concurrency=4)
+    running = 0
+    max_running = 0
+    calls = []
+
+    @bus.subscribe(event_types=[BaseTestEvent])
+    async def on_sequential(event):
+        calls.append(("sequential", running))
+
+    for _ in range(CONCURRENT_HANDLER_COUNT):
+
+        @bus.subscribe(event_types=[BaseTestEvent], concurrent=True)
+        async def on_concurrent(event):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(HANDLER_DELAY_SECONDS)
+            running -= 1
+
+    await bus.publish(BaseTestEvent(1))
+
+    assert calls == [("sequential", 0)]
+    assert max_running == CONCURRENT_HANDLER_COUNT
+
+
+async def test_concurrent_dispatch_raises_after_all_handlers_finish():
+    bus = EventBus(DispatchMode.CONCURRENT)
+    finished = []
+
+    @bus.subscribe(event_types=[BaseTestEvent], concurrent=True)
+    async def on_failed(event):
+        raise ValueError("failed")
+
+    @bus.subscribe(event_types=[BaseTestEvent], concurrent=True)
+    async def on_slow(event):
+        await asyncio.sleep(HANDLER_DELAY_SECONDS)
+        finished.append(event.value)
+
+    with pytest.raises(ValueError, match="failed"):
+        await bus.publish(BaseTestEvent(1))
+    assert finished == [1]
+
+
+async def test_concurrent_dispatch_runs_handlers_sequentially_by_default():
+    bus = EventBus(DispatchMode.CONCURRENT)
+    running = 0
+    max_running = 0
+
+    for _ in range(CONCURRENT_HANDLER_COUNT):
+
+        @bus.subscribe(event_types=[BaseTestEvent])
+        async def on_event(event):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0)
+            running -= 1
+
+    await bus.publish(BaseTestEvent(1))
+
+    assert max_running == 1
+
+
+async def test_handlers_using_the_request_session_can_not_be_concurrent():
+    bus = EventBus(DispatchMode.CONCURRENT)
+
+    async def on_event(event):
+        pass
+
+    setattr(on_event, USES_REQUEST_SESSION, True)
+
+    with pytest.raises(InvalidEventRegisterError):
+        bus.subscribe(event_types=[BaseTestEvent], concurrent=True)(on_event)
+    # with sessions of their own
+    bus.subscribe(event_types=[BaseTestEvent], concurrent=True, background=True)(on_event)
+
+
+async def test_after_commit_handlers_are_deferred_to_the_end_of_transaction():
+    bus = EventBus()
+    calls = []
+
+    @bus.subscribe(event_types=[BaseTestEvent], phase=DispatchPhase.AFTER_COMMIT)
+    async def on_failed(event):
+        calls.append(("failed", event.value))
+        raise ValueError("failed")
+
+    @bus.subscribe(event_types=[BaseTestEvent], phase=DispatchPhase.AFTER_COMMIT)
+    async def on_after_commit(event):
+        calls.append(("after_commit", event.value))
+
+    @bus.subscribe(event_types=[BaseTestEvent])
+    async def on_in_transaction(event):
+        calls.append(("in_transaction", event.value))
+
+    token = bus.begin_transaction()
+    await bus.publish_all([BaseTestEvent(1), ChildTestEvent(2)])
+    deferred = bus.end_transaction(token)
+
+    assert calls == [("in_transaction", 1), ("in_transaction", 2)]
+
+    calls.clear()
+    errors = await bus.dispatch_after_commit(deferred)
+
+    assert calls == [("failed", 1), ("after_commit", 1), ("failed", 2), ("after_commit", 2)]
+    assert [str(e) for e in errors] == ["failed", "failed"]
+
+    # outside of a transaction they run right away
+    calls.clear()
+    with pytest.raises(ValueError, match="failed"):
+        await bus.publish(BaseTestEvent(3))
+    assert calls == [("in_transaction", 3), ("failed", 3), ("after_commit", 3)]
+
+
+async def test_batch_handlers_receive_events_of_publish_all_in_one_call():
+    bus = EventBus()
+    calls = []
+
+    @bus.subscribe(event_types=[BaseTestEvent])
+    async def on_event(event):
+        calls.append(("event", event.value))
+
+    @bus.subscribe_batch(event_types=[BaseTestEvent])
+    async def on_batch(events):
+        calls.append(("batch", [e.value for e in events]))
+
+    await bus.publish_all([BaseTestEvent(1), OtherTestEvent(2), ChildTestEvent(3)])
+
+    assert calls == [("event", 1), ("event", 3), ("batch", [1, 3])]
+
+
+async def test_after_commit_batch_handlers_receive_events_of_transaction():
+    bus = EventBus()
+    calls = []
+
+    @bus.subscribe_batch(event_types=[BaseTestEvent], phase=DispatchPhase.AFTER_COMMIT)
+    async def on_batch(events):
+        calls.append([e.value for e in events])
+
+    token = bus.begin_transaction()
+    await bus.publish_all([BaseTestEvent(1), BaseTestEvent(2)])
+    await bus.publish(BaseTestEvent(3))
+    deferred = bus.end_transaction(token)
+
+    assert calls == []
+
+    await bus.dispatch_after_commit(deferred)
+
+    assert calls == [[1, 2, 3]]
@@ -0,0 +1,119 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+import pytest
+
+from app.core.ddd_base import DomainEvent, EventWorkerPool, OverflowPolicy
+from app.core.ddd_base.event_bus import EventBus
+
+pytestmark = pytest.mark.asyncio
+
+QUEUE_SIZE = 2
+
+request_id: ContextVar[str] = ContextVar("request_id", default="")
+
+
+@dataclass
+class WorkerTestEvent(DomainEvent):
+    value: int
+
+
+async def test_background_handlers_run_after_commit_by_workers():
+    calls = []
+
+    @asynccontextmanager
+    async def job_scope():
+        calls.append(("scope", request_id.get()))
+        yield
+
+    pool = EventWorkerPool(worker_count=2, job_scope=job_scope)
+    bus = EventBus(worker_pool=pool)
+    released = asyncio.Event()
+
+    @bus.subscribe(event_types=[WorkerTestEvent], background=True)
+    async def on_background(event):
+        await released.wait()
+        calls.append(("background", event.value))
+
+    pool.start()
+    request_id.set("request")
+    token = bus.begin_transaction()
+    await bus.publish(WorkerTestEvent(1))
+    deferred = bus.end_transaction(token)
+    await asyncio.sleep(0)
+    assert calls == []
+
+    # the publisher does not wait for the background handlers
+    assert await bus.dispatch_after_commit(deferred) == []
+    assert pool.pending_count == 1
+
+    released.set()
+    assert await pool.stop(timeout=1)
+    assert calls == [("scope", "request"), ("background", 1)]
+
+
+async def test_background_handlers_run_inline_without_started_pool():
+    bus = EventBus(worker_pool=EventWorkerPool())
+    calls = []
+
+    @bus.subscribe(event_types=[WorkerTestEvent], background=True)
+    async def on_background(event):
+        calls.append(event.value)
+
+    await bus.publish(WorkerTestEvent(1))
+
+    assert calls == [1]
+
+
+@pytest.mark.parametrize(
+    ("overflow_policy", "expected"),
+    [
+        (OverflowPolicy.DROP_NEWEST, [0, 1]),
+        (OverflowPolicy.DROP_OLDEST, [2, 3]),
+    ],
+)
+async def test_full_queue_sheds_by_overflow_policy(overflow_policy, expected):
+    pool = EventWorkerPool(
+        worker_count=1, max_queue_size=QUEUE_SIZE, overflow_policy=overflow_policy
+    )
+    calls = []
+    released = asyncio.Event()
+
+    async def on_blocking(event):
+        await released.wait()
+
+    async def on_event(event):
+        calls.append(event.value)
+
+    pool.start()
+    await pool.submit(on_blocking, WorkerTestEvent(-1))
+    await asyncio.sleep(0)
+    for i in range(QUEUE_SIZE + 2):
+        await pool.submit(on_event, WorkerTestEvent(i))
+
+    released.set()
+    assert await pool.stop(timeout=1)
+    assert calls == expected
+    assert pool.dropped_count == QUEUE_SIZE
+
+
+async def test_full_queue_blocks_publisher():
+    pool = EventWorkerPool(worker_count=1, max_queue_size=1)
+    released = asyncio.Event()
+
+    async def on_blocking(event):
+        await released.wait()
+
+    pool.start()
+    await pool.submit(on_blocking, WorkerTestEvent(0))
+    await asyncio.sleep(0)
+    await pool.submit(on_blocking, WorkerTestEvent(1))
+
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(pool.submit(on_blocking, WorkerTestEvent(2)), 0.05)
+
+    released.set()
+    assert await pool.stop(timeout=1)
+    assert pool.dropped_count == 0
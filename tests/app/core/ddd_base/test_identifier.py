@@ -0,0 +1,51 @@
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.ddd_base import IdVersion
+from app.core.ddd_base.identifier import IdGenerator
+
+ID_COUNT = 10000
+UUID_VERSION_7 = 7
+THREAD_COUNT = 8
+
+
+def test_uuid7_ids_are_time_ordered():
+    generator = IdGenerator(IdVersion.UUID7)
+    started_ms = time.time_ns() // 1_000_000
+
+    ids = [generator.generate() for _ in range(ID_COUNT)]
+    first = uuid.UUID(ids[0])
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == ID_COUNT
+    assert first.version == UUID_VERSION_7
+    assert first.variant == uuid.RFC_4122
+    assert first.int >> 80 >= started_ms
+
+
+def test_uuid7_timestamp_and_counter_are_unique_across_threads():
+    generator = IdGenerator(IdVersion.UUID7)
+    # switch threads as often as possible to interleave the updates of the counter
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(THREAD_COUNT) as executor:
+            chunks = executor.map(
+                lambda _: [generator.uuid7().int >> 64 for _ in range(ID_COUNT)],
+                range(THREAD_COUNT),
+            )
+            prefixes = [p for chunk in chunks for p in chunk]
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert len(set(prefixes)) == ID_COUNT * THREAD_COUNT
+
+
+def test_configure_id_version():
+    generator = IdGenerator()
+    assert uuid.UUID(generator.generate()).version == uuid.uuid4().version
+
+    generator.configure(IdVersion.UUID7)
+    assert uuid.UUID(generator.generate()).version == UUID_VERSION_7
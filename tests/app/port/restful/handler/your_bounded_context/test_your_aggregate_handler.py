@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+from app.adapter.controller import your_aggregate_controller
+from app.adapter.controller.your_bounded_context.request import CreateYourAggregateRequest
+from app.port.restful.handler.your_bounded_context import your_aggregate_handler
+from app.trace import TokenInfo, TokenOrganization, TokenUser
+
+pytestmark = pytest.mark.asyncio
+
+TOKEN_INFO = TokenInfo(
+    "iss",
+    "sub",
+    "aud",
+    0,
+    0,
+    0,
+    TokenUser("test-user-id", None, "test-user", None),
+    TokenOrganization("test-organization-id", "test-organization"),
+    "raw-token",
+)
+HTTP_OK = 200
+HTTP_NOT_MODIFIED = 304
+
+
+@pytest_asyncio.fixture(autouse=False, scope="function")
+async def created_your_aggregate_id():
+    create_request = CreateYourAggregateRequest.create_strictly(
+        your_value_object={"property_a": "value1", "property_b": 123},
+        doer={"id": "test-user-id"},
+    )
+    return await your_aggregate_controller.create_your_aggregate(create_request)
+
+
+@pytest.fixture
+def version_calls(monkeypatch) -> list[str]:
+    """The names of the version lookups called by the handlers."""
+    calls = []
+    for name in ("get_your_aggregate_version", "get_your_aggregates_version"):
+        lookup = getattr(your_aggregate_controller, name)
+
+        async def count(request, name=name, lookup=lookup):
+            calls.append(name)
+            return await lookup(request)
+
+        monkeypatch.setattr(your_aggregate_controller, name, count)
+    return calls
+
+
+def send_headers(monkeypatch, headers: dict[str, str]):
+    monkeypatch.setattr(your_aggregate_handler, "request", SimpleNamespace(headers=headers))
+
+
+async def test_get_your_aggregate_is_not_modified(
+    monkeypatch, version_calls, created_your_aggregate_id
+):
+    send_headers(monkeypatch, {})
+    response = await your_aggregate_handler.get_your_aggregate(
+        created_your_aggregate_id, TOKEN_INFO
+    )
+    assert response.status_code == HTTP_OK
+    # one call for the body and its version
+    assert version_calls == []
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+
+    for headers in (
+        {"if-none-match": etag},
+        # a strong tag of the version
+        {"if-none-match": etag.removeprefix("W/")},
+        {"if-modified-since": last_modified},
+    ):
+        send_headers(monkeypatch, headers)
+        response = await your_aggregate_handler.get_your_aggregate(
+            created_your_aggregate_id, TOKEN_INFO
+        )
+        assert response.status_code == HTTP_NOT_MODIFIED
+        assert response.headers["etag"] == etag
+        assert response.body == b""
+
+    send_headers(monkeypatch, {"if-none-match": 'W/"stale"'})
+    response = await your_aggregate_handler.get_your_aggregate(
+        created_your_aggregate_id, TOKEN_INFO
+    )
+    assert response.status_code == HTTP_OK
+    assert response.headers["etag"] == etag
+    assert version_calls == ["get_your_aggregate_version"] * 4
+
+
+async def test_search_your_aggregates_is_not_modified(
+    monkeypatch, version_calls, created_your_aggregate_id
+):
+    send_headers(monkeypatch, {})
+    response = await your_aggregate_handler.search_your_aggregates(
+        TOKEN_INFO, id_=[created_your_aggregate_id]
+    )
+    assert response.status_code == HTTP_OK
+    assert version_calls == []
+    etag = response.headers["etag"]
+
+    send_headers(monkeypatch, {"if-none-match": etag})
+    response = await your_aggregate_handler.search_your_aggregates(
+        TOKEN_INFO, id_=[created_your_aggregate_id]
+    )
+    assert response.status_code == HTTP_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+
+    # the search has no Last-Modified
+    send_headers(monkeypatch, {"if-modified-since": "Tue, 02 Jan 2024 03:04:05 GMT"})
+    response = await your_aggregate_handler.search_your_aggregates(
+        TOKEN_INFO, id_=[created_your_aggregate_id]
+    )
+    assert response.status_code == HTTP_OK
+    assert version_calls == ["get_your_aggregates_version"] * 2
@@ -0,0 +1,59 @@
+import pendulum
+import pytest
+
+from app.port.restful.response import create_version_headers, is_conditional, is_not_modified
+
+VERSION = "1a"
+LAST_MODIFIED = pendulum.datetime(2024, 1, 2, 3, 4, 5, 678901)
+HTTP_DATE = "Tue, 02 Jan 2024 03:04:05 GMT"
+
+
+def test_version_headers_are_weak_and_in_whole_seconds():
+    headers = create_version_headers(VERSION, LAST_MODIFIED)
+    assert headers["ETag"] == 'W/"1a"'
+    assert headers["Last-Modified"] == HTTP_DATE
+    assert "Last-Modified" not in create_version_headers(VERSION, None)
+
+
+def test_is_conditional():
+    assert is_conditional({"if-none-match": 'W/"1a"'})
+    assert is_conditional({"if-modified-since": HTTP_DATE})
+    assert not is_conditional({"accept": "application/json"})
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "expected"),
+    [
+        ('W/"1a"', True),
+        ('"1a"', True),
+        ('W/"19", W/"1a"', True),
+        ("*", True),
+        ('W/"19"', False),
+        ("1a", False),
+        ('W/"1A"', False),
+    ],
+)
+def test_if_none_match_compares_weakly(if_none_match, expected):
+    assert is_not_modified({"if-none-match": if_none_match}, VERSION, LAST_MODIFIED) is expected
+
+
+@pytest.mark.parametrize(
+    ("if_modified_since", "expected"),
+    [
+        # the Last-Modified sent, in the same second as the time
+        (HTTP_DATE, True),
+        ("Tue, 02 Jan 2024 03:04:06 GMT", True),
+        ("Tue, 02 Jan 2024 03:04:04 GMT", False),
+        ("Tue, 02 Jan 2024 03:04:05", False),
+        ("not a date", False),
+    ],
+)
+def test_if_modified_since_compares_whole_seconds(if_modified_since, expected):
+    headers = {"if-modified-since": if_modified_since}
+    assert is_not_modified(headers, VERSION, LAST_MODIFIED) is expected
+    assert not is_not_modified(headers, VERSION, None)
+
+
+def test_if_none_match_takes_precedence():
+    headers = {"if-none-match": 'W/"19"', "if-modified-since": HTTP_DATE}
+    assert not is_not_modified(headers, VERSION, LAST_MODIFIED)
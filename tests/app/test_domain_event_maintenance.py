@@ -0,0 +1,61 @@
+import gzip
+
+import orjson
+import pendulum
+import pytest
+
+from app.adapter.repository.base import session_provider
+from app.adapter.repository.domain_event_repository import DomainEventPartitionRepository
+from app.adapter.repository.orm import DomainEventModel
+from app.domain_event_maintenance import DomainEventMaintenance
+
+pytestmark = pytest.mark.asyncio
+
+
+async def list_partitions() -> dict:
+    async with session_provider:
+        return await DomainEventPartitionRepository(session_provider).list_partitions()
+
+
+async def test_create_partitions_ahead():
+    maintenance = DomainEventMaintenance(1, 0, "unused")
+    await maintenance.create_partitions()
+
+    partitions = await list_partitions()
+    current = pendulum.now("UTC").start_of("month")
+    assert DomainEventPartitionRepository.partition_name(current) in partitions
+    assert DomainEventPartitionRepository.partition_name(current.add(months=1)) in partitions
+    # idempotent
+    assert await maintenance.create_partitions() == []
+
+
+async def test_export_and_detach_expired_partition(tmp_path):
+    old_month = pendulum.datetime(2001, 1, 1)
+    name = DomainEventPartitionRepository.partition_name(old_month)
+    async with session_provider:
+        # lands in the default partition, then moved by `create_partition`
+        session_provider.session.add(
+            DomainEventModel(
+                name="OldEvent",
+                body={"value": 1},
+                version=1,
+                created_at=old_month.add(days=14),
+                span_id="span",
+                trace_id="trace",
+            )
+        )
+    async with session_provider:
+        assert (
+            await DomainEventPartitionRepository(session_provider).create_partition(old_month)
+            == name
+        )
+
+    maintenance = DomainEventMaintenance(0, 12, str(tmp_path))
+    assert name in await maintenance.apply_retention(dry_run=True)
+    assert name in await list_partitions()
+
+    assert name in await maintenance.apply_retention()
+    assert name not in await list_partitions()
+    with gzip.open(tmp_path / f"{name}.ndjson.gz") as file:
+        events = [orjson.loads(line) for line in file]
+    assert [(e["name"], e["body"]) for e in events] == [("OldEvent", {"value": 1})]
@@ -0,0 +1,90 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.adapter.controller.your_bounded_context.request import CreateYourAggregateRequest
+from app.adapter.controller.your_bounded_context.your_aggregate_controller import (
+    YourAggregateController,
+)
+from app.adapter.projection import Projection, projection_registry
+from app.adapter.repository.base import session_provider
+from app.adapter.repository.domain_event_repository import DomainEventRepository
+from app.adapter.repository.orm import ReplayCheckpointModel, YourAggregateModel
+from app.core.your_bounded_context.domain.event import YourAggregateCreated
+from app.event_replay import EventReplayer
+
+pytestmark = pytest.mark.asyncio
+
+AGGREGATE_COUNT = 3
+
+
+async def test_replay_created_events_into_projection(test_db_engine, test_db_session):
+    controller = YourAggregateController()
+    created_ids = []
+    for i in range(AGGREGATE_COUNT):
+        request = CreateYourAggregateRequest.create_strictly(
+            your_value_object={"property_a": f"replay{i}", "property_b": i},
+            doer={"id": "test-user-id"},
+        )
+        created_ids.append(await controller.create_your_aggregate(request))
+
+    projected: list[YourAggregateCreated] = []
+
+    async def project(event: YourAggregateCreated):
+        projected.append(event)
+
+    async def reset():
+        projected.clear()
+
+    replayer = EventReplayer(
+        "test-replay",
+        [Projection("created", (YourAggregateCreated,), project, reset)],
+        batch_size=2,
+        session_factory=async_sessionmaker(bind=test_db_engine),
+        session_provider_factory=lambda: session_provider._get_current_object(),
+    )
+    count = await replayer.replay(reset=True)
+
+    assert count == len(projected)
+    assert [e.your_aggregate_id for e in projected][-AGGREGATE_COUNT:] == created_ids
+    assert projected[-1].your_value_object.property_a == f"replay{AGGREGATE_COUNT - 1}"
+
+    checkpoint: ReplayCheckpointModel = (
+        await test_db_session.execute(
+            sa.select(ReplayCheckpointModel).where(ReplayCheckpointModel.name == "test-replay")
+        )
+    ).scalar_one()
+    assert checkpoint.partition_count == 1
+
+    # continues after the checkpoint
+    assert await replayer.replay() == 0
+
+
+async def test_replay_restores_your_aggregate_rows(test_db_engine, test_db_session):
+    async with session_provider:
+        start_id = await DomainEventRepository(session_provider).get_last_event_id()
+    controller = YourAggregateController()
+    your_aggregate_id = await controller.create_your_aggregate(
+        CreateYourAggregateRequest.create_strictly(
+            your_value_object={"property_a": "restored", "property_b": 1},
+            doer={"id": "test-user-id"},
+        )
+    )
+    # e.g. lost by a restore from an older backup
+    await test_db_session.execute(
+        sa.delete(YourAggregateModel).where(YourAggregateModel.id == your_aggregate_id)
+    )
+    await test_db_session.commit()
+
+    replayer = EventReplayer(
+        "test-replay-your-aggregate",
+        projection_registry.get_projections(["your_aggregate"]),
+        session_factory=async_sessionmaker(bind=test_db_engine),
+        session_provider_factory=lambda: session_provider._get_current_object(),
+    )
+    await replayer.replay(start_id=start_id, reset=True)
+
+    model = await test_db_session.get(YourAggregateModel, your_aggregate_id, populate_existing=True)
+    assert model.status == "created"
+    # the created event handler updated it
+    assert model.your_value_object["property_a"] == "restored_test_event_handler"
@@ -0,0 +1,158 @@
+import asyncio
+
+import pendulum
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.adapter.repository.base import SessionProvider, _session_provider, session_provider
+from app.adapter.repository.orm import OutboxModel
+from app.adapter.repository.outbox_repository import OutboxRepository
+from app.outbox_relay import OutboxRelay
+from packages.message_queue import EncodedMessage
+from packages.message_queue.in_memory_message_queue import InMemoryBroker, InMemoryPublisher
+
+pytestmark = pytest.mark.asyncio
+
+EXCHANGE = "test-exchange"
+QUEUE = "q"
+BATCH_SIZE = 2
+MESSAGE_COUNT = 3
+RETENTION_HOURS = 1
+WAKE_UP_TIMEOUT_SECONDS = 5
+
+
+class PartialPublisher(InMemoryPublisher):
+    """Publishes the first message of every batch only, like a connection lost midway."""
+
+    def publish_encoded_messages(self, messages: list[EncodedMessage]) -> int:
+        return super().publish_encoded_messages(messages[:1])
+
+
+@pytest.fixture
+async def session_factory(test_db_engine, mock_db_session_provider):
+    # sessions of their own, the rows locked by a relay are not seen by the others
+    factory = async_sessionmaker(bind=test_db_engine)
+    _session_provider.set(SessionProvider(factory))
+    async with factory() as session:
+        await session.execute(sa.delete(OutboxModel))
+        await session.commit()
+    return factory
+
+
+@pytest.fixture
+def broker():
+    broker = InMemoryBroker()
+    broker.queue_bind(QUEUE, EXCHANGE, "#")
+    return broker
+
+
+def create_relay(publisher: InMemoryPublisher, **kwargs) -> OutboxRelay:
+    return OutboxRelay(
+        publisher,
+        batch_size=BATCH_SIZE,
+        poll_interval_second=kwargs.pop("poll_interval_second", 60),
+        retention_hours=RETENTION_HOURS,
+        **kwargs,
+    )
+
+
+async def add_messages(count: int):
+    async with session_provider:
+        OutboxRepository(session_provider).add_messages(
+            [
+                EncodedMessage("ddd-service", f"body-{i}".encode(), None, f"trace-{i}")
+                for i in range(count)
+            ]
+        )
+
+
+async def load_rows(session_factory) -> list[OutboxModel]:
+    async with session_factory() as session:
+        return list(await session.scalars(sa.select(OutboxModel).order_by(OutboxModel.id)))
+
+
+async def test_relay_publishes_batches_and_marks_them_sent(session_factory, broker):
+    await add_messages(MESSAGE_COUNT)
+
+    await create_relay(InMemoryPublisher(EXCHANGE, broker=broker)).relay()
+
+    assert broker.message_count(QUEUE) == MESSAGE_COUNT
+    assert [broker.get(QUEUE).body for _ in range(MESSAGE_COUNT)] == [
+        f"body-{i}".encode() for i in range(MESSAGE_COUNT)
+    ]
+    assert all(r.sent_at is not None for r in await load_rows(session_factory))
+
+
+async def test_rows_locked_by_another_relay_are_skipped(session_factory, broker):
+    await add_messages(MESSAGE_COUNT)
+    relay = create_relay(InMemoryPublisher(EXCHANGE, broker=broker))
+
+    other_relay = SessionProvider(session_factory)
+    async with other_relay:
+        locked = await OutboxRepository(other_relay).lock_unsent_messages(1)
+
+        assert await relay.relay_batch() == (BATCH_SIZE, BATCH_SIZE)
+
+    rows = await load_rows(session_factory)
+    assert rows[0].id == locked[0].id
+    assert rows[0].sent_at is None
+    assert all(r.sent_at is not None for r in rows[1:])
+
+    assert await relay.relay_batch() == (1, 1)
+    assert broker.message_count(QUEUE) == MESSAGE_COUNT
+
+
+async def test_unpublished_rows_stay_unsent(session_factory, broker):
+    await add_messages(MESSAGE_COUNT)
+    relay = create_relay(PartialPublisher(EXCHANGE, broker=broker))
+
+    assert await relay.relay_batch() == (BATCH_SIZE, 1)
+
+    rows = await load_rows(session_factory)
+    assert [r.sent_at is not None for r in rows] == [True, False, False]
+    assert broker.message_count(QUEUE) == 1
+
+
+async def test_purge_deletes_rows_sent_before_retention(session_factory, broker):
+    await add_messages(MESSAGE_COUNT)
+    relay = create_relay(InMemoryPublisher(EXCHANGE, broker=broker))
+    await relay.relay_batch()
+    rows = await load_rows(session_factory)
+    async with session_factory() as session:
+        await session.execute(
+            sa.update(OutboxModel)
+            .where(OutboxModel.id == rows[0].id)
+            .values(sent_at=pendulum.now().subtract(hours=RETENTION_HOURS + 1))
+        )
+        await session.commit()
+
+    await relay.purge()
+
+    assert [r.id for r in await load_rows(session_factory)] == [r.id for r in rows[1:]]
+
+    # once per interval
+    await relay.relay()
+    await relay.purge()
+    assert len(await load_rows(session_factory)) == MESSAGE_COUNT - 1
+
+
+async def test_notification_wakes_relay(session_factory, broker, test_db_engine):
+    conninfo = test_db_engine.url.render_as_string(hide_password=False).replace(
+        "postgresql+psycopg", "postgresql", 1
+    )
+    # polled only once a minute, published by the notification of the insert
+    relay = create_relay(InMemoryPublisher(EXCHANGE, broker=broker), conninfo=conninfo)
+    task = asyncio.create_task(relay.run())
+    try:
+        await asyncio.sleep(1)
+        await add_messages(1)
+
+        delivery = await asyncio.to_thread(broker.get, QUEUE, WAKE_UP_TIMEOUT_SECONDS)
+
+        assert delivery is not None
+        assert delivery.body == b"body-0"
+    finally:
+        relay.exit_gracefully()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
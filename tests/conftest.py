@@ -10,11 +10,17 @@ from testcontainers.rabbitmq import RabbitMqContainer
 
 from app.adapter.repository.base import SessionProvider, _session_provider
 from app.adapter.repository.orm import Base
+from app.bootstrap import bootstrap
 from app.config import config
 from app.package_instance import _message_queue_publisher
 from packages.message_queue.rabbitmq_message_queue import RabbitMqPublisher
 
 
+@pytest.fixture(scope="session", autouse=True)
+def bootstrap_app():
+    bootstrap()
+
+
 @pytest_asyncio.fixture(scope="session")
 async def test_db_engine():
     with PostgresContainer("postgres:15.10") as postgres:
@@ -45,11 +51,8 @@ async def test_db_session(test_db_engine):
 def mock_db_session_provider(test_db_session):
 
     class TestSessionProvider(SessionProvider):
-        async def __aenter__(self):
-            if self.session_count == 0:
-                self.session = test_db_session
-            self.session_count += 1
-            return self
+        def create_session(self):
+            return test_db_session
 
     _session_provider.set(TestSessionProvider())
 
@@ -0,0 +1,44 @@
+import pytest
+
+from packages.json_diff import diff, patch
+
+
+@pytest.mark.parametrize(
+    ("old", "new"),
+    [
+        (1, 2),
+        ("a", None),
+        (None, {"a": 1}),
+        ({"a": 1, "b": 2}, {"a": 1, "c": 3}),
+        ({"a": {"b": [1, 2]}}, {"a": {"b": [1, 2, 3]}}),
+        ([1, 2, 3], [1, 3]),
+        ([{"a": 1}], [{"a": 2}]),
+        ({"a": None}, {"a": False}),
+        ({"a": 1}, {"a": True}),
+    ],
+)
+def test_patch_restores_new(old, new):
+    assert patch(old, diff(old, new)) == new
+
+
+def test_equal_documents_have_no_delta():
+    assert diff({"a": [1, {"b": None}]}, {"a": [1, {"b": None}]}) is None
+    assert patch({"a": 1}, None) == {"a": 1}
+
+
+def test_appended_list_stores_new_items_only():
+    histories = [{"type": "CREATED"}, {"type": "UPDATED"}]
+    delta = diff({"histories": histories}, {"histories": [*histories, {"type": "VOIDED"}]})
+    assert delta == {"$patch": {"histories": {"$append": [{"type": "VOIDED"}]}}}
+
+
+def test_object_delta_keeps_changed_keys_only():
+    delta = diff({"a": 1, "b": 2, "c": 3}, {"a": 1, "b": 4, "d": 5})
+    assert delta == {"$patch": {"b": {"$replace": 4}, "d": {"$replace": 5}}, "$remove": ["c"]}
+
+
+def test_patch_does_not_modify_old():
+    old = {"a": [1], "b": {"c": 1}}
+    new = patch(old, diff(old, {"a": [1, 2], "b": {"c": 2}}))
+    new["a"].append(3)
+    assert old == {"a": [1], "b": {"c": 1}}
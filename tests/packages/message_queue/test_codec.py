@@ -0,0 +1,58 @@
+import pendulum
+import pytest
+
+from packages.message_queue import codec
+from packages.message_queue.message_queue import QueueMessage
+from packages.message_queue.type import YourAggregateServiceFuntion, YourAggregateVoided
+
+
+def create_message() -> QueueMessage:
+    return QueueMessage(
+        "trace-id",
+        YourAggregateServiceFuntion.YOUR_AGGREGATE_VOIDED,
+        [YourAggregateVoided("id-1"), YourAggregateVoided("id-2")],
+        started=pendulum.from_timestamp(1700000000.5),
+    )
+
+
+def test_to_payload_matches_reflective_path():
+    message = create_message()
+
+    assert message.to_payload() == message.to_camel_case_json()
+
+
+def test_from_payload_matches_reflective_path():
+    payload = create_message().to_camel_case_json()
+
+    assert QueueMessage.from_payload(payload) == QueueMessage.create_from_camel_case_json(payload)
+
+
+def test_from_payload_falls_back_only_on_decode_errors():
+    payload = create_message().to_camel_case_json()
+
+    def fallback(payload):
+        return "reflective"
+
+    with pytest.MonkeyPatch.context() as m:
+        m.setattr(QueueMessage, "create_from_camel_case_json", fallback)
+        assert QueueMessage.from_payload({**payload, "started": "not a datetime"}) == "reflective"
+
+        def decode_payload(dc_type, data):
+            raise RuntimeError("bug")
+
+        m.setattr(codec, "decode_payload", decode_payload)
+        with pytest.raises(RuntimeError, match="bug"):
+            QueueMessage.from_payload(payload)
+
+
+def test_encode_decode_round_trip():
+    message = QueueMessage.decode(create_message().encode())
+
+    assert message.trace_id == "trace-id"
+    assert message.function_name == YourAggregateServiceFuntion.YOUR_AGGREGATE_VOIDED.value
+    assert message.data == [{"your_aggregate_id": "id-1"}, {"your_aggregate_id": "id-2"}]
+    assert message.started == pendulum.from_timestamp(1700000000.5)
+    assert message.get_data(YourAggregateVoided) == [
+        YourAggregateVoided("id-1"),
+        YourAggregateVoided("id-2"),
+    ]
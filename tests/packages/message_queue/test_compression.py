@@ -0,0 +1,72 @@
+import pytest
+
+from packages.message_queue import codec
+from packages.message_queue.compression import ContentEncoding, compress, decompress
+from packages.message_queue.in_memory_message_queue import (
+    InMemoryBroker,
+    InMemoryConsumer,
+    InMemoryPublisher,
+)
+from packages.message_queue.message_queue import QueueMessage
+
+EXCHANGE = "test-exchange"
+ITEM_COUNT = 1000
+MAX_MESSAGE_BYTES = 4096
+
+
+@pytest.mark.parametrize("content_encoding", list(ContentEncoding))
+def test_compress_round_trip(content_encoding):
+    body = codec.dumps({"data": [{"customerName": "name"}] * 100})
+    compressed = compress(body, content_encoding)
+
+    assert len(compressed) < len(body)
+    assert decompress(compressed, content_encoding.value) == body
+    assert decompress(body, None) == body
+
+
+@pytest.mark.parametrize("content_encoding", list(ContentEncoding))
+def test_publisher_compresses_large_messages(content_encoding):
+    broker = InMemoryBroker()
+    consumer = InMemoryConsumer("q", "#", EXCHANGE, broker=broker)
+    publisher = InMemoryPublisher(
+        EXCHANGE, broker=broker, content_encoding=content_encoding, compress_threshold_bytes=1024
+    )
+    publisher.push_message("small", QueueMessage("trace-id", "small", [{"key_a": 1}]))
+    publisher.push_message(
+        "large", QueueMessage("trace-id", "large", [{"key_a": i} for i in range(ITEM_COUNT)])
+    )
+    publisher.publish_messages()
+
+    deliveries = {}
+    while delivery := broker.get("q", timeout=0):
+        deliveries[delivery.routing_key] = delivery
+    assert "content_encoding" not in deliveries["small"].properties
+    assert deliveries["large"].properties["content_encoding"] == content_encoding.value
+
+    received: list[QueueMessage] = []
+    for delivery in deliveries.values():
+        consumer.handle_delivery(received.append, delivery)
+    assert sorted(len(m.data) for m in received) == [1, ITEM_COUNT]
+
+
+def test_publisher_splits_oversized_messages():
+    broker = InMemoryBroker()
+    consumer = InMemoryConsumer("q", "#", EXCHANGE, broker=broker)
+    publisher = InMemoryPublisher(EXCHANGE, broker=broker, max_message_bytes=MAX_MESSAGE_BYTES)
+    for i in range(ITEM_COUNT):
+        publisher.push_message("service", QueueMessage("trace-id", "function", [{"key_a": i}]))
+    publisher.publish_messages()
+
+    sizes = []
+    received: list[QueueMessage] = []
+
+    def handler(message: QueueMessage):
+        sizes.append(len(message.encode()))
+        received.append(message)
+
+    consumer.consume_pending(handler)
+
+    assert len(received) > 1
+    assert max(sizes) <= MAX_MESSAGE_BYTES
+    assert {m.trace_id for m in received} == {"trace-id"}
+    assert [d["key_a"] for m in received for d in m.data] == list(range(ITEM_COUNT))
@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from packages.message_queue.in_memory_message_queue import (
+    InMemoryBroker,
+    InMemoryConsumer,
+    InMemoryPublisher,
+    topic_match,
+)
+from packages.message_queue.message_queue import QueueMessage
+
+EXCHANGE = "test-exchange"
+DELAY_SECONDS = 0.2
+
+
+@pytest.fixture
+def broker():
+    return InMemoryBroker()
+
+
+@pytest.mark.parametrize(
+    ("pattern", "routing_key", "matched"),
+    [
+        ("a.b", "a.b", True),
+        ("a.*", "a.b", True),
+        ("a.*", "a.b.c", False),
+        ("a.*", "a", False),
+        ("a.#", "a", True),
+        ("a.#", "a.b.c", True),
+        ("#", "a.b.c", True),
+        ("#.ddd-service.#", "ddd-service", True),
+        ("#.ddd-service.#", "x.ddd-service.y.z", True),
+        ("#.ddd-service.#", "x.other-service", False),
+        ("*.b.#", "a.b", True),
+        ("*.b.#", "b", False),
+    ],
+)
+def test_topic_match(pattern, routing_key, matched):
+    assert topic_match(pattern, routing_key) is matched
+
+
+def test_publish_routes_to_bound_queues(broker):
+    broker.queue_bind("q1", EXCHANGE, "#.service-a.#")
+    broker.queue_bind("q2", EXCHANGE, "service-b")
+
+    assert broker.publish(EXCHANGE, "service-a", b"1") == 1
+    assert broker.publish(EXCHANGE, "service-b", b"2") == 1
+    assert broker.publish(EXCHANGE, "service-c", b"3") == 0
+
+    assert broker.get("q1", timeout=0).body == b"1"
+    assert broker.get("q2", timeout=0).body == b"2"
+    assert broker.get("q1", timeout=0) is None
+
+
+def test_delayed_delivery(broker):
+    broker.queue_bind("q", EXCHANGE, "#")
+    broker.publish(EXCHANGE, "key", b"later", delay_seconds=DELAY_SECONDS)
+
+    assert broker.get("q", timeout=0) is None
+    assert broker.message_count("q", include_delayed=True) == 1
+
+    started = time.monotonic()
+    delivery = broker.get("q", timeout=1)
+    assert delivery.body == b"later"
+    assert time.monotonic() - started >= DELAY_SECONDS / 2
+
+
+def test_ack_and_nack(broker):
+    broker.queue_bind("q", EXCHANGE, "#")
+    broker.publish(EXCHANGE, "key", b"m")
+
+    delivery = broker.get("q", timeout=0)
+    assert broker.unacked_count("q") == 1
+
+    broker.nack("q", delivery.delivery_tag, requeue=True)
+    redelivery = broker.get("q", timeout=0)
+    assert redelivery.redelivered
+    assert redelivery.body == b"m"
+
+    broker.nack("q", redelivery.delivery_tag, requeue=False)
+    assert broker.unacked_count("q") == 0
+    assert broker.message_count("q") == 0
+    assert [d.body for d in broker.dead_letters("q")] == [b"m"]
+
+    broker.publish(EXCHANGE, "key", b"n")
+    delivery = broker.get("q", timeout=0)
+    broker.ack("q", delivery.delivery_tag)
+    assert broker.unacked_count("q") == 0
+
+
+def test_publisher_and_consumer(broker):
+    consumer = InMemoryConsumer("q", "#.service.#", EXCHANGE, broker=broker)
+    publisher = InMemoryPublisher(EXCHANGE, broker=broker)
+    publisher.push_message("service", QueueMessage("trace-id", "function", [{"key_a": 1}]))
+    publisher.push_message("service", QueueMessage("trace-id", "function", [{"key_a": 2}]))
+    publisher.publish_messages()
+
+    received: list[QueueMessage] = []
+    assert consumer.consume_pending(received.append) == 1
+    assert received[0].trace_id == "trace-id"
+    assert received[0].data == [{"key_a": 1}, {"key_a": 2}]
+    assert broker.unacked_count("q") == 0
+
+
+def test_consumer_retries_then_dead_letters(broker):
+    consumer = InMemoryConsumer("q", "#", EXCHANGE, broker=broker)
+    publisher = InMemoryPublisher(EXCHANGE, broker=broker)
+    publisher.push_message(
+        "service",
+        QueueMessage("trace-id", "function", [], attempt_number=2, retry_delay_second=0),
+    )
+    publisher.publish_messages()
+
+    calls = []
+
+    def failing_handler(message: QueueMessage):
+        calls.append(message.attempt_number)
+        raise RuntimeError("failed")
+
+    consumer.consume_pending(failing_handler)
+    consumer.consume_pending(failing_handler)
+
+    assert calls == [2, 1]
+    assert len(broker.dead_letters("q")) == 1
+    assert broker.message_count("q", include_delayed=True) == 0
@@ -0,0 +1,110 @@
+import contextlib
+
+import pytest
+
+from packages.message_queue.in_memory_message_queue import InMemoryBroker, InMemoryPublisher
+from packages.message_queue.linger_flusher import LingerFlusher
+from packages.message_queue.message_queue import QueueMessage
+
+EXCHANGE = "test-exchange"
+LINGER_MS = 50
+REQUEST_COUNT = 10
+MAX_RETRIES = 2
+
+
+class CountingPublisher(InMemoryPublisher):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connect_count = 0
+
+    def connect(self) -> contextlib.nullcontext:
+        self.connect_count += 1
+        return super().connect()
+
+
+@pytest.fixture
+def broker():
+    broker = InMemoryBroker()
+    broker.queue_bind("q", EXCHANGE, "#")
+    return broker
+
+
+def push(publisher: InMemoryPublisher, i: int):
+    publisher.push_message("service", QueueMessage(f"trace-{i}", "function", [{"key_a": i}]))
+
+
+def test_messages_of_requests_are_published_in_one_burst(broker):
+    flusher_publisher = CountingPublisher(EXCHANGE, broker=broker)
+    flusher = LingerFlusher(flusher_publisher, linger_ms=LINGER_MS)
+
+    for i in range(REQUEST_COUNT):
+        publisher = InMemoryPublisher(EXCHANGE, broker=broker, flusher=flusher)
+        push(publisher, i)
+        publisher.publish_messages()
+        assert not publisher.messages
+
+    assert flusher.flush(timeout=1)
+    assert broker.message_count("q") == REQUEST_COUNT
+    assert flusher_publisher.connect_count == 1
+    assert flusher.close(timeout=1)
+
+
+def test_max_batch_count_publishes_before_linger(broker):
+    flusher_publisher = CountingPublisher(EXCHANGE, broker=broker)
+    flusher = LingerFlusher(flusher_publisher, linger_ms=60_000, max_batch_count=2)
+    publisher = InMemoryPublisher(EXCHANGE, broker=broker, flusher=flusher)
+
+    for i in range(REQUEST_COUNT):
+        push(publisher, i)
+    publisher.publish_messages()
+
+    assert broker.get("q", timeout=1) is not None
+    assert flusher.close(timeout=1)
+    assert flusher_publisher.connect_count == REQUEST_COUNT // 2
+
+
+def test_sync_publish_bypasses_flusher(broker):
+    flusher_publisher = CountingPublisher(EXCHANGE, broker=broker)
+    flusher = LingerFlusher(flusher_publisher, linger_ms=60_000)
+    publisher = InMemoryPublisher(EXCHANGE, broker=broker, flusher=flusher)
+
+    push(publisher, 0)
+    publisher.publish_messages(sync=True)
+
+    assert broker.message_count("q") == 1
+    assert flusher.pending_count == 0
+    assert flusher_publisher.connect_count == 0
+
+
+class FailingPublisher(CountingPublisher):
+    def publish_encoded_messages(self, messages) -> int:
+        self.connect_count += 1
+        return 0
+
+
+def test_failed_batch_is_dropped_after_max_retries(broker):
+    flusher_publisher = FailingPublisher(EXCHANGE, broker=broker)
+    flusher = LingerFlusher(
+        flusher_publisher, linger_ms=0, retry_delay_second=0.01, max_retries=MAX_RETRIES
+    )
+    publisher = InMemoryPublisher(EXCHANGE, broker=broker, flusher=flusher)
+
+    push(publisher, 0)
+    publisher.publish_messages()
+
+    assert flusher.flush(timeout=1)
+    assert flusher.pending_count == 0
+    assert flusher_publisher.connect_count == MAX_RETRIES + 1
+    assert broker.message_count("q") == 0
+    assert flusher.close(timeout=1)
+
+
+def test_closed_flusher_falls_back_to_sync_publish(broker):
+    flusher = LingerFlusher(CountingPublisher(EXCHANGE, broker=broker))
+    assert flusher.close(timeout=1)
+    publisher = InMemoryPublisher(EXCHANGE, broker=broker, flusher=flusher)
+
+    push(publisher, 0)
+    publisher.publish_messages()
+
+    assert broker.message_count("q") == 1
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from packages.single_flight import SingleFlight
+
+CALLER_COUNT = 10
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+        self.release = asyncio.Event()
+
+    async def call(self) -> int:
+        self.count += 1
+        await self.release.wait()
+        return self.count
+
+    async def fail(self) -> int:
+        self.count += 1
+        await self.release.wait()
+        raise ValueError("failed")
+
+
+async def test_share_call_of_same_key():
+    flight = SingleFlight()
+    counter = Counter()
+
+    tasks = [asyncio.create_task(flight.do("key", counter.call)) for _ in range(CALLER_COUNT)]
+    await asyncio.sleep(0)
+    assert len(flight) == 1
+    counter.release.set()
+
+    assert await asyncio.gather(*tasks) == [1] * CALLER_COUNT
+    assert counter.count == 1
+    assert len(flight) == 0
+
+
+async def test_run_each_key():
+    flight = SingleFlight()
+    counter = Counter()
+    counter.release.set()
+
+    await asyncio.gather(flight.do("a", counter.call), flight.do("b", counter.call))
+    assert counter.count == 2  # noqa: PLR2004
+
+
+async def test_run_again_after_finished():
+    flight = SingleFlight()
+    counter = Counter()
+    counter.release.set()
+
+    assert await flight.do("key", counter.call) == 1
+    assert await flight.do("key", counter.call) == 2  # noqa: PLR2004
+
+
+async def test_propagate_exception():
+    flight = SingleFlight()
+    counter = Counter()
+
+    tasks = [asyncio.create_task(flight.do("key", counter.fail)) for _ in range(CALLER_COUNT)]
+    await asyncio.sleep(0)
+    counter.release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert counter.count == 1
+    assert len(flight) == 0
+
+
+async def test_cancel_one_caller():
+    flight = SingleFlight()
+    counter = Counter()
+
+    cancelled = asyncio.create_task(flight.do("key", counter.call))
+    waiting = asyncio.create_task(flight.do("key", counter.call))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    counter.release.set()
+
+    assert await waiting == 1
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+
+async def test_cancel_all_callers():
+    flight = SingleFlight()
+    counter = Counter()
+
+    tasks = [asyncio.create_task(flight.do("key", counter.call)) for _ in range(CALLER_COUNT)]
+    await asyncio.sleep(0)
+    (call,) = flight._calls.values()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert call.task.cancelled()
+    assert len(flight) == 0